@@ -4,37 +4,322 @@ This is the M in MVC.
 This uses a Pandas DataFrames as the DataFrame implementation.
 """
 
-
+import bisect
+from os.path import splitext
+import threading
+import weakref
+import numpy as np
 import pandas as pd
 from dataFileIO import DataFileIO
+from dataFileIndex import HashIndex, TrigramIndex
+from dataFileIOArrow import DataFileIOArrow
 from dataFileIOCSV import DataFileIOCSV, InvalidFileType
+from dataFileIOParquet import DataFileIOParquet
+from dataFileJournal import DataFileJournal
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+except ImportError:
+    pa = None
+    pa_compute = None
+
+MATCH_LITERAL = "literal"
+MATCH_LITERAL_IGNORE_CASE = "literal-ignore-case"
+MATCH_PREFIX = "prefix"
+MATCH_REGEX = "regex"
+MATCH_MODES = [MATCH_LITERAL, MATCH_LITERAL_IGNORE_CASE, MATCH_PREFIX, MATCH_REGEX]
+
+_REGEX_SPECIAL_CHARACTERS = set(".^$*+?{}[]\\|()")
+
+_DELETED_ROWS_COMPACTION_THRESHOLD = 1024
+
+_JOURNAL_CHECKPOINT_ENTRIES = 10000
+_JOURNAL_OPERATIONS = {"add_rows", "remove_row", "change_row", "set_cells"}
+
+_IO_HANDLER_TYPES = {}
+
+
+def register_io_handler(extension, IO_handler_type):
+    """
+    Register the DataFileIO class used for files with the extension `extension` by `DataFile.from_file`
+
+    :param extension: The file extension, including the dot
+    :param IO_handler_type: The DataFileIO class, constructed with the filename and any options
+    :type extension: string
+    :type IO_handler_type: class
+    """
+    _IO_HANDLER_TYPES[extension.lower()] = IO_handler_type
+
+
+def get_supported_extensions():
+    """
+    Get the file extensions that have a registered DataFileIO class
+
+    :return: List of file extensions
+    :rtype: list of strings
+    """
+    return list(_IO_HANDLER_TYPES)
+
+
+register_io_handler(".csv", DataFileIOCSV)
+for extension in DataFileIOParquet.EXTENSIONS:
+    register_io_handler(extension, DataFileIOParquet)
+for extension in DataFileIOArrow.EXTENSIONS:
+    register_io_handler(extension, DataFileIOArrow)
+
+
+def _as_strings(values):
+    """
+    Get `values` as strings, which is how values are compared when searching.
+    Columns with object dtype usually already hold strings, and are only converted if they hold anything else.
+
+    :param values: The values to convert
+    :type values: Pandas Series
+    :return: the values as strings
+    :rtype: Pandas Series
+    """
+    if values.dtype == object and pd.api.types.infer_dtype(values) in [
+        "string",
+        "empty",
+    ]:
+        return values
+    return values.astype(str)
+
+
+def _match_mask(values, term, match_mode):
+    """
+    Get which of `values` match `term` under `match_mode` for a substring search.
+    The literal modes use Arrow compute kernels if pyarrow is installed, otherwise NumPy char operations.
+
+    :param values: The values to match against
+    :param term: The string to match
+    :param match_mode: One of `MATCH_MODES`
+    :type values: Pandas Series
+    :type term: string
+    :type match_mode: string
+    :return: boolean mask, True where the value matches
+    :rtype: numpy array of booleans
+    """
+    values = _as_strings(values)
+
+    if match_mode == MATCH_REGEX:
+        return values.str.contains(term, na=False).to_numpy(dtype=bool)
+
+    if pa_compute is not None:
+        array = pa.array(values.to_numpy(), type=pa.string(), from_pandas=True)
+        if match_mode == MATCH_PREFIX:
+            matches = pa_compute.starts_with(array, term)
+        else:
+            matches = pa_compute.match_substring(
+                array, term, ignore_case=match_mode == MATCH_LITERAL_IGNORE_CASE
+            )
+        return matches.fill_null(False).to_numpy(zero_copy_only=False)
+
+    strings = values.to_numpy().astype(str)
+    if match_mode == MATCH_PREFIX:
+        return np.char.startswith(strings, term)
+    if match_mode == MATCH_LITERAL_IGNORE_CASE:
+        return np.char.find(np.char.lower(strings), term.lower()) >= 0
+    return np.char.find(strings, term) >= 0
+
+
+class DataFileSnapshot:
+    """
+    A read-only, versioned view of the DataFrame of a DataFile.
+    Snapshots share memory with the DataFile, the DataFile copies its DataFrame
+    before writing to it if a snapshot of the current version is still alive.
+    """
+
+    def __init__(self, dataframe, version):
+        """
+        Create a DataFileSnapshot object.
+
+        :param dataframe: The DataFrame of the DataFile at `version`, this is not copied
+        :param version: The version of the DataFile the snapshot was taken at
+        :type dataframe: Pandas DataFrame
+        :type version: int
+        """
+        self._dataframe = dataframe
+        self._version = version
+
+    def get_version(self):
+        """
+        Get the version of the DataFile this snapshot was taken at
+
+        :return: version of the snapshot
+        :rtype: int
+        """
+        return self._version
+
+    def get_columns(self):
+        """
+        Get the column names of the snapshot
+
+        :return: List of column names
+        :rtype: list of strings
+        """
+        return list(self._dataframe.columns)
+
+    def get_dtypes(self):
+        """
+        Get the dtype of each column of the snapshot
+
+        :return: dict of column name to dtype
+        :rtype: dict
+        """
+        return self._dataframe.dtypes.to_dict()
+
+    def get_row(self, index):
+        """
+        Get the row at `index` as a single row DataFrame.
+
+        :param index: The index of the row
+        :type index: int
+        :return: DataFrame with only the row at `index`
+        :rtype: Pandas DataFrame
+        """
+        return self._dataframe.loc[[index]]
+
+    def take(self, positions):
+        """
+        Get a copy of the rows at `positions` of the snapshot
+
+        :param positions: The positions of the rows
+        :type positions: list or numpy array of ints
+        :return: The rows at `positions`
+        :rtype: Pandas DataFrame
+        """
+        return self._dataframe.iloc[positions]
+
+    def head(self, n):
+        """
+        Get a copy of the first `n` rows of the snapshot
+
+        :param n: number of rows
+        :type n: int
+        :return: The first `n` rows
+        :rtype: Pandas DataFrame
+        """
+        return self._dataframe.head(n).copy()
+
+    def view(self):
+        """
+        Get a shallow copy of the snapshot's DataFrame.
+        The index and columns can be relabelled freely, but the values must not be written to.
+
+        :return: shallow copy of the DataFrame
+        :rtype: Pandas DataFrame
+        """
+        return self._dataframe.copy(deep=False)
+
+    def get(self):
+        """
+        Get a deep copy of the snapshot's DataFrame, for callers that need to write to it.
+
+        :return: A deep copy of the DataFrame
+        :rtype: Pandas DataFrame
+        """
+        return self._dataframe.copy()
+
+    def __len__(self):
+        """
+        Implementation of length, based on length of the snapshot's DataFrame
+
+        :return: number of rows in the snapshot
+        :rtype: int
+        """
+        return len(self._dataframe)
 
 
 class DataFile:
-    def __init__(self, IO_handler):
+    def __init__(self, IO_handler, journal=False):
         """
         Create a DataFile object.
+        With a journal, every change is written to a journal next to the source file as it is made,
+        any changes left in the journal (e.g. after a crash) are replayed, and saves happen in the background.
 
         :param IO_handler: The file handler that takes care of saving and loading
+        :param journal: (default=False) Flag to keep a write-ahead journal of changes
         :type IO_handler: DataFileIO
+        :type journal: boolean
         """
         self._IO_handler = IO_handler
         self._dataframe = self._IO_handler.load()
+        self._version = 0
+        self._snapshot_ref = None
+
+        self._row_ids = np.arange(len(self._dataframe), dtype=np.int64)
+        self._next_row_id = len(self._dataframe)
+        self._indexes = {}
+        self._unindexed_columns = set()
+        self._substring_indexed_columns = set()
+
+        self._query_cache = None
+
+        self._pending_columns = {column: [] for column in self._dataframe.columns}
+        self._total_pending_rows = 0
+
+        self._deleted_positions = []
+        self._has_positional_index = self._dataframe.index.equals(
+            pd.RangeIndex(len(self._dataframe))
+        )
+
+        self._saved_next_row_id = self._next_row_id
+        self._changed_saved_row_ids = set()
+        self._has_removed_saved_rows = False
+
+        self._journal = None
+        self._checkpoint_thread = None
+        self._checkpoint_error = None
+        if journal:
+            self._replay_journal(DataFileJournal(self._IO_handler.get_filename()))
 
     @staticmethod
-    def from_csv(filename):
+    def from_csv(filename, infer_types=False, use_cache=False, journal=False):
         """
         Returns a DataFile using a csv file as a source.
         Creates a DataFileIOCSV as an IO_handler for the DataFile.
         (based on Pandas' from_csv method)
 
         :param filename: The filename for the csv data
+        :param infer_types: (default=False) Flag to load numbers, dates and categoricals as typed columns
+        :param use_cache: (default=False) Flag to keep a Feather cache of the parsed csv file for faster loading
+        :param journal: (default=False) Flag to keep a write-ahead journal of changes
         :type filename: string
+        :type infer_types: boolean
+        :type use_cache: boolean
+        :type journal: boolean
         :return: DataFile with datasource as the csv file `filename`
         :rtype: DataFile
         """
-        IO_handler = DataFileIOCSV(filename)
-        return DataFile(IO_handler)
+        IO_handler = DataFileIOCSV(
+            filename, infer_types=infer_types, use_cache=use_cache
+        )
+        return DataFile(IO_handler, journal=journal)
+
+    @staticmethod
+    def from_file(filename, journal=False, **options):
+        """
+        Returns a DataFile using a file as a source.
+        The IO_handler is chosen by the extension of `filename`, see `register_io_handler`.
+
+        :param filename: The filename for the data
+        :param journal: (default=False) Flag to keep a write-ahead journal of changes
+        :param options: Options passed on to the IO_handler, e.g. `columns` and `filters` for Parquet files
+        :type filename: string
+        :type journal: boolean
+        :return: DataFile with datasource as the file `filename`
+        :rtype: DataFile
+        """
+        extension = splitext(filename)[1].lower()
+        if extension not in _IO_HANDLER_TYPES:
+            raise InvalidFileType(
+                "Input file {} is not a supported file type.".format(filename)
+            )
+        return DataFile(
+            _IO_HANDLER_TYPES[extension](filename, **options), journal=journal
+        )
 
     def get(self):
         """
@@ -43,8 +328,164 @@ class DataFile:
         :return: A deep copy of the current dataframe
         :rtype: Pandas DataFrame
         """
+        self._materialize()
         return self._dataframe.copy()
 
+    def get_version(self):
+        """
+        Get the version of the DataFile, which increases every time `_dataframe` is changed
+
+        :return: current version
+        :rtype: int
+        """
+        return self._version
+
+    def snapshot(self):
+        """
+        Get a read-only snapshot of the current `_dataframe` without copying it.
+        Repeated calls between changes return the same snapshot.
+
+        :return: snapshot of the current version
+        :rtype: DataFileSnapshot
+        """
+        self._materialize()
+
+        snapshot = None
+        if self._snapshot_ref is not None:
+            snapshot = self._snapshot_ref()
+
+        if snapshot is None or snapshot.get_version() != self._version:
+            snapshot = DataFileSnapshot(self._dataframe, self._version)
+            self._snapshot_ref = weakref.ref(snapshot)
+
+        return snapshot
+
+    def _prepare_write(self):
+        """
+        Copy `_dataframe` if a snapshot still refers to it, so that the snapshot is not changed
+        by the upcoming write. Must be called before every change to `_dataframe`.
+        """
+        if self._snapshot_ref is not None and self._snapshot_ref() is not None:
+            self._dataframe = self._dataframe.copy()
+        self._snapshot_ref = None
+
+    def _mark_changed(self):
+        """
+        Increase the version after a change to `_dataframe`, invalidating cached search results
+        """
+        self._version += 1
+        self._query_cache = None
+
+    def set_column_indexing(self, key, enabled=True):
+        """
+        Turn indexing of the column `key` on or off.
+        Indexes of enabled columns are built on the first search of that column.
+
+        :param key: The column to turn indexing on or off for
+        :param enabled: (default=True) Flag to allow indexing of `key`
+        :type key: string
+        :type enabled: boolean
+        """
+        if key not in self._dataframe.columns:
+            raise KeyError("key={} not in this DataFrame".format(key))
+
+        if enabled:
+            self._unindexed_columns.discard(key)
+        else:
+            self._unindexed_columns.add(key)
+            for index_key in [k for k in self._indexes if k[0] == key]:
+                del self._indexes[index_key]
+
+    def set_substring_indexing(self, key, enabled=True):
+        """
+        Turn the trigram index used by substring searches of the column `key` on or off.
+        Substring indexes are off by default, as building one costs several times more than scanning the column once,
+        so they only pay off for columns searched many times.
+
+        :param key: The column to turn substring indexing on or off for
+        :param enabled: (default=True) Flag to build a trigram index of `key` on its next substring search
+        :type key: string
+        :type enabled: boolean
+        """
+        if key not in self._dataframe.columns:
+            raise KeyError("key={} not in this DataFrame".format(key))
+
+        if enabled:
+            self._substring_indexed_columns.add(key)
+        else:
+            self._substring_indexed_columns.discard(key)
+            self._indexes.pop((key, TrigramIndex), None)
+
+    def get_index_memory_usage(self):
+        """
+        Get the estimated memory used by the built indexes of each column
+
+        :return: dict of column name to number of bytes
+        :rtype: dict
+        """
+        memory_usage = {}
+        for (key, _), index in self._indexes.items():
+            memory_usage[key] = memory_usage.get(key, 0) + index.memory_usage()
+        return memory_usage
+
+    def _get_index(self, key, index_type):
+        """
+        Get the index of type `index_type` of column `key`, building it if it has not been built or is stale.
+
+        :param key: The column of the index
+        :param index_type: The class of the index, HashIndex or TrigramIndex
+        :type key: string
+        :type index_type: class
+        :return: The index of `key`, None if indexing is turned off for `key`
+        :rtype: (Optional) HashIndex or TrigramIndex
+        """
+        if key in self._unindexed_columns:
+            return None
+        if index_type is TrigramIndex and key not in self._substring_indexed_columns:
+            return None
+        index = self._indexes.get((key, index_type))
+        if index is None or index.is_stale():
+            self._indexes[(key, index_type)] = index_type(
+                _as_strings(self._dataframe[key]), self._row_ids
+            )
+        return self._indexes[(key, index_type)]
+
+    def _unindex_rows(self, positions, keys=None):
+        """
+        Remove the rows at `positions` from all built indexes
+
+        :param positions: positions of the rows in `_dataframe`
+        :param keys: (default=None) Only update the indexes of these columns, if None then all columns
+        :type positions: list of ints
+        :type keys: None or list of strings
+        """
+        for (key, _), index in self._indexes.items():
+            if keys is not None and key not in keys:
+                continue
+            positions = np.asarray(positions, dtype=np.int64)
+            index.remove(
+                _as_strings(self._dataframe[key].iloc[positions]).to_numpy(),
+                self._row_ids[positions],
+            )
+
+    def _index_rows(self, positions, keys=None):
+        """
+        Add the rows at `positions` to all built indexes
+
+        :param positions: positions of the rows in `_dataframe`
+        :param keys: (default=None) Only update the indexes of these columns, if None then all columns
+        :type positions: list of ints
+        :type keys: None or list of strings
+        """
+        for (key, _), index in self._indexes.items():
+            if keys is not None and key not in keys:
+                continue
+            positions = np.asarray(positions, dtype=np.int64)
+            index.add(
+                _as_strings(self._dataframe[key].iloc[positions]).to_numpy(),
+                self._row_ids[positions],
+            )
+
     def get_filename(self):
         """
         Get filename of DataFile from `_IO_handler`
@@ -54,24 +495,421 @@ class DataFile:
         """
         return self._IO_handler.get_filename()
 
+    def has_unsaved_changes(self):
+        """
+        Check if rows have been added, changed or removed since the DataFile was loaded or last saved
+
+        :return: True if there are unsaved changes
+        :rtype: boolean
+        """
+        return (
+            self._total_pending_rows > 0
+            or self._next_row_id > self._saved_next_row_id
+            or len(self._changed_saved_row_ids) > 0
+            or self._has_removed_saved_rows
+            or self._checkpoint_error is not None
+        )
+
+    def _mark_rows_modified(self, positions):
+        """
+        Record that the rows at `positions` of `_dataframe` were changed, for the next save
+
+        :param positions: The positions of the rows
+        :type positions: list of ints
+        """
+        row_ids = self._row_ids[positions]
+        self._changed_saved_row_ids.update(
+            int(row_id) for row_id in row_ids[row_ids < self._saved_next_row_id]
+        )
+
+    def _mark_rows_removed(self, positions):
+        """
+        Record that the rows at `positions` of `_dataframe` were removed, for the next save
+
+        :param positions: The positions of the rows
+        :type positions: list of ints
+        """
+        if (self._row_ids[positions] < self._saved_next_row_id).any():
+            self._has_removed_saved_rows = True
+
+    def _save_changes(self, dataframe):
+        """
+        Save only the rows added or changed since the last save, if the IO_handler supports it
+        and no saved rows were removed.
+
+        :param dataframe: The materialized `_dataframe`
+        :type dataframe: Pandas DataFrame
+        :return: True if the changes were saved, False if the whole source must be rewritten
+        :rtype: boolean
+        """
+        if self._has_removed_saved_rows:
+            return False
+
+        changed_positions = np.flatnonzero(
+            np.isin(self._row_ids, list(self._changed_saved_row_ids))
+        )
+        changed_rows = dataframe.iloc[changed_positions]
+        changed_rows.index = changed_positions
+        added_rows = dataframe[self._row_ids >= self._saved_next_row_id]
+
+        try:
+            if len(changed_rows) > 0 and not self._IO_handler.patch(changed_rows):
+                return False
+            if len(added_rows) > 0:
+                self._IO_handler.append(added_rows)
+        except NotImplementedError:
+            return False
+        return True
+
     def save(self):
         """
-        Save `_dataframe` to its source
+        Save `_dataframe` to its source, only writing what changed since the last save where possible.
+        Added rows are appended and changed rows are overwritten in place if the IO_handler supports it,
+        otherwise (or if rows were removed) the whole source is rewritten.
+        """
+        if not self.has_unsaved_changes():
+            return
+
+        if self._journal is not None:
+            self.checkpoint()
+            return
+
+        dataframe = self.snapshot().view()
+        if not self._save_changes(dataframe):
+            self._IO_handler.save(dataframe)
+
+        self._saved_next_row_id = self._next_row_id
+        self._changed_saved_row_ids = set()
+        self._has_removed_saved_rows = False
+
+    def _replay_journal(self, journal):
+        """
+        Apply the changes in `journal` that are not yet in the source, then journal any further changes.
+
+        :param journal: The journal of the source of this DataFile
+        :type journal: DataFileJournal
+        """
+        for entry in journal.read_entries():
+            if entry["operation"] not in _JOURNAL_OPERATIONS:
+                raise ValueError(
+                    "Unknown journal operation {}".format(entry["operation"])
+                )
+            getattr(self, entry["operation"])(**entry["arguments"])
+        self._journal = journal
+
+    def _log_change(self, operation, **arguments):
+        """
+        Write a change to the journal, if there is one, and start a checkpoint if the journal is long.
+
+        :param operation: The name of the method that made the change
+        :param arguments: The keyword arguments that would make the change again
+        :type operation: string
         """
-        self._IO_handler.save(self.get())
+        if self._journal is None:
+            return
+
+        self._journal.append(operation, arguments)
+        if (
+            self._journal.get_unsaved_entries() >= _JOURNAL_CHECKPOINT_ENTRIES
+            and self._checkpoint_error is None
+            and not self.is_checkpointing()
+        ):
+            self.checkpoint()
+
+    def is_checkpointing(self):
+        """
+        Check if a checkpoint is being written in the background
+
+        :return: True if a checkpoint is being written
+        :rtype: boolean
+        """
+        return (
+            self._checkpoint_thread is not None and self._checkpoint_thread.is_alive()
+        )
+
+    def checkpoint(self):
+        """
+        Rewrite the source with every change so far in a background thread, then drop them from the journal.
+        Only one checkpoint is written at a time, so this waits for the previous one.
+        """
+        self.wait_for_checkpoint()
+
+        # The thread holds the snapshot itself, so changes made while it is written copy `_dataframe` first
+        snapshot = self.snapshot()
+        sequence = self._journal.begin_checkpoint()
+        self._saved_next_row_id = self._next_row_id
+        self._changed_saved_row_ids = set()
+        self._has_removed_saved_rows = False
+
+        self._checkpoint_thread = threading.Thread(
+            target=self._write_checkpoint, args=(snapshot, sequence)
+        )
+        self._checkpoint_thread.start()
+
+    def _write_checkpoint(self, snapshot, sequence):
+        """
+        Write `snapshot` to the source and drop the journal entries up to `sequence`.
+        Runs in the checkpoint thread, any error is raised by `wait_for_checkpoint`.
+
+        :param snapshot: The snapshot of `_dataframe` to write
+        :param sequence: The sequence number of the last journal entry in `snapshot`
+        :type snapshot: DataFileSnapshot
+        :type sequence: int
+        """
+        try:
+            self._IO_handler.save(snapshot.view())
+            self._journal.finish_checkpoint(sequence)
+        except Exception as error:
+            self._checkpoint_error = error
+
+    def wait_for_checkpoint(self):
+        """
+        Wait for the checkpoint being written in the background, if any,
+        raising any error from writing it. The changes stay in the journal if it failed.
+        """
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+            self._checkpoint_thread = None
+
+        if self._checkpoint_error is not None:
+            error = self._checkpoint_error
+            self._checkpoint_error = None
+            raise error
+
+    def discard_journal(self):
+        """
+        Drop the changes in the journal that are not yet in the source, so they are not replayed when it is next loaded.
+        """
+        if self._journal is None:
+            return
+        self.wait_for_checkpoint()
+        self._journal.discard()
+
+    def close_journal(self):
+        """
+        Wait for the last checkpoint, then remove the journal and checkpoint files if every change is in the source.
+        Called once the DataFile is saved for the last time, no further changes are journaled.
+        """
+        if self._journal is None:
+            return
+        self.wait_for_checkpoint()
+        if self._journal.get_unsaved_entries() == 0:
+            self._journal.discard()
+            self._journal = None
 
     def add_row(self, row):
         """
         Adds row `row` to `_dataframe`.
+        The row is buffered and merged into `_dataframe` the next time it is read or saved.
 
         :param row: Either a list of values or a dict representing the key/values for the new row
         :type row: dict or list
         """
-        self._dataframe.loc[len(self._dataframe)] = row
+        self.add_rows([row])
+
+    def add_rows(self, rows):
+        """
+        Adds each row of `rows` to `_dataframe`.
+        The rows are buffered and merged into `_dataframe` the next time it is read or saved.
+
+        :param rows: Either a list of rows (each a list of values or a dict of key/values) or a DataFrame
+        :type rows: list of (dict or list), or Pandas DataFrame
+        """
+        columns = list(self._pending_columns)
+
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.reindex(columns=columns)
+            for column in columns:
+                self._pending_columns[column].extend(rows[column].tolist())
+            self._total_pending_rows += len(rows)
+        else:
+            row_values = []
+            for row in rows:
+                if isinstance(row, dict):
+                    row = [row.get(column, np.nan) for column in columns]
+                elif len(row) != len(columns):
+                    raise ValueError("cannot set a row with mismatched columns")
+                row_values.append(row)
+
+            for column_values, column in zip(zip(*row_values), columns):
+                self._pending_columns[column].extend(column_values)
+            self._total_pending_rows += len(row_values)
+
+        self._mark_changed()
+        if self._journal is not None:
+            if isinstance(rows, pd.DataFrame):
+                row_values = rows.values.tolist()
+            self._log_change("add_rows", rows=row_values)
+
+    def _flush_appends(self):
+        """
+        Merge the rows buffered by `add_rows` into `_dataframe` in a single concatenation.
+        Must be called before every read of or change to `_dataframe`.
+        """
+        if self._total_pending_rows == 0:
+            return
+
+        start = len(self._dataframe)
+        pending_dataframe = pd.DataFrame(
+            self._pending_columns,
+            columns=self._dataframe.columns,
+            index=pd.RangeIndex(start, start + self._total_pending_rows),
+        )
+        for column in self._typed_columns():
+            pending_dataframe[column] = self._coerce_to_column(
+                column, pending_dataframe[column]
+            )
+        self._dataframe = pd.concat([self._dataframe, pending_dataframe])
+        self._snapshot_ref = None
+
+        self._row_ids = np.concatenate(
+            [
+                self._row_ids,
+                np.arange(
+                    self._next_row_id,
+                    self._next_row_id + self._total_pending_rows,
+                    dtype=np.int64,
+                ),
+            ]
+        )
+        self._next_row_id += self._total_pending_rows
+        self._index_rows(range(start, len(self._dataframe)))
+
+        self._pending_columns = {column: [] for column in self._dataframe.columns}
+        self._total_pending_rows = 0
+
+    def _typed_columns(self):
+        """
+        Get the columns of `_dataframe` that do not hold strings
+
+        :return: list of column names
+        :rtype: list of strings
+        """
+        return [
+            column
+            for column, dtype in self._dataframe.dtypes.items()
+            if dtype != object
+        ]
+
+    def _coerce_to_column(self, key, values):
+        """
+        Convert `values` to the dtype of column `key`, so they can be written to it.
+        Numeric columns are widened to hold numeric values out of their range, such as a downcast int8 column given 1000.
+        If converting would change any value when compared as a string,
+        column `key` is converted to strings instead, so searching is unaffected.
+
+        :param key: The column the values are written to
+        :param values: The values to convert
+        :type key: string
+        :type values: Pandas Series
+        :return: The converted values
+        :rtype: Pandas Series
+        """
+        column = self._dataframe[key]
+        values = values.astype(object)
+
+        if column.dtype == object:
+            return values
+
+        try:
+            dtype = column.dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                new_categories = pd.Index(values.dropna().unique()).difference(
+                    dtype.categories
+                )
+                dtype = pd.CategoricalDtype(dtype.categories.append(new_categories))
+            elif isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+                numeric_values = pd.to_numeric(values.dropna(), downcast="integer")
+                dtype = np.promote_types(dtype, numeric_values.dtype)
+            converted = values.astype(dtype)
+            if (_as_strings(converted) == values.astype(str)).all():
+                if dtype != column.dtype:
+                    widened_column = column.astype(dtype)
+                    if not (_as_strings(widened_column) == _as_strings(column)).all():
+                        raise ValueError("Widening changes the values of the column")
+                    self._prepare_write()
+                    self._dataframe[key] = widened_column
+                return converted
+        except (ValueError, TypeError):
+            pass
+
+        self._prepare_write()
+        self._dataframe[key] = _as_strings(column)
+        return values
+
+    def _compact_deleted_rows(self):
+        """
+        Drop the rows marked as deleted by `remove_row` from `_dataframe` and reset its index.
+        """
+        if len(self._deleted_positions) == 0:
+            return
+
+        rows_to_keep = np.ones(len(self._dataframe), dtype=bool)
+        rows_to_keep[self._deleted_positions] = False
+        self._dataframe = self._dataframe[rows_to_keep].reset_index(drop=True)
+        self._snapshot_ref = None
+        self._row_ids = self._row_ids[rows_to_keep]
+        self._deleted_positions = []
+
+    def _materialize(self):
+        """
+        Apply buffered appends and deletions to `_dataframe`.
+        Must be called before every read of or change to `_dataframe`.
+        """
+        self._flush_appends()
+        self._compact_deleted_rows()
+
+    def _to_physical_position(self, position):
+        """
+        Get the position in `_dataframe` of the row at `position` when ignoring deleted rows
+
+        :param position: The position of the row ignoring deleted rows
+        :type position: int
+        :return: The position of the row in `_dataframe`
+        :rtype: int
+        """
+        for deleted_position in self._deleted_positions:
+            if deleted_position > position:
+                break
+            position += 1
+        return position
+
+    def _mark_rows_deleted(self, positions):
+        """
+        Mark the rows at `positions` as deleted without changing `_dataframe`,
+        compacting `_dataframe` once enough rows are marked.
+
+        :param positions: The positions of the rows, ignoring rows already deleted
+        :type positions: numpy array
+        """
+        if len(positions) == 0:
+            return
+
+        total_live_rows = len(self._dataframe) - len(self._deleted_positions)
+        if (
+            not np.issubdtype(positions.dtype, np.integer)
+            or (positions < 0).any()
+            or (positions >= total_live_rows).any()
+        ):
+            raise KeyError("{} not found in index".format(list(positions)))
+
+        physical_positions = [
+            self._to_physical_position(position) for position in np.unique(positions)
+        ]
+        self._unindex_rows(physical_positions)
+        self._mark_rows_removed(physical_positions)
+        for physical_position in physical_positions:
+            bisect.insort(self._deleted_positions, physical_position)
+        self._mark_changed()
+
+        if len(self._deleted_positions) >= _DELETED_ROWS_COMPACTION_THRESHOLD:
+            self._compact_deleted_rows()
 
     def remove_row(self, index, reset_index=True):
         """
         Remove a row (or a multiple rows) at a given index (or indices) from `_dataframe`.
+        If `reset_index`, the rows are only marked as deleted, and are dropped from `_dataframe`
+        the next time it is read or saved.
 
         :param index: either a single index, or a list of indices
         :param reset_index: (default = True), will reset the index after the rows are removed
@@ -79,67 +917,336 @@ class DataFile:
         :type reset_index: boolean
         """
 
+        self._flush_appends()
+        if reset_index and self._has_positional_index:
+            self._mark_rows_deleted(np.atleast_1d(index))
+            self._log_change("remove_row", index=index, reset_index=reset_index)
+            return
+
+        self._compact_deleted_rows()
+        positions = self._dataframe.index.get_indexer(np.atleast_1d(index))
+        if (positions < 0).any():
+            raise KeyError("{} not found in index".format(index))
+
+        self._prepare_write()
+        self._unindex_rows(positions)
+        self._mark_rows_removed(positions)
         self._dataframe.drop(index, inplace=True)
+        self._row_ids = np.delete(self._row_ids, positions)
         if reset_index:
             self._dataframe.reset_index(drop=True, inplace=True)
+        self._has_positional_index = reset_index
+        self._mark_changed()
+        self._log_change("remove_row", index=index, reset_index=reset_index)
 
-    def search(self, term, key, exact=True, search_df=None):
+    def search(self, term, key, exact=True, search_df=None, match_mode=MATCH_REGEX):
         """
         Searches each row of `_dataframe` for `term` in the column `key`.
-        Exact search if `exact`, otherwise substring search.
+        Exact search if `exact`, otherwise substring search matched by `match_mode`.
 
         :param term: The string to search for in the `_dataframe`
         :param key: The column in `_dataframe` in which to search for `term`
         :param exact: (default True) If True, only return rows where values in `key` are exactly `term`, if False, return rows where `term` is a substring of values in `key`
         :param search_df: (defalt None) The dataframe to search within, if None, defaults to self._dataframe
+        :param match_mode: (default MATCH_REGEX) How `term` is matched in a substring search, one of `MATCH_MODES`
         :type term: string
         :type key: string
         :type exact: boolean
         :type search_df: None or Pandas DataFrame
+        :type match_mode: string
         :return: DataFrame with rows from `_dataframe` with only rows where `key` value is exactly `term`
         :rtype: Pandas DataFrame
         """
         try:
+            self._materialize()
 
-            if search_df is None:
-                search_df = self._dataframe
+            if search_df is None or search_df is self._dataframe:
+                positions = self._search_positions(term, key, exact, match_mode)
+                return self._dataframe.iloc[positions]
 
             if exact:
-                return search_df[search_df[key] == term].copy()
+                return search_df[_as_strings(search_df[key]) == term]
             else:
-                return search_df[search_df[key].str.contains(term)].copy()
+                self._check_match_mode(match_mode)
+                return search_df[_match_mask(search_df[key], term, match_mode)]
 
         except KeyError:
             raise KeyError("key={} not in this DataFrame".format(key))
         except Exception as e:
             raise e
 
-    def search_multi(self, search_args, current_result=None):
+    def search_multi(self, search_args, current_result=None, match_mode=MATCH_REGEX):
         """
-        Executes multiple search queries on the dataframe using recursion.
+        Executes multiple search queries on the dataframe.
+        The queries are ordered so that index-backed and more selective queries are applied first,
+        and only the final result is copied out of `_dataframe`.
+        Results are cached until `_dataframe` changes, so repeating a query, or adding queries
+        to the end of it, only applies the queries that were not already applied.
 
         :param search_args: List of search arguments (each elememnt is [term, key, exact])
         :param current_result: (default=None) The current search result to continue searching, if None then defaults to `_dataframe`
+        :param match_mode: (default MATCH_REGEX) How terms are matched in substring searches, one of `MATCH_MODES`
         :type search_args: List (each element is [string, string, boolean])
         :type current_result: None or Pandas DataFrame
+        :type match_mode: string
         :return: Final result of the multiple searches
         :rtype: Pandas DataFrame
         """
 
-        if current_result is None:
-            current_result = self._dataframe.copy()
+        self._materialize()
 
-        if len(search_args) == 0:
+        if current_result is not None:
+            for term, key, exact in search_args:
+                if len(current_result) == 0:
+                    break
+                current_result = self.search(
+                    term, key, exact, search_df=current_result, match_mode=match_mode
+                )
             return current_result
 
-        if len(current_result) == 0:
-            return current_result
+        positions = self._query_positions(search_args, match_mode)
+
+        if positions is None:
+            return self._dataframe.copy()
+
+        return self._dataframe.iloc[positions]
+
+    def get_query_positions(self, search_args, match_mode=MATCH_REGEX):
+        """
+        Get the positions of the rows matching all of `search_args`, without copying the rows.
+        Use with `snapshot().take` to read only some of the matching rows.
+
+        :param search_args: List of search arguments (each elememnt is [term, key, exact])
+        :param match_mode: (default MATCH_REGEX) How terms are matched in substring searches, one of `MATCH_MODES`
+        :type search_args: List (each element is [string, string, boolean])
+        :type match_mode: string
+        :return: sorted positions of the matching rows
+        :rtype: numpy array of ints
+        """
+        self._materialize()
+
+        positions = self._query_positions(search_args, match_mode)
+        if positions is None:
+            return np.arange(len(self._dataframe))
+        return positions
+
+    def _query_positions(self, search_args, match_mode):
+        """
+        Get the positions of the rows in `_dataframe` that match all of `search_args`,
+        using and updating the cached search results.
+
+        :param search_args: List of search arguments (each elememnt is [term, key, exact])
+        :param match_mode: How terms are matched in substring searches, one of `MATCH_MODES`
+        :type search_args: List (each element is [string, string, boolean])
+        :type match_mode: string
+        :return: sorted positions of the matching rows, None if there are no search arguments
+        :rtype: None or numpy array of ints
+        """
+        for term, key, exact in search_args:
+            if key not in self._dataframe.columns:
+                raise KeyError("key={} not in this DataFrame".format(key))
+
+        queries = [tuple(search_arg) for search_arg in search_args]
+        cached_length, positions = self._get_cached_query(queries, match_mode)
+
+        remaining_args = queries[cached_length:]
+        for term, key, exact in self._plan_query(remaining_args, match_mode):
+            if positions is not None and len(positions) == 0:
+                break
+            positions = self._search_positions(term, key, exact, match_mode, positions)
+
+        self._cache_query(queries, match_mode, positions)
+        return positions
 
-        term, key, exact = search_args[0]
+    def _get_cached_query(self, queries, match_mode):
+        """
+        Get the cached result of the longest start of `queries` that has been cached
+        for the current version of `_dataframe`.
+
+        :param queries: List of search queries (each elememnt is (term, key, exact))
+        :param match_mode: How terms are matched in substring searches, one of `MATCH_MODES`
+        :type queries: List (each element is (string, string, boolean))
+        :type match_mode: string
+        :return: tuple (number of queries already applied, positions of the rows matching them)
+        :rtype: (int, None or numpy array of ints)
+        """
+        if self._query_cache is None:
+            return 0, None
 
-        next_result = self.search(term, key, exact, search_df=current_result)
+        version, cached_match_mode, cached_queries, results = self._query_cache
+        if version != self._version or cached_match_mode != match_mode:
+            return 0, None
 
-        return self.search_multi(search_args[1:], next_result)
+        common_length = self._common_query_length(queries, cached_queries)
+        cached_lengths = [length for length in results if length <= common_length]
+        if len(cached_lengths) == 0:
+            return 0, None
+
+        cached_length = max(cached_lengths)
+        return cached_length, results[cached_length]
+
+    def _cache_query(self, queries, match_mode, positions):
+        """
+        Cache `positions` as the result of `queries`, keeping cached results of the start of `queries`.
+
+        :param queries: List of search queries (each elememnt is (term, key, exact))
+        :param match_mode: How terms are matched in substring searches, one of `MATCH_MODES`
+        :param positions: The positions of the rows matching `queries`, None if there are no queries
+        :type queries: List (each element is (string, string, boolean))
+        :type match_mode: string
+        :type positions: None or numpy array of ints
+        """
+        results = {}
+        if self._query_cache is not None:
+            version, cached_match_mode, cached_queries, cached_results = (
+                self._query_cache
+            )
+            if version == self._version and cached_match_mode == match_mode:
+                common_length = self._common_query_length(queries, cached_queries)
+                results = {
+                    length: cached_positions
+                    for length, cached_positions in cached_results.items()
+                    if length <= common_length
+                }
+
+        results[len(queries)] = positions
+        self._query_cache = (self._version, match_mode, queries, results)
+
+    @staticmethod
+    def _common_query_length(queries, other_queries):
+        """
+        Get the number of queries at the start of `queries` and `other_queries` that are the same
+
+        :param queries: List of search queries
+        :param other_queries: List of search queries
+        :type queries: List (each element is (string, string, boolean))
+        :type other_queries: List (each element is (string, string, boolean))
+        :return: length of the common start
+        :rtype: int
+        """
+        common_length = 0
+        for query, other_query in zip(queries, other_queries):
+            if query != other_query:
+                break
+            common_length += 1
+        return common_length
+
+    def _plan_query(self, search_args, match_mode):
+        """
+        Order search arguments by their estimated cost, cheapest first.
+        Exact queries backed by an index come first, ordered by their number of matches,
+        then substring queries backed by an index, then exact scans, then substring scans.
+        Only indexes that are already built are used for the estimate, planning never builds one.
+
+        :param search_args: List of search arguments (each elememnt is [term, key, exact])
+        :param match_mode: How terms are matched in substring searches, one of `MATCH_MODES`
+        :type search_args: List (each element is [string, string, boolean])
+        :type match_mode: string
+        :return: The search arguments in the order to apply them
+        :rtype: List (each element is [string, string, boolean])
+        """
+
+        def built_index(key, index_type):
+            index = self._indexes.get((key, index_type))
+            if index is None or index.is_stale():
+                return None
+            return index
+
+        def estimated_cost(search_arg):
+            term, key, exact = search_arg
+            if exact:
+                hash_index = built_index(key, HashIndex)
+                if hash_index is not None:
+                    return (0, hash_index.count(term))
+                return (2, 0)
+            if self._is_trigram_searchable(term, match_mode):
+                if built_index(key, TrigramIndex) is not None:
+                    return (1, 0)
+            return (3, 0)
+
+        return sorted(search_args, key=estimated_cost)
+
+    def _check_match_mode(self, match_mode):
+        """
+        Raise a ValueError if `match_mode` is not one of `MATCH_MODES`
+
+        :param match_mode: The match mode to check
+        :type match_mode: string
+        """
+        if match_mode not in MATCH_MODES:
+            raise ValueError(
+                "match_mode={} is not one of {}".format(match_mode, MATCH_MODES)
+            )
+
+    def _is_trigram_searchable(self, term, match_mode):
+        """
+        Check if a substring search for `term` can be narrowed by a TrigramIndex
+
+        :param term: The string to search for
+        :param match_mode: How `term` is matched, one of `MATCH_MODES`
+        :type term: string
+        :type match_mode: string
+        :return: True if rows matching `term` must contain every trigram of `term`
+        :rtype: boolean
+        """
+        return match_mode in [MATCH_LITERAL, MATCH_PREFIX] or (
+            match_mode == MATCH_REGEX
+            and not _REGEX_SPECIAL_CHARACTERS.intersection(term)
+        )
+
+    def _search_positions(self, term, key, exact, match_mode, positions=None):
+        """
+        Get the positions of the rows in `_dataframe` that match a single search query.
+        Uses the indexes of `key` where possible.
+
+        :param term: The string to search for
+        :param key: The column in which to search for `term`
+        :param exact: If True, exact search, otherwise substring search
+        :param match_mode: How `term` is matched in a substring search, one of `MATCH_MODES`
+        :param positions: (default=None) Sorted positions of the rows to search within, if None then all rows
+        :type term: string
+        :type key: string
+        :type exact: boolean
+        :type match_mode: string
+        :type positions: None or numpy array of ints
+        :return: sorted positions of the matching rows
+        :rtype: numpy array of ints
+        """
+        column = self._dataframe[key]
+
+        candidates = positions
+        if exact:
+            hash_index = self._get_index(key, HashIndex)
+            if hash_index is not None:
+                matched = np.searchsorted(self._row_ids, hash_index.lookup(term))
+                if positions is None:
+                    return matched
+                return np.intersect1d(matched, positions, assume_unique=True)
+        else:
+            self._check_match_mode(match_mode)
+            if self._is_trigram_searchable(term, match_mode):
+                trigram_index = self._get_index(key, TrigramIndex)
+                candidate_ids = None
+                if trigram_index is not None:
+                    candidate_ids = trigram_index.lookup(term)
+                if candidate_ids is not None:
+                    candidates = np.searchsorted(self._row_ids, candidate_ids)
+                    if positions is not None:
+                        candidates = np.intersect1d(
+                            candidates, positions, assume_unique=True
+                        )
+
+        if candidates is not None:
+            column = column.iloc[candidates]
+
+        if exact:
+            mask = _as_strings(column).to_numpy() == term
+        else:
+            mask = _match_mask(column, term, match_mode)
+
+        if candidates is None:
+            return np.flatnonzero(mask)
+        return candidates[mask]
 
     def change_row(self, row, index):
         """
@@ -150,8 +1257,34 @@ class DataFile:
         :type row: list or dict
         :type index: int
         """
+        self._materialize()
         if index in range(len(self._dataframe)):
+            columns = list(self._dataframe.columns)
+            if isinstance(row, dict):
+                row = [row.get(column, np.nan) for column in columns]
+            row = list(row)
+            if len(row) != len(columns):
+                raise ValueError("cannot set a row with mismatched columns")
+            for column in self._typed_columns():
+                column_position = columns.index(column)
+                row[column_position] = self._coerce_to_column(
+                    column, pd.Series([row[column_position]])
+                ).iloc[0]
+
+            self._prepare_write()
+            position = self._dataframe.index.get_indexer([index])[0]
+            if position >= 0:
+                self._unindex_rows([position])
+                self._mark_rows_modified([position])
+
             self._dataframe.loc[index] = row
+            if position < 0:
+                position = len(self._dataframe) - 1
+                self._row_ids = np.append(self._row_ids, self._next_row_id)
+                self._next_row_id += 1
+            self._index_rows([position])
+            self._mark_changed()
+            self._log_change("change_row", row=row, index=index)
         else:
             raise IndexError(
                 "Index {} out of bounds for DataFrame of length {}".format(
@@ -159,6 +1292,82 @@ class DataFile:
                 )
             )
 
+    def set_cells(self, index, key, value):
+        """
+        Sets the value of the cells in column `key` at position `index` (or positions) to `value`.
+
+        :param index: either a single index, or a list of indices
+        :param key: The column of the cells to change
+        :param value: Either a single value for all the cells, or a list with a value for each index
+        :type index: int or list of ints
+        :type key: string
+        :type value: string or list of strings
+        """
+        self._materialize()
+
+        if key not in self._dataframe.columns:
+            raise KeyError("key={} not in this DataFrame".format(key))
+
+        positions = np.atleast_1d(index)
+        if (
+            not np.issubdtype(positions.dtype, np.integer)
+            or (positions < 0).any()
+            or (positions >= len(self._dataframe)).any()
+        ):
+            raise IndexError(
+                "Index {} out of bounds for DataFrame of length {}".format(
+                    index, len(self._dataframe)
+                )
+            )
+
+        if pd.api.types.is_list_like(value):
+            values = pd.Series(list(value))
+            if len(values) != len(positions):
+                raise ValueError(
+                    "Got {} values for {} cells".format(len(values), len(positions))
+                )
+        else:
+            values = pd.Series([value] * len(positions))
+        values = self._coerce_to_column(key, values)
+
+        self._prepare_write()
+        self._unindex_rows(positions, keys=[key])
+        self._mark_rows_modified(positions)
+        self._dataframe.iloc[positions, self._dataframe.columns.get_loc(key)] = (
+            values.to_numpy()
+        )
+        self._index_rows(positions, keys=[key])
+        self._mark_changed()
+        self._log_change("set_cells", index=index, key=key, value=value)
+
+    def update_where(self, search_args, key, value, match_mode=MATCH_REGEX):
+        """
+        Sets the value in column `key` of every row matching `search_args` to `value`, in a single write.
+
+        :param search_args: List of search arguments (each elememnt is [term, key, exact])
+        :param key: The column of the cells to change
+        :param value: The new value of the cells
+        :param match_mode: (default MATCH_REGEX) How terms are matched in substring searches, one of `MATCH_MODES`
+        :type search_args: List (each element is [string, string, boolean])
+        :type key: string
+        :type value: string
+        :type match_mode: string
+        :return: The number of rows changed
+        :rtype: int
+        """
+        self._materialize()
+
+        positions = self._query_positions(search_args, match_mode)
+        if positions is None:
+            positions = np.arange(len(self._dataframe))
+
+        if len(positions) > 0:
+            self.set_cells(positions, key, value)
+        elif key not in self._dataframe.columns:
+            raise KeyError("key={} not in this DataFrame".format(key))
+
+        return len(positions)
+
     def __len__(self):
         """
         Implementation of length, based on length of `_dataframe`
@@ -166,4 +1375,8 @@ class DataFile:
         :return: length of `_dataframe`
         :rtype: int
         """
-        return len(self._dataframe)
+        return (
+            len(self._dataframe)
+            - len(self._deleted_positions)
+            + self._total_pending_rows
+        )
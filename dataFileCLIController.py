@@ -1,13 +1,24 @@
 """
 This is a class for a CLI controller for a DataFile program. This is the C in MVC.
 This is responsible for creating a user interface to allow management of data
-using the DataFile API. 
+using the DataFile API.
 """
-from dataFile import DataFile
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataFile import DataFile, MATCH_REGEX, get_supported_extensions
+from dataFileChunked import ChunkedDataFile
 import os.path
 import data_display_collector as display_collector
+from data_display_rows import RowStream
+from displays import ASCII_display
 import pandas as pd
 
+_SAVE_WORKERS = 4
+_LOAD_WORKERS = 4
+_SEARCH_WORKERS = 4
+_ROW_CHUNK_ROWS = 10000
+SOURCE_COLUMN = "Source File"
+
 
 class FileAlreadyExists(Exception):
     """
@@ -38,10 +49,61 @@ def _remove_start_of_path(path, start):
         return os.path.join(*path_split[len(start_split) :])
 
 
+def _canonical_path(filename):
+    """
+    Get the canonical path of `filename`, which is the same for every path to the same file
+
+    :param filename: The filename
+    :type filename: string
+    :return: canonical path of `filename`
+    :rtype: string
+    """
+    return os.path.normcase(os.path.realpath(filename))
+
+
+def _open_datafile(
+    filename,
+    infer_types=False,
+    chunked=False,
+    mapped=False,
+    use_cache=False,
+    journal=False,
+):
+    """
+    Create a DataFile with data sourced from file `filename`. See `DataFileCLIController.addFile` for the options.
+
+    :return: DataFile of `filename`
+    :rtype: DataFile or ChunkedDataFile
+    """
+    if chunked or mapped:
+        return ChunkedDataFile.from_csv(filename, mapped=mapped, use_cache=use_cache)
+    if os.path.splitext(filename)[1].lower() == ".csv":
+        return DataFile.from_csv(
+            filename, infer_types=infer_types, use_cache=use_cache, journal=journal
+        )
+    return DataFile.from_file(filename, journal=journal)
+
+
+def _save_datafile(datafile):
+    """
+    Save `datafile`, returning once it is written and its journal is removed. Run by the save workers.
+
+    :param datafile: The DataFile to save
+    :type datafile: DataFile or ChunkedDataFile
+    """
+    datafile.save()
+    datafile.close_journal()
+
+
 class DataFileCLIController:
     def __init__(self):
         self._datafiles = []
+        self._datafile_paths = set()
+        self._datafile_names = []
+        self._truncated_datafile_names = []
         self._current_datafile_index = None
+        self._save_executor = ThreadPoolExecutor(max_workers=_SAVE_WORKERS)
+        self._saves = []
 
     def get_total_datafiles(self):
         """
@@ -56,30 +118,60 @@ class DataFileCLIController:
         """
         Get the list of DataFile filenames from `_datafiles`.
         If truncate, only return the path after the common path.
+        The names are kept up to date as DataFiles are added and closed, so this does not recompute them.
 
         :param truncate: (default=False) flag to truncate path of filenames
         :type truncate: boolean
         :return: list of filenames
         :rtype: list of strings
         """
+        if truncate:
+            return self._truncated_datafile_names
+        return self._datafile_names
 
-        if len(self._datafiles) == 0:
-            return []
-
-        datafile_names = [
+    def _update_datafile_names(self):
+        """
+        Recompute the cached filenames of `_datafiles`, after DataFiles are added or closed
+        """
+        self._datafile_names = [
             os.path.abspath(datafile.get_filename()) for datafile in self._datafiles
         ]
-        if truncate:
-            if len(self._datafiles) == 1:
-                return [os.path.basename(self._datafiles[0].get_filename())]
-            else:
-                common_path = os.path.commonpath(datafile_names)
-                return [
-                    _remove_start_of_path(datafile_name, common_path)
-                    for datafile_name in datafile_names
-                ]
+
+        if len(self._datafiles) == 0:
+            self._truncated_datafile_names = []
+        elif len(self._datafiles) == 1:
+            self._truncated_datafile_names = [
+                os.path.basename(self._datafiles[0].get_filename())
+            ]
         else:
-            return datafile_names
+            common_path = os.path.commonpath(self._datafile_names)
+            self._truncated_datafile_names = [
+                _remove_start_of_path(datafile_name, common_path)
+                for datafile_name in self._datafile_names
+            ]
+
+    def _add_datafiles(self, datafiles):
+        """
+        Add `datafiles` to the end of `_datafiles`, registering their filenames
+
+        :param datafiles: The DataFiles to add
+        :type datafiles: list of DataFiles
+        """
+        for datafile in datafiles:
+            self._datafiles.append(datafile)
+            self._datafile_paths.add(_canonical_path(datafile.get_filename()))
+        self._update_datafile_names()
+
+    def is_file_loaded(self, filename):
+        """
+        Check if a DataFile sourced from `filename` is loaded, by any path to the file
+
+        :param filename: The filename to check
+        :type filename: string
+        :return: True if `filename` is loaded
+        :rtype: boolean
+        """
+        return _canonical_path(filename) in self._datafile_paths
 
     def select_datafile(self, index):
         """
@@ -99,6 +191,15 @@ class DataFileCLIController:
         """
         self._datafiles[self._current_datafile_index].add_row(row)
 
+    def add_rows_to_current_datafile(self, rows):
+        """
+        Adds each row of `rows` to the currently selected DataFile.
+
+        :param rows: Either a list of rows (each a list of values or a dict of key/values) or a DataFrame
+        :type rows: list of (dict or list), or Pandas DataFrame
+        """
+        self._datafiles[self._current_datafile_index].add_rows(rows)
+
     def remove_row_from_current_datafile(self, index):
         """
         Removes row at `index` from the currently selected DataFile.
@@ -120,16 +221,31 @@ class DataFileCLIController:
         :type value: string
         """
 
-        old_row = self.get_current_datafile_dataframe().loc[[row_index]].to_dict("list")
+        self._datafiles[self._current_datafile_index].set_cells(
+            row_index, selected_column, value
+        )
 
-        new_row = {}
-        for column in self.get_current_datafile_columns():
-            if column == selected_column:
-                new_row[column] = value
-            else:
-                new_row[column] = old_row[column][0]
+    def change_column_of_queried_current_datafile(
+        self, queries, selected_column, value, match_mode=MATCH_REGEX
+    ):
+        """
+        Assigns the value in column `selected_column` to `value` for every row of the current
+        DataFile matching `queries`
 
-        self._datafiles[self._current_datafile_index].change_row(new_row, row_index)
+        :param queries: List of search arguments (each elememnt is [term, key, exact])
+        :param selected_column: The key of the column for the change
+        :param value: The new value of the positions in the datafile
+        :param match_mode: (default=MATCH_REGEX) How terms are matched in substring searches, one of `dataFile.MATCH_MODES`
+        :type queries: List (each element is [string, string, boolean])
+        :type selected_column: string
+        :type value: string
+        :type match_mode: string
+        :return: The number of rows changed
+        :rtype: int
+        """
+        return self._datafiles[self._current_datafile_index].update_where(
+            queries, selected_column, value, match_mode=match_mode
+        )
 
     def get_current_datafile_columns(self):
         """
@@ -138,7 +254,7 @@ class DataFileCLIController:
         :return: List of column names
         :rtype: list of strings
         """
-        return list(self._datafiles[self._current_datafile_index].get().columns)
+        return self.get_current_datafile_snapshot().get_columns()
 
     def get_current_datafile_name(self, truncate=False):
         """
@@ -152,13 +268,23 @@ class DataFileCLIController:
 
     def get_current_datafile_dataframe(self):
         """
-        Get the current DataFile's DataFrame.
+        Get a deep copy of the current DataFile's DataFrame.
+        Use `get_current_datafile_snapshot()` if the DataFrame is only read.
 
         :return: the current DataFile's DataFrame
         :rtype: Pandas DataFrame
         """
         return self._datafiles[self._current_datafile_index].get()
 
+    def get_current_datafile_snapshot(self):
+        """
+        Get a read-only snapshot of the current DataFile's DataFrame, without copying it.
+
+        :return: snapshot of the current DataFile
+        :rtype: DataFileSnapshot
+        """
+        return self._datafiles[self._current_datafile_index].snapshot()
+
     def get_current_datafile_dataframe_row_total(self):
         """
         Get the total number of rows in the current DataFile
@@ -180,13 +306,17 @@ class DataFileCLIController:
     def print_current_datafile(self, head=None):
         """
         Prints the summarized ASCII table representation of the current DataFile's DataFrame.
-        Optionally prints first `head` rows (defaults to all rows)
+        Optionally prints first `head` rows (defaults to the rows that fit in the terminal)
         """
 
-        dataframe_to_print = self.get_current_datafile_dataframe()
+        snapshot = self.get_current_datafile_snapshot()
 
+        total_rows = None
         if head != None:
-            dataframe_to_print = dataframe_to_print.head(head)
+            dataframe_to_print = snapshot.head(head)
+            total_rows = len(snapshot)
+        else:
+            dataframe_to_print = snapshot.view()
 
         if len(dataframe_to_print) == 0:
             empty_df = {}
@@ -197,28 +327,174 @@ class DataFileCLIController:
 
         dataframe_to_print.index += 1
 
-        print(dataframe_to_print)
+        print(ASCII_display.format_page(dataframe_to_print, total_rows=total_rows))
 
-    def addFile(self, filename):
+    def addFile(
+        self,
+        filename,
+        infer_types=False,
+        chunked=False,
+        mapped=False,
+        use_cache=False,
+        journal=False,
+    ):
         """
-        Adds a DataFile with data sourced from csv file `filename` to the list `_datafiles`.
-        Currently only supports csv files.
+        Adds a DataFile with data sourced from file `filename` to the list `_datafiles`.
+        Supports the file types registered with `dataFile.register_io_handler`,
+        the csv options only apply to csv files.
 
         :param filename: The name of the file to add
+        :param infer_types: (default=False) Flag to load numbers, dates and categoricals as typed columns
+        :param chunked: (default=False) Flag to read the file in chunks, for files larger than memory
+        :param mapped: (default=False) Flag to memory-map the file and only parse rows when they are read, for read-mostly files
+        :param use_cache: (default=False) Flag to keep a Feather cache of the parsed csv file, so reopening it is faster.
+            The cache is written next to the csv file as the hidden file `.<name>.csv.feather`, which makes the first open slower.
+            For a mapped file the byte offsets of its rows are cached instead, in `.<name>.csv.offsets.npz`
+        :param journal: (default=False) Flag to keep a write-ahead journal of changes, which is replayed if the program stops before saving
         :type filename: string
+        :type infer_types: boolean
+        :type chunked: boolean
+        :type mapped: boolean
+        :type use_cache: boolean
+        :type journal: boolean
         """
-        all_filenames = [datafile.get_filename() for datafile in self._datafiles]
-
-        if filename in all_filenames:
+        if self.is_file_loaded(filename):
             raise FileAlreadyExists()
 
-        newDataFile = DataFile.from_csv(filename)
+        self._wait_for_saves_of([filename])
+
+        newDataFile = _open_datafile(
+            filename,
+            infer_types=infer_types,
+            chunked=chunked,
+            mapped=mapped,
+            use_cache=use_cache,
+            journal=journal,
+        )
+
+        self._add_datafiles([newDataFile])
+
+    def add_files(
+        self,
+        filenames,
+        workers=_LOAD_WORKERS,
+        max_memory=None,
+        progress=None,
+        **options
+    ):
+        """
+        Adds a DataFile for each file in `filenames`, loading several files at a time.
+        DataFiles are added in the order of `filenames`, files that could not be loaded are left out.
+
+        :param filenames: The names of the files to add
+        :param workers: (default=4) The most files to load at a time
+        :param max_memory: (default=None) The most bytes of files to load at a time, going by their size on disk.
+            A file larger than this is loaded on its own. If None, only `workers` limits the loads.
+        :param progress: (default=None) Function called with (files loaded, files to load, filename) as each file finishes loading
+        :param options: The options of `addFile`, applied to every file
+        :type filenames: list of strings
+        :type workers: int
+        :type max_memory: (Optional) int
+        :type progress: (Optional) function
+        :return: List of (filename, error) tuples in the order of `filenames`, where error is None if the file was added
+        :rtype: list of (string, (Optional) Exception) tuples
+        """
+        datafiles = [None] * len(filenames)
+        errors = [None] * len(filenames)
+
+        loading_paths = set()
+        indexes_to_load = []
+        for index, filename in enumerate(filenames):
+            path = _canonical_path(filename)
+            if path in self._datafile_paths or path in loading_paths:
+                errors[index] = FileAlreadyExists()
+            else:
+                loading_paths.add(path)
+                indexes_to_load.append(index)
+
+        sizes = [
+            os.path.getsize(filename) if os.path.exists(filename) else 0
+            for filename in filenames
+        ]
 
-        self._datafiles.append(newDataFile)
+        self._wait_for_saves_of([filenames[index] for index in indexes_to_load])
+
+        loading = {}
+        loading_size = 0
+        total_loaded = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while len(indexes_to_load) > 0 or len(loading) > 0:
+                while (
+                    len(indexes_to_load) > 0
+                    and len(loading) < workers
+                    and (
+                        len(loading) == 0
+                        or max_memory is None
+                        or loading_size + sizes[indexes_to_load[0]] <= max_memory
+                    )
+                ):
+                    index = indexes_to_load.pop(0)
+                    future = executor.submit(
+                        _open_datafile, filenames[index], **options
+                    )
+                    loading[future] = index
+                    loading_size += sizes[index]
+
+                finished, _ = wait(loading, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = loading.pop(future)
+                    loading_size -= sizes[index]
+                    errors[index] = future.exception()
+                    if errors[index] is None:
+                        datafiles[index] = future.result()
+
+                    total_loaded += 1
+                    if progress is not None:
+                        progress(
+                            total_loaded,
+                            total_loaded + len(loading) + len(indexes_to_load),
+                            filenames[index],
+                        )
+
+        self._add_datafiles(
+            [datafile for datafile in datafiles if datafile is not None]
+        )
+        return list(zip(filenames, errors))
+
+    def add_directory(self, directory, recursive=False, **options):
+        """
+        Adds a DataFile for each file of a supported type in `directory`, loading several files at a time.
+        Hidden files, such as the caches and journals kept next to data files, are skipped.
+
+        :param directory: The directory of the files to add
+        :param recursive: (default=False) Flag to also add the files in subdirectories
+        :param options: The options of `add_files`
+        :type directory: string
+        :type recursive: boolean
+        :return: List of (filename, error) tuples, where error is None if the file was added
+        :rtype: list of (string, (Optional) Exception) tuples
+        """
+        extensions = get_supported_extensions()
+        filenames = []
+        for path, subdirectories, basenames in os.walk(directory):
+            subdirectories[:] = sorted(
+                subdirectory
+                for subdirectory in subdirectories
+                if recursive and not subdirectory.startswith(".")
+            )
+            filenames.extend(
+                os.path.join(path, basename)
+                for basename in sorted(basenames)
+                if not basename.startswith(".")
+                and os.path.splitext(basename)[1].lower() in extensions
+            )
+        return self.add_files(filenames, **options)
 
     def closeFile(self, dataFileIndex, save=True):
         """
         Removes a DataFile from the Controller's list, given an index, and optionally saves it.
+        Saves run in the background, several at a time, see `get_finished_saves` for their results.
+        If not saved, changes kept in its journal are discarded.
 
         :param dataFileIndex: The name of the file to add
         :param save: (default=True) Flag to save the DataFile
@@ -226,8 +502,61 @@ class DataFileCLIController:
         :type save: boolean
         """
         dataFile = self._datafiles.pop(dataFileIndex)
+        self._datafile_paths.discard(_canonical_path(dataFile.get_filename()))
+        self._update_datafile_names()
         if save:
-            dataFile.save()
+            future = self._save_executor.submit(_save_datafile, dataFile)
+            self._saves.append((dataFile.get_filename(), future))
+        else:
+            dataFile.discard_journal()
+
+    def _wait_for_saves_of(self, filenames):
+        """
+        Wait for the saves started by `closeFile` of any of `filenames` to finish
+
+        :param filenames: The filenames to wait for
+        :type filenames: list of strings
+        """
+        paths = set(_canonical_path(filename) for filename in filenames)
+        wait(
+            [
+                future
+                for save_filename, future in self._saves
+                if _canonical_path(save_filename) in paths
+            ]
+        )
+
+    def get_total_pending_saves(self):
+        """
+        Get the number of saves started by `closeFile` that have not finished
+
+        :return: number of unfinished saves
+        :rtype: int
+        """
+        return len([future for _, future in self._saves if not future.done()])
+
+    def get_finished_saves(self):
+        """
+        Get the results of the saves started by `closeFile` that finished since this was last called
+
+        :return: List of (filename, error) tuples, where error is None if the save succeeded
+        :rtype: list of (string, (Optional) Exception) tuples
+        """
+        finished = [
+            (filename, future) for filename, future in self._saves if future.done()
+        ]
+        self._saves = [save for save in self._saves if save not in finished]
+        return [(filename, future.exception()) for filename, future in finished]
+
+    def wait_for_saves(self):
+        """
+        Wait for every save started by `closeFile` to finish
+
+        :return: List of (filename, error) tuples, where error is None if the save succeeded
+        :rtype: list of (string, (Optional) Exception) tuples
+        """
+        wait([future for _, future in self._saves])
+        return self.get_finished_saves()
 
     def get_displays_names(self):
         """
@@ -236,11 +565,7 @@ class DataFileCLIController:
         :return: List if script names
         :rtype: list of strings
         """
-        display_methods = display_collector.get_displays()
-        return [
-            display_methods[i].__name__.split(".")[-1]
-            for i in range(len(display_methods))
-        ]
+        return display_collector.get_display_names()
 
     def get_display(self, index):
         """
@@ -248,24 +573,136 @@ class DataFileCLIController:
 
         :param index: index of the script of the desired display method, as ordered in `get_displays_names()`
         :type index: int
-        :return: List if script names
+        :return: The display function, which takes a RowStream such as from `get_current_datafile_rows` and a function to pass output to
         :rtype: function
         """
-        return display_collector.get_displays()[index].display
+        return display_collector.get_display(
+            display_collector.get_display_names()[index]
+        )
 
-    def get_queried_of_current_datafile(self, queries, reindex=False):
+    def get_queried_of_current_datafile(
+        self, queries, reindex=False, match_mode=MATCH_REGEX
+    ):
         """
         Gets the Pandas DataFrame after searching the current DataFile with `queries`
 
         :param queries: List of search arguments (each elememnt is [term, key, exact])
         :param reindex: (default=False) Flag to reindex the rows from 1 to total number of rows
+        :param match_mode: (default=MATCH_REGEX) How terms are matched in substring searches, one of `dataFile.MATCH_MODES`
         :type queries: List (each element is [string, string, boolean])
         :type reindex: boolean
+        :type match_mode: string
         :return: The queried DataFrame
         :rtype: Pandas DataFrame
         """
 
-        queried_df = self._datafiles[self._current_datafile_index].search_multi(queries)
+        queried_df = self._datafiles[self._current_datafile_index].search_multi(
+            queries, match_mode=match_mode
+        )
+
+        if reindex and len(queried_df) > 0:
+            queried_df = queried_df.set_index(pd.Index(list(range(len(queried_df)))))
+
+        return queried_df
+
+    def get_current_datafile_rows(self, queries=None, match_mode=MATCH_REGEX):
+        """
+        Get the rows of the current DataFile, or its rows matching `queries`, for display plugins.
+        Rows are read as the display needs them, so a ChunkedDataFile is not read into memory to be displayed,
+        and only the matching rows that are displayed are copied out of a DataFile.
+
+        :param queries: (default=None) List of search arguments (each elememnt is [term, key, exact]), if None all rows are given
+        :param match_mode: (default=MATCH_REGEX) How terms are matched in substring searches, one of `dataFile.MATCH_MODES`
+        :type queries: None or List (each element is [string, string, boolean])
+        :type match_mode: string
+        :return: The rows, reindexed by position if searched
+        :rtype: RowStream
+        """
+        datafile = self._datafiles[self._current_datafile_index]
+
+        if queries is not None and isinstance(datafile, ChunkedDataFile):
+            return RowStream.from_dataframe(
+                datafile.search_multi(queries, match_mode=match_mode), reindex=True
+            )
+
+        if queries is not None:
+            snapshot = datafile.snapshot()
+            positions = datafile.get_query_positions(queries, match_mode=match_mode)
+
+            def chunks():
+                for first_row in range(0, len(positions), _ROW_CHUNK_ROWS):
+                    chunk = snapshot.take(
+                        positions[first_row : first_row + _ROW_CHUNK_ROWS]
+                    )
+                    yield chunk.set_axis(
+                        pd.RangeIndex(first_row, first_row + len(chunk)), axis=0
+                    )
+
+            return RowStream(
+                snapshot.get_columns(),
+                chunks(),
+                length_hint=len(positions),
+                dtypes=snapshot.get_dtypes(),
+            )
+
+        if isinstance(datafile, ChunkedDataFile):
+            return RowStream(
+                datafile.get_columns(),
+                datafile.iter_chunks(),
+                length_hint=len(datafile),
+                dtypes=datafile.get_dtypes(),
+            )
+        return RowStream.from_snapshot(datafile.snapshot())
+
+    def get_queried_of_all_datafiles(
+        self, queries, reindex=False, match_mode=MATCH_REGEX, workers=_SEARCH_WORKERS
+    ):
+        """
+        Gets the rows of every DataFile matching `queries`, searching several DataFiles at a time.
+        DataFiles without all of the queried columns are skipped.
+        The results are joined in the order of the DataFiles, with the filename of each row's DataFile
+        in the column `SOURCE_COLUMN`. Columns that only some of the DataFiles have are empty for the others.
+
+        :param queries: List of search arguments (each elememnt is [term, key, exact])
+        :param reindex: (default=False) Flag to reindex the rows from 1 to total number of rows
+        :param match_mode: (default=MATCH_REGEX) How terms are matched in substring searches, one of `dataFile.MATCH_MODES`
+        :param workers: (default=4) The most DataFiles to search at a time
+        :type queries: List (each element is [string, string, boolean])
+        :type reindex: boolean
+        :type match_mode: string
+        :type workers: int
+        :return: The queried DataFrame, indexed by each row's index in its DataFile
+        :rtype: Pandas DataFrame
+        """
+        queried_keys = set(key for _, key, _ in queries)
+        searched_datafiles = [
+            datafile
+            for datafile in self._datafiles
+            if queried_keys.issubset(datafile.snapshot().get_columns())
+        ]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            queried_dfs = list(
+                executor.map(
+                    lambda datafile: datafile.search_multi(
+                        queries, match_mode=match_mode
+                    ),
+                    searched_datafiles,
+                )
+            )
+
+        tagged_dfs = [
+            queried_df.assign(**{SOURCE_COLUMN: datafile.get_filename()})
+            for datafile, queried_df in zip(searched_datafiles, queried_dfs)
+        ]
+        if len(tagged_dfs) == 0:
+            return pd.DataFrame(columns=[SOURCE_COLUMN])
+
+        queried_df = pd.concat(tagged_dfs)
+        queried_df = queried_df[
+            [SOURCE_COLUMN]
+            + [column for column in queried_df.columns if column != SOURCE_COLUMN]
+        ]
 
         if reindex and len(queried_df) > 0:
             queried_df = queried_df.set_index(pd.Index(list(range(len(queried_df)))))
@@ -1,10 +1,12 @@
 from dataFileCLIController import DataFileCLIController, FileAlreadyExists
 from dataFileIOCSV import InvalidFileType
+from dataFile import MATCH_LITERAL, MATCH_MODES, get_supported_extensions
+from displays import ASCII_display
 import pandas as pd
 
 pd.set_option("display.width", None)
 import re
-from tkinter.filedialog import askopenfilename
+from tkinter.filedialog import askdirectory, askopenfilename
 
 
 class DataFileCLIView:
@@ -14,6 +16,7 @@ class DataFileCLIView:
         self._current_scene = "Start"
         self._running = False
         self._current_query = []
+        self._match_mode = MATCH_LITERAL
         self._is_searching = False
 
         self._scene_to_funct = {
@@ -173,6 +176,21 @@ class DataFileCLIView:
 
         return datafile_str
 
+    def _report_saves(self, saves):
+        """
+        Send a message for each finished background save
+
+        :param saves: The finished saves, as returned by the controller
+        :type saves: list of (string, (Optional) Exception) tuples
+        """
+        for filename, error in saves:
+            if error is None:
+                self._send_message("{}\n\t saved".format(filename))
+            else:
+                self._send_message(
+                    "{}\n\t could not be saved: {}".format(filename, error), True
+                )
+
     def start_scene(self):
         """
         Scene for starting the applicaton.
@@ -212,6 +230,10 @@ class DataFileCLIView:
                 is_saving_this_datafile = True
             self._controller.closeFile(datafile_index, save=is_saving_this_datafile)
 
+        if self._controller.get_total_pending_saves() > 0:
+            self._send_message("Waiting for saves to finish...")
+        self._report_saves(self._controller.wait_for_saves())
+
         self._send_message("Exiting {}".format(self._name))
         self._running = False
 
@@ -220,6 +242,7 @@ class DataFileCLIView:
         Scene for selecting an open DataFile.
         Scene key: Selection
         """
+        self._report_saves(self._controller.get_finished_saves())
         self._send_message("\n-- DATAFILE SELECTION --\n")
 
         file_command_messages = {
@@ -288,8 +311,23 @@ class DataFileCLIView:
         """
         self._send_message("\n-- ADDING FILE --\n")
 
+        add_choice = self._prompt_choice(
+            ["A single file", "Every data file in a directory"],
+            choice_msg="Choose what to add:",
+        )
+
+        if add_choice < 0:
+            self._send_message("Adding cancelled")
+            self._current_scene = "Selection"
+            return
+
+        if add_choice == 1:
+            self._add_directory()
+            return
+
         filename = askopenfilename(
-            title="Please a CSV to add.", filetypes=[("CSV Files", [".csv"])]
+            title="Please a data file to add.",
+            filetypes=[("Data Files", get_supported_extensions())],
         )
 
         self._current_scene = "Selection"
@@ -300,12 +338,62 @@ class DataFileCLIView:
 
         try:
             self._controller.addFile(filename)
-        except FileAlreadyExists:
-            self._send_message("{} is already loaded.".format(filename), True)
-        except FileNotFoundError:
-            self._send_message("{} could not be found.".format(filename), True)
-        except InvalidFileType:
-            self._send_message("{} is not a csv.".format(filename), True)
+        except (
+            FileAlreadyExists,
+            FileNotFoundError,
+            InvalidFileType,
+            ImportError,
+        ) as error:
+            self._send_message(self._load_error_message(filename, error), True)
+
+    def _add_directory(self):
+        """
+        Add every data file in a directory chosen by the user, showing progress as files are loaded
+        """
+        directory = askdirectory(
+            title="Please choose a directory of data files to add."
+        )
+        self._current_scene = "Selection"
+
+        if directory == "":
+            self._send_message("No directory was selected.", True)
+            return
+
+        results = self._controller.add_directory(
+            directory,
+            progress=lambda total_loaded, total_files, filename: self._send_message(
+                "[{}/{}] {}".format(total_loaded, total_files, filename)
+            ),
+        )
+
+        for filename, error in results:
+            if error is not None:
+                self._send_message(self._load_error_message(filename, error))
+        self._send_message(
+            "Added {} of {} files.".format(
+                len([error for _, error in results if error is None]), len(results)
+            ),
+            True,
+        )
+
+    def _load_error_message(self, filename, error):
+        """
+        A message explaining why `filename` could not be loaded
+
+        :param filename: The filename of the file
+        :param error: The exception raised when loading the file
+        :type filename: string
+        :type error: Exception
+        :return: message for the user
+        :rtype: string
+        """
+        if isinstance(error, FileAlreadyExists):
+            return "{} is already loaded.".format(filename)
+        if isinstance(error, FileNotFoundError):
+            return "{} could not be found.".format(filename)
+        if isinstance(error, InvalidFileType):
+            return "{} is not a supported file type.".format(filename)
+        return "{} could not be opened: {}".format(filename, error)
 
     def remove_file_scene(self):
         """
@@ -333,7 +421,9 @@ class DataFileCLIView:
             save_confirm = self._prompt_y_n("Would you like to save this?")
             self._controller.closeFile(remove_index, save_confirm)
             if save_confirm:
-                self._send_message("{}\n\t saved and closed".format(nominated_datafile))
+                self._send_message(
+                    "{}\n\t closed, saving in the background".format(nominated_datafile)
+                )
             else:
                 self._send_message("{}\n\t closed".format(nominated_datafile))
         else:
@@ -446,11 +536,12 @@ class DataFileCLIView:
 
         index_of_interest = -1
 
-        total_rows = len(self._controller.get_current_datafile_dataframe())
+        total_rows = self._controller.get_current_datafile_dataframe_row_total()
         if searching:
-            total_rows = len(
-                self._controller.get_queried_of_current_datafile(self._current_query)
+            dataframe_queried = self._controller.get_queried_of_current_datafile(
+                self._current_query, match_mode=self._match_mode
             )
+            total_rows = len(dataframe_queried)
         if total_rows == 0:
             if searching:
                 self._send_message("Current DataFile search is empty.", True)
@@ -465,9 +556,6 @@ class DataFileCLIView:
         )
 
         if searching:
-            dataframe_queried = self._controller.get_queried_of_current_datafile(
-                self._current_query
-            )
             index_of_interest = list(dataframe_queried.index)[index_value_selected]
         else:
             index_of_interest = index_value_selected
@@ -476,9 +564,9 @@ class DataFileCLIView:
             self._send_message("No row selected.", True)
             return
 
-        row_of_interest = self._controller.get_current_datafile_dataframe().loc[
-            [index_of_interest]
-        ]
+        row_of_interest = self._controller.get_current_datafile_snapshot().get_row(
+            index_of_interest
+        )
 
         row_of_interest = row_of_interest.set_index(pd.Index([index_of_interest + 1]))
 
@@ -608,13 +696,13 @@ class DataFileCLIView:
             return
 
         display_method = self._controller.get_display(display_method_index)
-        dataframe_to_display = self._controller.get_current_datafile_dataframe()
-        if searching:
-            dataframe_to_display = self._controller.get_queried_of_current_datafile(
-                self._current_query, reindex=True
-            )
+        rows_to_display = self._controller.get_current_datafile_rows(
+            self._current_query if searching else None, match_mode=self._match_mode
+        )
 
-        display_method(dataframe_to_display, self._send_message)
+        display_method(
+            rows_to_display, self._send_message, input_stream=self._ask_user
+        )
 
         self._send_message("\n", is_prompt=True)
 
@@ -631,12 +719,16 @@ class DataFileCLIView:
             "remove-row",
             "remove-all-rows",
             "change",
+            "change-all-rows",
+            "match-mode",
             "display",
             "back",
         ]
 
+        self._send_message("Substring match mode: {}".format(self._match_mode))
+
         if self._current_query == []:
-            search_commands = ["add-search", "back"]
+            search_commands = ["add-search", "match-mode", "back"]
             self._send_message("\n-No current search queries-")
 
         else:
@@ -651,10 +743,11 @@ class DataFileCLIView:
             search_queries_df.index += 1
             self._send_message(search_queries_df.to_string())
 
-            search_result_df = self._controller.get_queried_of_current_datafile(
-                self._current_query, reindex=True
+            # Only the rows of the first page are copied out of the DataFile
+            search_rows = self._controller.get_current_datafile_rows(
+                self._current_query, match_mode=self._match_mode
             )
-            total_search_rows = len(search_result_df)
+            total_search_rows = search_rows.get_length_hint()
             self._send_message(
                 "\nCurrent Search Results ({} row{}):".format(
                     total_search_rows, "" if total_search_rows == 1 else "s"
@@ -662,11 +755,16 @@ class DataFileCLIView:
             )
 
             if total_search_rows > 0:
-                search_result_df = search_result_df.set_index(
-                    pd.Index(list(range(total_search_rows)))
+                page_rows = ASCII_display.get_page_rows()
+                first_page = next(search_rows.iter_chunks(page_rows))
+                first_page = first_page.set_axis(first_page.index + 1, axis=0)
+                print(
+                    ASCII_display.format_page(
+                        first_page, page_rows=page_rows, total_rows=total_search_rows
+                    )
                 )
-                search_result_df.index += 1
-                print(search_result_df)
+                if total_search_rows > page_rows:
+                    self._send_message('Use "display" to page through every row')
             else:
                 self._send_message("\n-Empty search result-\n")
 
@@ -684,6 +782,16 @@ class DataFileCLIView:
                 r"remove-all-rows\Z",
             ],
             "change": ["Change a row", "change", r"change\Z"],
+            "change-all-rows": [
+                "Change a column of all rows in search",
+                "change-all-rows",
+                r"change-all-rows\Z",
+            ],
+            "match-mode": [
+                "Choose how substring searches match",
+                "match-mode",
+                r"match-mode\Z",
+            ],
             "display": ["Display Data", "display", r"display\Z"],
             "back": ["Back to DataFile querying", "back", r"back\Z"],
         }
@@ -703,6 +811,10 @@ class DataFileCLIView:
                 self._remove_all_rows_in_search()
             case "change":
                 self._current_scene = "Change Row Search"
+            case "change-all-rows":
+                self._change_all_rows_in_search()
+            case "match-mode":
+                self._choose_match_mode()
             case "display":
                 self._current_scene = "Display Search"
             case "back":
@@ -711,6 +823,22 @@ class DataFileCLIView:
             case _:
                 pass
 
+    def _choose_match_mode(self):
+        """
+        Prompts user to choose how the terms of substring searches are matched
+        """
+        match_mode_index = self._prompt_choice(
+            MATCH_MODES,
+            choice_msg="How should substring search terms match?",
+        )
+        if match_mode_index < 0:
+            return
+
+        self._match_mode = MATCH_MODES[match_mode_index]
+        self._send_message(
+            "Substring searches now match by {}".format(self._match_mode), True
+        )
+
     def _add_search_term(self):
         """
         Prompts user to add a search term.
@@ -767,7 +895,7 @@ class DataFileCLIView:
         Remove all the rows in the queried DataFile from the Search scene
         """
         search_result_df = self._controller.get_queried_of_current_datafile(
-            self._current_query
+            self._current_query, match_mode=self._match_mode
         )
 
         total_rows = len(search_result_df)
@@ -798,6 +926,61 @@ class DataFileCLIView:
                 True,
             )
 
+    def _change_all_rows_in_search(self):
+        """
+        Change the value of a column of the users choice, for all the rows in the queried DataFile
+        from the Search scene
+        """
+        total_rows = len(
+            self._controller.get_queried_of_current_datafile(
+                self._current_query, match_mode=self._match_mode
+            )
+        )
+
+        if total_rows == 0:
+            self._send_message("Current DataFile search is empty.", True)
+            return
+
+        index_of_column_to_change = self._prompt_choice(
+            self._controller.get_current_datafile_columns(),
+            choice_msg="Which column are you changing?",
+        )
+
+        if index_of_column_to_change < 0:
+            self._send_message("Column selection cancelled. Exiting row change", True)
+            return
+
+        column_name = self._controller.get_current_datafile_columns()[
+            index_of_column_to_change
+        ]
+
+        new_value = self._ask_user("New value of {}: ".format(column_name))
+
+        confirm_change_value = self._prompt_y_n(
+            'Confirm {} -> "{}" for {} row{}?'.format(
+                column_name, new_value, total_rows, "" if total_rows == 1 else "s"
+            )
+        )
+
+        if confirm_change_value:
+            self._controller.change_column_of_queried_current_datafile(
+                self._current_query,
+                column_name,
+                new_value,
+                match_mode=self._match_mode,
+            )
+            self._send_message(
+                "Changed {} row{}".format(total_rows, "" if total_rows == 1 else "s"),
+                True,
+            )
+        else:
+            self._send_message(
+                "Cancelled change of {} row{}".format(
+                    total_rows, "" if total_rows == 1 else "s"
+                ),
+                True,
+            )
+
     def _select_command(self, command_messages, valid_commands=None):
         """
         Given a list of commands and a dictionary of command messages, prompts the user until they
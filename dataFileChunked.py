@@ -0,0 +1,596 @@
+"""
+A DataFile for data sources too large to hold in memory.
+Rows are paged in from a chunked DataFileIO on demand, and changes are kept
+separately from the source until the ChunkedDataFile is saved.
+It has the same API as DataFile, so the controller can use either.
+"""
+
+import numpy as np
+import pandas as pd
+from dataFile import MATCH_REGEX, MATCH_MODES, _as_strings, _match_mask
+from dataFileIOCSVChunked import DataFileIOCSVChunked
+from dataFileIOCSVMapped import DataFileIOCSVMapped
+
+
+def _query_mask(dataframe, search_args, match_mode):
+    """
+    Get which rows of `dataframe` match all of `search_args`
+
+    :param dataframe: The DataFrame to search
+    :param search_args: List of search arguments (each elememnt is [term, key, exact])
+    :param match_mode: How terms are matched in substring searches, one of `dataFile.MATCH_MODES`
+    :type dataframe: Pandas DataFrame
+    :type search_args: List (each element is [string, string, boolean])
+    :type match_mode: string
+    :return: boolean mask, True where the row matches
+    :rtype: numpy array of booleans
+    """
+    mask = np.ones(len(dataframe), dtype=bool)
+    for term, key, exact in search_args:
+        if not mask.any():
+            break
+        column = dataframe[key][mask]
+        if exact:
+            mask[mask] = _as_strings(column).to_numpy() == term
+        else:
+            mask[mask] = _match_mask(column, term, match_mode)
+    return mask
+
+
+class ChunkedDataFileSnapshot:
+    """
+    A read-only view of a ChunkedDataFile, which reads rows from it when they are needed.
+    It is only valid until the ChunkedDataFile is next changed.
+    """
+
+    def __init__(self, datafile, version):
+        """
+        Create a ChunkedDataFileSnapshot object.
+
+        :param datafile: The ChunkedDataFile to view
+        :param version: The version of the ChunkedDataFile the snapshot was taken at
+        :type datafile: ChunkedDataFile
+        :type version: int
+        """
+        self._datafile = datafile
+        self._version = version
+
+    def get_version(self):
+        """
+        Get the version of the ChunkedDataFile this snapshot was taken at
+
+        :return: version of the snapshot
+        :rtype: int
+        """
+        return self._version
+
+    def get_columns(self):
+        """
+        Get the column names of the snapshot
+
+        :return: List of column names
+        :rtype: list of strings
+        """
+        return self._datafile.get_columns()
+
+    def get_row(self, index):
+        """
+        Get the row at `index` as a single row DataFrame.
+
+        :param index: The index of the row
+        :type index: int
+        :return: DataFrame with only the row at `index`
+        :rtype: Pandas DataFrame
+        """
+        return self._datafile.get_rows([index])
+
+    def head(self, n):
+        """
+        Get the first `n` rows, only reading the chunks they are in
+
+        :param n: number of rows
+        :type n: int
+        :return: The first `n` rows
+        :rtype: Pandas DataFrame
+        """
+        return self._datafile.get_rows(np.arange(min(n, len(self._datafile))))
+
+    def view(self):
+        """
+        Get all the rows as a single DataFrame. This reads the whole data source into memory.
+
+        :return: DataFrame of all the rows
+        :rtype: Pandas DataFrame
+        """
+        return self._datafile.get()
+
+    def get(self):
+        """
+        Get all the rows as a single DataFrame. This reads the whole data source into memory.
+
+        :return: DataFrame of all the rows
+        :rtype: Pandas DataFrame
+        """
+        return self._datafile.get()
+
+    def __len__(self):
+        """
+        Implementation of length, based on the number of rows of the ChunkedDataFile
+
+        :return: number of rows in the snapshot
+        :rtype: int
+        """
+        return len(self._datafile)
+
+
+class ChunkedDataFile:
+    def __init__(self, IO_handler):
+        """
+        Create a ChunkedDataFile object.
+
+        :param IO_handler: The file handler that reads the data source in chunks
+        :type IO_handler: DataFileIOCSVChunked or DataFileIOCSVMapped
+        """
+        self._IO_handler = IO_handler
+        self._version = 0
+        self._reset_changes()
+
+    @staticmethod
+    def from_csv(
+        filename,
+        chunk_size=100000,
+        max_resident_chunks=4,
+        mapped=False,
+        use_cache=False,
+    ):
+        """
+        Returns a ChunkedDataFile using a csv file as a source.
+        Creates a DataFileIOCSVChunked as an IO_handler for the ChunkedDataFile,
+        or a DataFileIOCSVMapped if `mapped`.
+
+        :param filename: The filename for the csv data
+        :param chunk_size: (default=100000) The number of rows read at a time
+        :param max_resident_chunks: (default=4) The most chunks to keep in memory at a time
+        :param mapped: (default=False) Flag to memory-map the file and index every row, so single rows can be parsed on their own
+        :param use_cache: (default=False) Flag to keep the index of every row of a mapped file next to it, for faster opening
+        :type filename: string
+        :type chunk_size: int
+        :type max_resident_chunks: int
+        :type mapped: boolean
+        :type use_cache: boolean
+        :return: ChunkedDataFile with datasource as the csv file `filename`
+        :rtype: ChunkedDataFile
+        """
+        if mapped:
+            IO_handler = DataFileIOCSVMapped(
+                filename,
+                chunk_size=chunk_size,
+                max_resident_chunks=max_resident_chunks,
+                use_cache=use_cache,
+            )
+        else:
+            IO_handler = DataFileIOCSVChunked(
+                filename, chunk_size=chunk_size, max_resident_chunks=max_resident_chunks
+            )
+        return ChunkedDataFile(IO_handler)
+
+    def _reset_changes(self):
+        """
+        Forget all changes made since the data source was last read.
+        """
+        self._columns = self._IO_handler.get_columns()
+        self._total_source_rows = self._IO_handler.get_total_rows()
+        self._changed_rows = {}
+        self._deleted_positions = np.zeros(0, dtype=np.int64)
+        self._appended_rows = []
+
+    def get_filename(self):
+        """
+        Get filename of ChunkedDataFile from `_IO_handler`
+
+        :return: filename
+        :rtype: string
+        """
+        return self._IO_handler.get_filename()
+
+    def get_version(self):
+        """
+        Get the version of the ChunkedDataFile, which increases every time it is changed
+
+        :return: current version
+        :rtype: int
+        """
+        return self._version
+
+    def get_columns(self):
+        """
+        Get the column names
+
+        :return: List of column names
+        :rtype: list of strings
+        """
+        return list(self._columns)
+
+    def get_dtypes(self):
+        """
+        Get the dtype of each column, every column is read as strings
+
+        :return: dict of column name to dtype
+        :rtype: dict
+        """
+        return {column: np.dtype(object) for column in self._columns}
+
+    def snapshot(self):
+        """
+        Get a read-only snapshot, which reads rows when they are needed
+
+        :return: snapshot of the current version
+        :rtype: ChunkedDataFileSnapshot
+        """
+        return ChunkedDataFileSnapshot(self, self._version)
+
+    def get(self):
+        """
+        Get all the rows as a single DataFrame. This reads the whole data source into memory.
+
+        :return: DataFrame of all the rows
+        :rtype: Pandas DataFrame
+        """
+        chunks = list(self.iter_chunks())
+        if len(chunks) == 0:
+            return pd.DataFrame(columns=self._columns, dtype=str)
+        return pd.concat(chunks)
+
+    def _total_live_source_rows(self):
+        """
+        Get the number of rows of the data source that have not been removed
+
+        :return: number of rows
+        :rtype: int
+        """
+        return self._total_source_rows - len(self._deleted_positions)
+
+    def _to_source_positions(self, positions):
+        """
+        Get the positions in the data source of the rows at `positions`, when ignoring removed rows
+
+        :param positions: positions of rows that are in the data source, ignoring removed rows
+        :type positions: numpy array of ints
+        :return: positions of the rows in the data source
+        :rtype: numpy array of ints
+        """
+        live_rows_before_deleted = self._deleted_positions - np.arange(
+            len(self._deleted_positions)
+        )
+        return positions + np.searchsorted(
+            live_rows_before_deleted, positions, side="right"
+        )
+
+    def _normalise_row(self, row):
+        """
+        Get `row` as a list of values in column order
+
+        :param row: Either a list of values or a dict representing the key/values for the row
+        :type row: dict or list
+        :return: list of values
+        :rtype: list
+        """
+        if isinstance(row, dict):
+            return [row.get(column, np.nan) for column in self._columns]
+        if len(row) != len(self._columns):
+            raise ValueError("cannot set a row with mismatched columns")
+        return list(row)
+
+    def _check_positions(self, index, error_type):
+        """
+        Get `index` as an array of positions, raising `error_type` if any are out of bounds
+
+        :param index: either a single index, or a list of indices
+        :param error_type: The exception class to raise
+        :type index: int or list of ints
+        :type error_type: class
+        :return: the positions
+        :rtype: numpy array of ints
+        """
+        positions = np.atleast_1d(np.asarray(index))
+        if len(positions) == 0:
+            return positions.astype(np.int64)
+        if (
+            not np.issubdtype(positions.dtype, np.integer)
+            or (positions < 0).any()
+            or (positions >= len(self)).any()
+        ):
+            raise error_type(
+                "Index {} out of bounds for DataFrame of length {}".format(
+                    index, len(self)
+                )
+            )
+        return positions
+
+    def iter_chunks(self):
+        """
+        Iterate over the rows in chunks, with changes applied.
+        Each chunk is indexed by the positions of its rows.
+
+        :return: iterator of DataFrames
+        :rtype: iterator of Pandas DataFrames
+        """
+        changed_positions = np.array(sorted(self._changed_rows), dtype=np.int64)
+
+        for chunk in self._IO_handler.iter_chunks():
+            source_positions = chunk.index.to_numpy()
+            first, last = source_positions[0], source_positions[-1]
+
+            chunk_changes = changed_positions[
+                (changed_positions >= first) & (changed_positions <= last)
+            ]
+            if len(chunk_changes) > 0:
+                chunk = chunk.copy()
+                for source_position in chunk_changes:
+                    chunk.iloc[source_position - first] = self._changed_rows[
+                        source_position
+                    ]
+
+            is_live = ~np.isin(source_positions, self._deleted_positions)
+            chunk = chunk[is_live]
+            chunk.index = source_positions[is_live] - np.searchsorted(
+                self._deleted_positions, source_positions[is_live]
+            )
+            if len(chunk) > 0:
+                yield chunk
+
+        if len(self._appended_rows) > 0:
+            first_position = self._total_live_source_rows()
+            yield pd.DataFrame(
+                self._appended_rows,
+                columns=self._columns,
+                index=pd.RangeIndex(
+                    first_position, first_position + len(self._appended_rows)
+                ),
+            )
+
+    def get_rows(self, positions):
+        """
+        Get the rows at `positions`, only reading the source rows that are needed
+
+        :param positions: The positions of the rows
+        :type positions: list of ints
+        :return: DataFrame of the rows, indexed by their positions
+        :rtype: Pandas DataFrame
+        """
+        positions = self._check_positions(positions, KeyError)
+        total_live_source_rows = self._total_live_source_rows()
+        is_source_row = positions < total_live_source_rows
+        source_positions = self._to_source_positions(positions[is_source_row])
+
+        rows = [
+            self._appended_rows[position - total_live_source_rows]
+            for position in positions[~is_source_row]
+        ]
+        rows = [None] * len(source_positions) + rows
+
+        unchanged = []
+        for i, source_position in enumerate(source_positions):
+            if source_position in self._changed_rows:
+                rows[i] = self._changed_rows[source_position]
+            else:
+                unchanged.append(i)
+
+        source_rows = self._IO_handler.get_rows(source_positions[unchanged])
+        for i, row in zip(unchanged, source_rows.values.tolist()):
+            rows[i] = row
+
+        return pd.DataFrame(
+            rows,
+            columns=self._columns,
+            index=pd.Index(
+                np.concatenate([positions[is_source_row], positions[~is_source_row]])
+            ),
+        ).loc[positions]
+
+    def add_row(self, row):
+        """
+        Adds row `row` to the end of the ChunkedDataFile.
+
+        :param row: Either a list of values or a dict representing the key/values for the new row
+        :type row: dict or list
+        """
+        self.add_rows([row])
+
+    def add_rows(self, rows):
+        """
+        Adds each row of `rows` to the end of the ChunkedDataFile.
+
+        :param rows: Either a list of rows (each a list of values or a dict of key/values) or a DataFrame
+        :type rows: list of (dict or list), or Pandas DataFrame
+        """
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.reindex(columns=self._columns).values.tolist()
+        self._appended_rows.extend([self._normalise_row(row) for row in rows])
+        self._version += 1
+
+    def remove_row(self, index, reset_index=True):
+        """
+        Remove a row (or a multiple rows) at a given index (or indices).
+        Rows are always indexed by position, so `reset_index` has no effect.
+
+        :param index: either a single index, or a list of indices
+        :param reset_index: (default = True) Unused, kept for compatibility with DataFile
+        :type index: int or list of ints
+        :type reset_index: boolean
+        """
+        positions = np.unique(self._check_positions(index, KeyError))
+        total_live_source_rows = self._total_live_source_rows()
+
+        appended_positions = positions[positions >= total_live_source_rows]
+        for position in appended_positions[::-1]:
+            self._appended_rows.pop(position - total_live_source_rows)
+
+        source_positions = self._to_source_positions(
+            positions[positions < total_live_source_rows]
+        )
+        for source_position in source_positions:
+            self._changed_rows.pop(int(source_position), None)
+        self._deleted_positions = np.union1d(self._deleted_positions, source_positions)
+        self._version += 1
+
+    def change_row(self, row, index):
+        """
+        Changes the row at position `index` to `row`
+
+        :param row: The replacement row to be placed at `index`
+        :param index: The index of the row to be changed
+        :type row: list or dict
+        :type index: int
+        """
+        self._check_positions(index, IndexError)
+        self._set_rows([index], [self._normalise_row(row)])
+
+    def _set_rows(self, positions, rows):
+        """
+        Replace the rows at `positions` with `rows`
+
+        :param positions: The positions of the rows
+        :param rows: The new rows, each a list of values in column order
+        :type positions: list of ints
+        :type rows: list of lists
+        """
+        total_live_source_rows = self._total_live_source_rows()
+        for position, row in zip(positions, rows):
+            if position >= total_live_source_rows:
+                self._appended_rows[position - total_live_source_rows] = row
+            else:
+                source_position = self._to_source_positions(np.array([position]))[0]
+                self._changed_rows[int(source_position)] = row
+        self._version += 1
+
+    def set_cells(self, index, key, value):
+        """
+        Sets the value of the cells in column `key` at position `index` (or positions) to `value`.
+
+        :param index: either a single index, or a list of indices
+        :param key: The column of the cells to change
+        :param value: Either a single value for all the cells, or a list with a value for each index
+        :type index: int or list of ints
+        :type key: string
+        :type value: string or list of strings
+        """
+        if key not in self._columns:
+            raise KeyError("key={} not in this DataFrame".format(key))
+
+        positions = self._check_positions(index, IndexError)
+        rows = self.get_rows(positions)
+        rows[key] = value
+        self._set_rows(positions, rows.values.tolist())
+
+    def update_where(self, search_args, key, value, match_mode=MATCH_REGEX):
+        """
+        Sets the value in column `key` of every row matching `search_args` to `value`.
+
+        :param search_args: List of search arguments (each elememnt is [term, key, exact])
+        :param key: The column of the cells to change
+        :param value: The new value of the cells
+        :param match_mode: (default MATCH_REGEX) How terms are matched in substring searches, one of `MATCH_MODES`
+        :type search_args: List (each element is [string, string, boolean])
+        :type key: string
+        :type value: string
+        :type match_mode: string
+        :return: The number of rows changed
+        :rtype: int
+        """
+        if key not in self._columns:
+            raise KeyError("key={} not in this DataFrame".format(key))
+
+        positions = list(self.search_multi(search_args, match_mode=match_mode).index)
+        if len(positions) > 0:
+            self.set_cells(positions, key, value)
+        return len(positions)
+
+    def search(self, term, key, exact=True, search_df=None, match_mode=MATCH_REGEX):
+        """
+        Searches each row for `term` in the column `key`, one chunk at a time.
+        Exact search if `exact`, otherwise substring search matched by `match_mode`.
+
+        :param term: The string to search for
+        :param key: The column in which to search for `term`
+        :param exact: (default True) If True, only return rows where values in `key` are exactly `term`, if False, return rows where `term` is a substring of values in `key`
+        :param search_df: (defalt None) The dataframe to search within, if None, defaults to all rows
+        :param match_mode: (default MATCH_REGEX) How `term` is matched in a substring search, one of `MATCH_MODES`
+        :type term: string
+        :type key: string
+        :type exact: boolean
+        :type search_df: None or Pandas DataFrame
+        :type match_mode: string
+        :return: DataFrame with only the matching rows
+        :rtype: Pandas DataFrame
+        """
+        return self.search_multi([[term, key, exact]], search_df, match_mode)
+
+    def search_multi(self, search_args, current_result=None, match_mode=MATCH_REGEX):
+        """
+        Executes multiple search queries, one chunk at a time, only keeping the matching rows in memory.
+
+        :param search_args: List of search arguments (each elememnt is [term, key, exact])
+        :param current_result: (default=None) The current search result to continue searching, if None then defaults to all rows
+        :param match_mode: (default MATCH_REGEX) How terms are matched in substring searches, one of `MATCH_MODES`
+        :type search_args: List (each element is [string, string, boolean])
+        :type current_result: None or Pandas DataFrame
+        :type match_mode: string
+        :return: Final result of the multiple searches
+        :rtype: Pandas DataFrame
+        """
+        for term, key, exact in search_args:
+            if key not in self._columns:
+                raise KeyError("key={} not in this DataFrame".format(key))
+            if not exact and match_mode not in MATCH_MODES:
+                raise ValueError(
+                    "match_mode={} is not one of {}".format(match_mode, MATCH_MODES)
+                )
+
+        if current_result is not None:
+            return current_result[_query_mask(current_result, search_args, match_mode)]
+
+        results = [
+            chunk[_query_mask(chunk, search_args, match_mode)]
+            for chunk in self.iter_chunks()
+        ]
+        if len(results) == 0:
+            return pd.DataFrame(columns=self._columns, dtype=str)
+        return pd.concat(results)
+
+    def save(self):
+        """
+        Save the rows with all changes to the data source, one chunk at a time
+        """
+        self._IO_handler.save_chunks(self._columns, self.iter_chunks())
+        self._reset_changes()
+
+    def wait_for_checkpoint(self):
+        """
+        ChunkedDataFiles save in the foreground, so there is nothing to wait for.
+        Kept for compatibility with DataFile.
+        """
+        pass
+
+    def discard_journal(self):
+        """
+        ChunkedDataFiles keep their changes in memory rather than in a journal, so there is nothing to discard.
+        Kept for compatibility with DataFile.
+        """
+        pass
+
+    def close_journal(self):
+        """
+        ChunkedDataFiles keep their changes in memory rather than in a journal, so there is nothing to close.
+        Kept for compatibility with DataFile.
+        """
+        pass
+
+    def __len__(self):
+        """
+        Implementation of length, based on the number of rows
+
+        :return: number of rows
+        :rtype: int
+        """
+        return self._total_live_source_rows() + len(self._appended_rows)
@@ -3,6 +3,62 @@ The abstract class DataFileIO responsible for handling data sources of DataFiles
 Can save and load dataframes for DataFiles.
 """
 
+from contextlib import contextmanager
+import os
+import shutil
+import tempfile
+import pandas as pd
+
+
+def table_to_dataframe(table):
+    """
+    Convert a pyarrow Table to a Pandas DataFrame that a DataFile can change in place.
+    Pandas can share read-only memory with the Table, so categorical codes are copied.
+
+    :param table: The table to convert
+    :type table: pyarrow Table
+    :return: DataFrame of the table
+    :rtype: Pandas DataFrame
+    """
+    dataframe = table.to_pandas()
+    for column_name, column in dataframe.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            dataframe[column_name] = pd.Categorical.from_codes(
+                column.cat.codes.to_numpy().copy(), dtype=column.dtype
+            )
+    return dataframe
+
+
+@contextmanager
+def atomic_write(filename, mode="w"):
+    """
+    Open a temporary file next to `filename`, which replaces `filename` once it is written without error
+    and flushed to disk, so `filename` is never left partly written. The permissions of `filename` are kept.
+
+    :param filename: The filename of the file to replace
+    :param mode: (default="w") The mode to open the temporary file with, "w" or "wb"
+    :type filename: string
+    :type mode: string
+    :return: context manager giving the open temporary file
+    :rtype: context manager of file
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    file_descriptor, temporary_filename = tempfile.mkstemp(
+        suffix=os.path.splitext(filename)[1], dir=directory
+    )
+    try:
+        newline = None if "b" in mode else ""
+        with os.fdopen(file_descriptor, mode, newline=newline) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, temporary_filename)
+        os.replace(temporary_filename, filename)
+    except BaseException:
+        os.remove(temporary_filename)
+        raise
+
 
 class DataFileIO:
     """
@@ -24,6 +80,32 @@ class DataFileIO:
             "Abstract class `DataFileIO` has no save() implementation"
         )
 
+    def append(self, dataframe):
+        """
+        Should append the rows of a Pandas Dataframe to the saved data, without rewriting it.
+        Not every DataFileIO can do this, in which case `save` is used instead.
+
+        :param dataframe: The Pandas DataFrame of rows to append
+        :type dataframe: Pandas DataFrame
+        """
+        raise NotImplementedError(
+            "{} has no append() implementation".format(type(self).__name__)
+        )
+
+    def patch(self, dataframe):
+        """
+        Should overwrite rows of the saved data in place, without rewriting the rest of it.
+        Not every DataFileIO can do this, in which case `save` is used instead.
+
+        :param dataframe: The Pandas DataFrame of the new rows, indexed by their row number in the saved data
+        :type dataframe: Pandas DataFrame
+        :return: True if the rows were overwritten, False if they could not be
+        :rtype: boolean
+        """
+        raise NotImplementedError(
+            "{} has no patch() implementation".format(type(self).__name__)
+        )
+
     def load(self, filename=None):
         """
         Should load the dataframe from a relevant location based on the DataFileIO object.
@@ -0,0 +1,137 @@
+"""
+An implementation of DataFileIO for saving and loading Arrow IPC (Feather) files.
+Needs pyarrow.
+"""
+
+from os.path import exists, splitext
+from dataFileIO import DataFileIO, atomic_write, table_to_dataframe
+from dataFileIOCSV import InvalidFileType
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa = None
+    pa_compute = None
+    pa_feather = None
+    pa_parquet = None
+
+
+class PartialLoadError(Exception):
+    """
+    Exception for when trying to save a DataFile that was loaded with only some of its columns or rows.
+    """
+
+    pass
+
+
+def _to_filter_expression(filters):
+    """
+    Get `filters` as a pyarrow filter expression
+
+    :param filters: (Optional) Filters in the form accepted by pyarrow.parquet.read_table,
+        e.g. [("Age", ">", 30)], or a pyarrow expression
+    :type filters: (Optional) list of tuples, or pyarrow Expression
+    :return: (Optional) pyarrow expression of the filters
+    :rtype: (Optional) pyarrow Expression
+    """
+    if filters is None or isinstance(filters, pa_compute.Expression):
+        return filters
+    return pa_parquet.filters_to_expression(filters)
+
+
+class DataFileIOArrow(DataFileIO):
+    """
+    Saves and loads Arrow IPC files, which are memory-mapped when loaded.
+    Column types are kept as they are in the file.
+    """
+
+    EXTENSIONS = [".arrow", ".feather", ".ipc"]
+    FORMAT_NAME = "Arrow IPC"
+
+    def __init__(self, filename, columns=None, filters=None):
+        """
+        Create a DataFileIOArrow object.
+
+        :param filename: The filename of the Arrow IPC file
+        :param columns: (default=None) The names of the only columns to load, if None all columns are loaded
+        :param filters: (default=None) Only load rows matching the filters, e.g. [("Age", ">", 30)]
+        :type filename: string
+        :type columns: None or list of strings
+        :type filters: None or list of tuples
+        """
+        if pa is None:
+            raise ImportError("pyarrow is needed for {} files".format(self.FORMAT_NAME))
+        super().__init__()
+        self._filename = filename
+        self._columns = columns
+        self._filters = filters
+
+    def _check_file(self):
+        """
+        Check the file exists and has a supported extension, raising an exception if not.
+        """
+        if not exists(self._filename):
+            raise FileNotFoundError("Could not find {}".format(self._filename))
+
+        if splitext(self._filename)[1].lower() not in self.EXTENSIONS:
+            raise InvalidFileType(
+                "Input file {} is not an {} file.".format(
+                    self._filename, self.FORMAT_NAME
+                )
+            )
+
+    def _read_table(self):
+        """
+        Read the file as a pyarrow Table, with only the selected columns and rows
+
+        :return: Table of the file
+        :rtype: pyarrow Table
+        """
+        table = pa_feather.read_table(
+            self._filename, columns=self._columns, memory_map=True
+        )
+        if self._filters is not None:
+            table = table.filter(_to_filter_expression(self._filters))
+        return table
+
+    def _write_table(self, table, file):
+        """
+        Write the pyarrow Table `table` to `file`
+
+        :param table: The table to write
+        :param file: The file to write to
+        :type table: pyarrow Table
+        :type file: binary file
+        """
+        pa_feather.write_feather(table, file, compression="zstd")
+
+    def load(self):
+        """
+        Returns a Pandas DataFrame from the file `self.filename`
+
+        :return: Pandas DataFrame from `filename`
+        :rtype: Pandas DataFrame
+        """
+        self._check_file()
+        return table_to_dataframe(self._read_table())
+
+    def save(self, dataframe):
+        """
+        Saves a Pandas Dataframe to the file `self.filename`.
+        The file is written to a temporary file first, which then replaces it.
+
+        :param dataframe: a Pandas Dataframe
+        """
+        if self._columns is not None or self._filters is not None:
+            raise PartialLoadError(
+                "{} was loaded with only some columns or rows, so cannot be saved.".format(
+                    self._filename
+                )
+            )
+
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        with atomic_write(self._filename, "wb") as file:
+            self._write_table(table, file)
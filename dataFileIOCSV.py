@@ -2,10 +2,110 @@
 An implementation of DataFileIO for saving and loading CSV files.
 """
 
-from dataFileIO import DataFileIO
+from dataFileIO import DataFileIO, atomic_write, table_to_dataframe
+import hashlib
+import io
+import json
+import os
 from os.path import exists, splitext
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+except ImportError:
+    pa = None
+    pa_feather = None
+
+
+_CATEGORY_UNIQUE_RATIO = 0.5
+_CACHE_FORMAT_VERSION = "2"
+_HASH_BLOCK_SIZE = 1 << 20
+_SCAN_BLOCK_SIZE = 1 << 22
+_NEWLINE = ord("\n")
+_CARRIAGE_RETURN = ord("\r")
+_QUOTE = ord('"')
+
+
+def find_record_offsets(filename, every=1):
+    """
+    Finds the byte offsets of the records (rows) of the csv file `filename`, not including the header.
+    Newlines inside quoted values do not start a new record, and blank lines are skipped.
+    The file is scanned in fixed size blocks, so memory use does not depend on the file size.
+
+    :param filename: The filename of the csv file
+    :param every: (default=1) Only keep the offset of every `every`-th record
+    :type filename: string
+    :type every: int
+    :return: tuple (offsets of every `every`-th record, total number of records)
+    :rtype: (numpy array of ints, int)
+    """
+    offsets = []
+    total_records = -1
+    quote_parity = 0
+    previous_end = -1
+    last_byte = _NEWLINE
+    block_start = 0
+
+    with open(filename, "rb") as file:
+        while True:
+            block = file.read(_SCAN_BLOCK_SIZE)
+            if len(block) == 0:
+                break
+
+            data = np.frombuffer(block, dtype=np.uint8)
+            quote_counts = np.cumsum(data == _QUOTE, dtype=np.int64)
+            newlines = np.flatnonzero(data == _NEWLINE)
+            is_quoted = (quote_parity + quote_counts[newlines]) % 2 == 1
+            record_ends = newlines[~is_quoted]
+
+            record_starts = (
+                np.concatenate([[previous_end - block_start], record_ends[:-1]])[
+                    : len(record_ends)
+                ]
+                + 1
+            )
+            bytes_before_end = np.where(
+                record_ends > 0, data[np.maximum(record_ends - 1, 0)], last_byte
+            )
+            record_lengths = record_ends - record_starts
+            is_blank = (record_lengths == 0) | (
+                (record_lengths == 1) & (bytes_before_end == _CARRIAGE_RETURN)
+            )
+            record_starts = record_starts[~is_blank] + block_start
+
+            if total_records < 0 and len(record_starts) > 0:
+                record_starts = record_starts[1:]
+                total_records = 0
+
+            record_numbers = total_records + np.arange(len(record_starts))
+            offsets.append(record_starts[record_numbers % every == 0])
+            total_records += len(record_starts)
+
+            if len(record_ends) > 0:
+                previous_end = block_start + record_ends[-1]
+            quote_parity = (quote_parity + int(quote_counts[-1])) % 2
+            last_byte = data[-1]
+            block_start += len(data)
+
+    trailing_length = block_start - previous_end - 1
+    if trailing_length > 0 and not (
+        trailing_length == 1 and last_byte == _CARRIAGE_RETURN
+    ):
+        if total_records < 0:
+            total_records = 0
+        elif total_records % every == 0:
+            offsets.append(np.array([previous_end + 1]))
+            total_records += 1
+        else:
+            total_records += 1
+
+    if len(offsets) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+
+    return np.concatenate(offsets).astype(np.int64), max(total_records, 0)
+
 
 class InvalidFileType(Exception):
     """
@@ -15,10 +115,167 @@ class InvalidFileType(Exception):
     pass
 
 
+def infer_column_types(dataframe):
+    """
+    Converts the columns of `dataframe` to more compact dtypes where this does not change
+    any value when it is converted to a string.
+    Integers are downcast, dates (with no time) become datetimes, and text columns with
+    few unique values become categoricals. Other text columns are left as strings.
+
+    :param dataframe: DataFrame as parsed by Pandas' read_csv
+    :type dataframe: Pandas DataFrame
+    :return: DataFrame with the inferred dtypes
+    :rtype: Pandas DataFrame
+    """
+    typed_dataframe = pd.DataFrame(index=dataframe.index)
+
+    for column_name, column in dataframe.items():
+        column_strings = column.astype(str)
+
+        if pd.api.types.is_integer_dtype(column):
+            column = pd.to_numeric(column, downcast="integer")
+        elif column.dtype == object:
+            dates = pd.to_datetime(column, format="%Y-%m-%d", errors="coerce")
+            if dates.notna().all() and (dates.astype(str) == column_strings).all():
+                column = dates
+            elif column.nunique(dropna=False) <= _CATEGORY_UNIQUE_RATIO * len(column):
+                column = column.astype("category")
+            else:
+                column = column_strings
+
+        typed_dataframe[column_name] = column
+
+    return typed_dataframe
+
+
+def _hash_file(filename):
+    """
+    Get a hash of the contents of the file `filename`
+
+    :param filename: The filename of the file to hash
+    :type filename: string
+    :return: hex digest of the contents
+    :rtype: string
+    """
+    file_hash = hashlib.blake2b()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(_HASH_BLOCK_SIZE), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
 class DataFileIOCSV(DataFileIO):
-    def __init__(self, filename):
+    def __init__(self, filename, infer_types=False, use_cache=False):
+        """
+        Create a DataFileIOCSV object.
+
+        :param filename: The filename of the csv file
+        :param infer_types: (default=False) Flag to keep numbers, dates and categoricals in typed columns
+            rather than loading every column as strings
+        :param use_cache: (default=False) Flag to keep a Feather copy of the parsed csv file next to it,
+            which is loaded instead of parsing the csv file while it is unchanged. Needs pyarrow.
+        :type filename: string
+        :type infer_types: boolean
+        :type use_cache: boolean
+        """
         super().__init__()
         self._filename = filename
+        self._infer_types = infer_types
+        self._use_cache = use_cache and pa_feather is not None
+
+    def get_cache_filename(self):
+        """
+        Gets the filename of the Feather cache of the csv file
+
+        :return: cache filename
+        :rtype: string
+        """
+        directory, basename = os.path.split(self._filename)
+        return os.path.join(directory, ".{}.feather".format(basename))
+
+    def _cache_metadata(self):
+        """
+        Get the metadata identifying the current contents of the csv file, for validating the cache
+
+        :return: metadata of the csv file
+        :rtype: dict of bytes to bytes
+        """
+        file_stat = os.stat(self._filename)
+        return {
+            b"cache_format_version": _CACHE_FORMAT_VERSION.encode(),
+            b"infer_types": str(self._infer_types).encode(),
+            b"csv_size": str(file_stat.st_size).encode(),
+            b"csv_mtime_ns": str(file_stat.st_mtime_ns).encode(),
+            b"csv_hash": _hash_file(self._filename).encode(),
+        }
+
+    def _read_cache(self):
+        """
+        Read the cache of the csv file, if it is still valid.
+        The cache is valid when its size matches the csv file, and either its modified time
+        or its content hash match as well.
+
+        :return: (Optional) Arrow Table from the cache if it is valid, otherwise None
+        :rtype: (Optional) pyarrow Table
+        """
+        try:
+            table = pa_feather.read_table(self.get_cache_filename(), memory_map=True)
+        except (OSError, pa.ArrowInvalid):
+            return None
+
+        cached = table.schema.metadata or {}
+        file_stat = os.stat(self._filename)
+
+        if (
+            cached.get(b"cache_format_version") != _CACHE_FORMAT_VERSION.encode()
+            or cached.get(b"infer_types") != str(self._infer_types).encode()
+            or cached.get(b"csv_size") != str(file_stat.st_size).encode()
+        ):
+            return None
+
+        if cached.get(b"csv_mtime_ns") != str(file_stat.st_mtime_ns).encode():
+            if cached.get(b"csv_hash") != _hash_file(self._filename).encode():
+                return None
+
+        return table
+
+    def _load_cache(self):
+        """
+        Load the cache of the csv file, if it is still valid.
+
+        :return: (Optional) Pandas DataFrame from the cache if it is valid, otherwise None
+        :rtype: (Optional) Pandas DataFrame
+        """
+        table = self._read_cache()
+        if table is None:
+            return None
+        return table_to_dataframe(table)
+
+    def _save_cache(self, dataframe, csv_dtypes, metadata):
+        """
+        Save `dataframe` as the cache of the csv file.
+        The cache is only an optimisation, so failing to write it is ignored.
+
+        :param dataframe: The DataFrame parsed from the csv file
+        :param csv_dtypes: The dtypes of the columns as read from the csv file, before they were converted
+        :param metadata: The metadata of the csv file from before it was parsed
+        :type dataframe: Pandas DataFrame
+        :type csv_dtypes: dict of strings to strings
+        :type metadata: dict of bytes to bytes
+        """
+        try:
+            table = pa.Table.from_pandas(dataframe, preserve_index=False)
+            table = table.replace_schema_metadata(
+                {
+                    **table.schema.metadata,
+                    **metadata,
+                    b"csv_dtypes": json.dumps(csv_dtypes).encode(),
+                }
+            )
+            with atomic_write(self.get_cache_filename(), "wb") as file:
+                pa_feather.write_feather(table, file)
+        except (OSError, pa.ArrowException):
+            pass
 
     def load(self):
         """
@@ -33,12 +290,221 @@ class DataFileIOCSV(DataFileIO):
         if splitext(self._filename)[1] != ".csv":
             raise InvalidFileType("Input file {} is not a csv.".format(self._filename))
 
-        return pd.read_csv(self._filename).astype(str)
+        if self._use_cache:
+            dataframe = self._load_cache()
+            if dataframe is not None:
+                return dataframe
+
+            metadata = self._cache_metadata()
+
+        dataframe, csv_dtypes = self._parse()
+
+        if self._use_cache:
+            self._save_cache(dataframe, csv_dtypes, metadata)
+
+        return dataframe
+
+    def _parse(self):
+        """
+        Parse the csv file `self.filename`
+
+        :return: tuple (Pandas DataFrame from the csv file, dtypes of its columns as read from the csv file)
+        :rtype: (Pandas DataFrame, dict of strings to strings)
+        """
+        dataframe = pd.read_csv(self._filename)
+        csv_dtypes = {column: str(dtype) for column, dtype in dataframe.dtypes.items()}
+        return self._convert(dataframe), csv_dtypes
+
+    def _convert(self, dataframe):
+        """
+        Convert the columns of `dataframe`, as read from csv, to the dtypes they are loaded with
+
+        :param dataframe: DataFrame as parsed by Pandas' read_csv
+        :type dataframe: Pandas DataFrame
+        :return: DataFrame with inferred dtypes if `_infer_types`, otherwise with every column as strings
+        :rtype: Pandas DataFrame
+        """
+        if self._infer_types:
+            return infer_column_types(dataframe)
+
+        return dataframe.astype(str)
+
+    def _remove_cache(self):
+        """
+        Remove the cache of the csv file, after the csv file is changed in place.
+        """
+        if self._use_cache and exists(self.get_cache_filename()):
+            os.remove(self.get_cache_filename())
+
+    def _read_written_rows(self, rows_csv, csv_dtypes, overwritten):
+        """
+        Parse rows written to the csv file the way they are parsed as part of the whole file.
+        Returns None if the rows could change the dtype a column is read with,
+        as the other rows of that column would then be parsed differently too.
+
+        :param rows_csv: The csv of the written rows, with a header
+        :param csv_dtypes: The dtypes of the columns as read from the csv file before the rows were written
+        :param overwritten: Flag for if the rows overwrote rows, rather than being appended
+        :type rows_csv: string
+        :type csv_dtypes: dict of strings to strings
+        :type overwritten: boolean
+        :return: (Optional) DataFrame of the rows as read from csv
+        :rtype: (Optional) Pandas DataFrame
+        """
+        try:
+            rows = pd.read_csv(io.StringIO(rows_csv))
+            for column, dtype in csv_dtypes.items():
+                rows_dtype = str(rows[column].dtype)
+                # Appended rows keep the dtype if it is at least as general as theirs,
+                # overwritten rows may have held the only values that needed it
+                if rows_dtype != dtype and (
+                    overwritten
+                    or not (
+                        dtype == "object"
+                        or (dtype == "float64" and rows_dtype == "int64")
+                    )
+                ):
+                    return None
+            return pd.read_csv(io.StringIO(rows_csv), dtype=csv_dtypes)
+        except (KeyError, ValueError):
+            return None
+
+    def _update_cache(self, table, rows_csv, row_numbers=None):
+        """
+        Update the cache of the csv file with the rows just written to it, rather than parsing the whole file.
+        The cache is removed instead if the written rows would change how any other row is parsed.
+
+        :param table: (Optional) The cache from before the rows were written, None if it was not valid
+        :param rows_csv: The csv of the written rows, with a header
+        :param row_numbers: (default=None) The row numbers of the rows overwritten, if None then the rows were appended
+        :type table: (Optional) pyarrow Table
+        :type rows_csv: string
+        :type row_numbers: None or list of ints
+        """
+        if table is None:
+            self._remove_cache()
+            return
+
+        csv_dtypes = json.loads(table.schema.metadata[b"csv_dtypes"])
+        rows = self._read_written_rows(rows_csv, csv_dtypes, row_numbers is not None)
+        if rows is None:
+            self._remove_cache()
+            return
+
+        cached = table_to_dataframe(table)
+        if self._infer_types:
+            # Inferred dtypes depend on every value of a column, so they are inferred again from the values as read
+            for column, dtype in csv_dtypes.items():
+                values = cached[column]
+                if dtype != "object":
+                    cached[column] = values.astype(dtype)
+                elif isinstance(values.dtype, pd.CategoricalDtype):
+                    cached[column] = values.astype(object)
+                elif values.dtype != object:
+                    cached[column] = values.astype(str)
+                else:
+                    # Missing values were written to the cache as "nan", which read_csv never leaves as a string
+                    cached[column] = values.where(values != "nan")
+            rows_of_cache = rows
+        else:
+            rows_of_cache = self._convert(rows)
+
+        if row_numbers is None:
+            cached = pd.concat([cached, rows_of_cache], ignore_index=True)
+        else:
+            for column in cached.columns:
+                values = cached[column].to_numpy(copy=True)
+                values[row_numbers] = rows_of_cache[column].to_numpy()
+                cached[column] = values
+
+        if self._infer_types:
+            cached = self._convert(cached)
+
+        self._save_cache(cached, csv_dtypes, self._cache_metadata())
 
     def save(self, dataframe):
         """
-        Saves a Pandas Dataframe to the csv file `self.filename`
+        Saves a Pandas Dataframe to the csv file `self.filename`.
+        The file is written to a temporary file first, which then replaces it.
+        The cache is refreshed from the saved file, since values can change when written to csv and read back.
 
         :param dataframe: a Pandas Dataframe
         """
-        dataframe.to_csv(self._filename, index=False)
+        with atomic_write(self._filename) as file:
+            dataframe.to_csv(file, index=False)
+
+        if self._use_cache:
+            metadata = self._cache_metadata()
+            self._save_cache(*self._parse(), metadata)
+
+    def append(self, dataframe):
+        """
+        Appends the rows of a Pandas Dataframe to the end of the csv file `self.filename`.
+        The cache is updated with the appended rows, rather than parsing the whole file again.
+
+        :param dataframe: a Pandas Dataframe, with the same columns as the csv file
+        """
+        table = self._read_cache() if self._use_cache else None
+
+        is_missing_newline = False
+        with open(self._filename, "rb") as file:
+            if file.seek(0, os.SEEK_END) > 0:
+                file.seek(-1, os.SEEK_END)
+                is_missing_newline = file.read(1) != b"\n"
+
+        rows_csv = dataframe.to_csv(index=False, header=False)
+        with open(self._filename, "a", newline="") as file:
+            if is_missing_newline:
+                file.write(os.linesep)
+            file.write(rows_csv)
+
+        if self._use_cache:
+            header_csv = dataframe.iloc[:0].to_csv(index=False)
+            self._update_cache(table, header_csv + rows_csv)
+
+    def patch(self, dataframe):
+        """
+        Overwrites rows of the csv file `self.filename` in place, without rewriting the rest of the file.
+        This is only possible if each new row is written with the same number of bytes as the old row,
+        otherwise the file is left unchanged. The cache is updated with the new rows.
+
+        :param dataframe: a Pandas Dataframe of the new rows, indexed by their row number in the file
+        :return: True if the rows were overwritten, False if the file was left unchanged
+        :rtype: boolean
+        """
+        row_offsets, total_rows = find_record_offsets(self._filename)
+        if len(dataframe) == 0:
+            return True
+        if dataframe.index.min() < 0 or dataframe.index.max() >= total_rows:
+            return False
+        row_ends = np.append(row_offsets[1:], os.path.getsize(self._filename))
+
+        patches = []
+        with open(self._filename, "rb") as file:
+            for position, row_number in enumerate(dataframe.index):
+                new_row = (
+                    dataframe.iloc[[position]]
+                    .to_csv(index=False, header=False)
+                    .encode()
+                    .rstrip(b"\r\n")
+                )
+                file.seek(row_offsets[row_number])
+                old_row = file.read(row_ends[row_number] - row_offsets[row_number])
+                if len(new_row) != len(old_row.rstrip(b"\r\n")):
+                    return False
+                patches.append((row_offsets[row_number], new_row))
+
+        table = self._read_cache() if self._use_cache else None
+
+        with open(self._filename, "r+b") as file:
+            for offset, new_row in patches:
+                file.seek(offset)
+                file.write(new_row)
+
+        if self._use_cache:
+            rows_csv = b"\n".join([new_row for _, new_row in patches]).decode()
+            header_csv = dataframe.iloc[:0].to_csv(index=False)
+            self._update_cache(
+                table, header_csv + rows_csv + "\n", list(dataframe.index)
+            )
+        return True
@@ -0,0 +1,228 @@
+"""
+An implementation of DataFileIO for reading CSV files in chunks, for files larger than memory.
+Only a bounded number of chunks are kept in memory at a time.
+"""
+
+from collections import OrderedDict
+from os.path import exists, splitext
+import numpy as np
+import pandas as pd
+from dataFileIO import DataFileIO, atomic_write
+from dataFileIOCSV import InvalidFileType, find_record_offsets
+
+
+class DataFileIOCSVChunked(DataFileIO):
+    """
+    Reads a csv file chunk by chunk, using an index of the byte offset of the first row of each chunk.
+    Values are kept exactly as written in the file, as strings.
+    """
+
+    def __init__(self, filename, chunk_size=100000, max_resident_chunks=4):
+        """
+        Create a DataFileIOCSVChunked object.
+
+        :param filename: The filename of the csv file
+        :param chunk_size: (default=100000) The number of rows in each chunk
+        :param max_resident_chunks: (default=4) The most chunks to keep in memory at a time
+        :type filename: string
+        :type chunk_size: int
+        :type max_resident_chunks: int
+        """
+        super().__init__()
+        self._filename = filename
+        self._chunk_size = chunk_size
+        self._max_resident_chunks = max_resident_chunks
+        self._resident_chunks = OrderedDict()
+        self._columns = None
+        self._chunk_offsets = None
+        self._total_rows = None
+
+    def _build_index(self):
+        """
+        Read the header and find the offset of each chunk in the csv file, if not already done.
+        """
+        if self._chunk_offsets is not None:
+            return
+
+        if not exists(self._filename):
+            raise FileNotFoundError("Could not find {}".format(self._filename))
+
+        if splitext(self._filename)[1] != ".csv":
+            raise InvalidFileType("Input file {} is not a csv.".format(self._filename))
+
+        self._columns = list(pd.read_csv(self._filename, nrows=0).columns)
+        self._index_offsets()
+
+    def _index_offsets(self):
+        """
+        Find the byte offset of the first row of each chunk, and the number of rows.
+        """
+        self._chunk_offsets, self._total_rows = find_record_offsets(
+            self._filename, every=self._chunk_size
+        )
+
+    def get_columns(self):
+        """
+        Get the column names from the header of the csv file
+
+        :return: List of column names
+        :rtype: list of strings
+        """
+        self._build_index()
+        return list(self._columns)
+
+    def get_total_rows(self):
+        """
+        Get the number of rows in the csv file
+
+        :return: number of rows
+        :rtype: int
+        """
+        self._build_index()
+        return self._total_rows
+
+    def get_chunk_size(self):
+        """
+        Get the number of rows in each chunk
+
+        :return: number of rows in a chunk
+        :rtype: int
+        """
+        return self._chunk_size
+
+    def get_total_chunks(self):
+        """
+        Get the number of chunks in the csv file
+
+        :return: number of chunks
+        :rtype: int
+        """
+        self._build_index()
+        return len(self._chunk_offsets)
+
+    def _read_chunk(self, chunk_index):
+        """
+        Read the rows of chunk `chunk_index` from the csv file
+
+        :param chunk_index: The index of the chunk
+        :type chunk_index: int
+        :return: DataFrame of the rows of the chunk
+        :rtype: Pandas DataFrame
+        """
+        first_row = chunk_index * self._chunk_size
+        total_chunk_rows = min(self._chunk_size, self._total_rows - first_row)
+
+        with open(self._filename, "rb") as file:
+            file.seek(self._chunk_offsets[chunk_index])
+            return pd.read_csv(
+                file,
+                header=None,
+                names=self._columns,
+                nrows=total_chunk_rows,
+                dtype=str,
+                keep_default_na=False,
+            )
+
+    def get_chunk(self, chunk_index):
+        """
+        Get the rows of chunk `chunk_index`, reading them from the csv file if they are not in memory.
+        The returned DataFrame is shared with the chunk cache and must not be modified.
+
+        :param chunk_index: The index of the chunk
+        :type chunk_index: int
+        :return: DataFrame of the rows of the chunk, indexed by their row number in the file
+        :rtype: Pandas DataFrame
+        """
+        self._build_index()
+
+        if chunk_index in self._resident_chunks:
+            self._resident_chunks.move_to_end(chunk_index)
+            return self._resident_chunks[chunk_index]
+
+        first_row = chunk_index * self._chunk_size
+        chunk = self._read_chunk(chunk_index)
+        chunk.index = pd.RangeIndex(first_row, first_row + len(chunk))
+
+        self._resident_chunks[chunk_index] = chunk
+        while len(self._resident_chunks) > self._max_resident_chunks:
+            self._resident_chunks.popitem(last=False)
+
+        return chunk
+
+    def get_rows(self, rows):
+        """
+        Get the rows at row numbers `rows`, only reading the chunks they are in
+
+        :param rows: The row numbers in the file, not including the header
+        :type rows: list of ints
+        :return: DataFrame of the rows, indexed by their row number in the file
+        :rtype: Pandas DataFrame
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return pd.DataFrame(columns=self.get_columns(), dtype=str)
+
+        chunk_indices = rows // self._chunk_size
+        parts = [
+            self.get_chunk(chunk_index).loc[
+                np.unique(rows[chunk_indices == chunk_index])
+            ]
+            for chunk_index in np.unique(chunk_indices)
+        ]
+        return pd.concat(parts).loc[rows]
+
+    def iter_chunks(self):
+        """
+        Iterate over the chunks of the csv file in order
+
+        :return: iterator of DataFrames, one per chunk
+        :rtype: iterator of Pandas DataFrames
+        """
+        for chunk_index in range(self.get_total_chunks()):
+            yield self.get_chunk(chunk_index)
+
+    def load(self):
+        """
+        Returns the whole csv file as a single Pandas DataFrame.
+        This needs the whole file to fit in memory, see `iter_chunks()` for reading it in parts.
+
+        :return: Pandas DataFrame of the whole file
+        :rtype: Pandas DataFrame
+        """
+        chunks = list(self.iter_chunks())
+        if len(chunks) == 0:
+            return pd.DataFrame(columns=self.get_columns(), dtype=str)
+        return pd.concat(chunks)
+
+    def save(self, dataframe):
+        """
+        Saves a Pandas Dataframe to the csv file `self.filename`
+
+        :param dataframe: a Pandas Dataframe
+        """
+        self.save_chunks(dataframe.columns, [dataframe])
+
+    def save_chunks(self, columns, chunks):
+        """
+        Saves DataFrames one after the other to the csv file `self.filename`.
+        The rows are written to a temporary file which then replaces the csv file,
+        so `chunks` may be read from the csv file while saving.
+
+        :param columns: The column names for the header
+        :param chunks: The DataFrames to save, in order
+        :type columns: list of strings
+        :type chunks: iterable of Pandas DataFrames
+        """
+        with atomic_write(self._filename) as file:
+            pd.DataFrame(columns=columns).to_csv(file, index=False)
+            for chunk in chunks:
+                chunk.to_csv(file, index=False, header=False)
+            self._release_file()
+
+    def _release_file(self):
+        """
+        Forget everything read from the csv file, so it is read again when next needed.
+        """
+        self._resident_chunks.clear()
+        self._chunk_offsets = None
+        self._total_rows = None
@@ -0,0 +1,207 @@
+"""
+An implementation of DataFileIO for read-mostly CSV files, which memory-maps the file
+and keeps the byte offset of every row, so that rows are only parsed when they are read.
+The mapped file is shared with the OS page cache, so processes reading the same file share its memory.
+The byte offsets can be kept in a file next to the csv file, so they are only found again when the csv file changes.
+"""
+
+from io import BytesIO
+import mmap
+import os
+import numpy as np
+import pandas as pd
+from dataFileIO import atomic_write
+from dataFileIOCSV import find_record_offsets
+from dataFileIOCSVChunked import DataFileIOCSVChunked
+
+_OFFSETS_FORMAT_VERSION = 1
+
+
+class DataFileIOCSVMapped(DataFileIOCSVChunked):
+    """
+    Reads rows of a memory-mapped csv file, using an index of the byte offset of every row.
+    Values are kept exactly as written in the file, as strings.
+    """
+
+    def __init__(
+        self, filename, chunk_size=100000, max_resident_chunks=4, use_cache=False
+    ):
+        """
+        Create a DataFileIOCSVMapped object.
+
+        :param filename: The filename of the csv file
+        :param chunk_size: (default=100000) The number of rows in each chunk, when reading in chunks
+        :param max_resident_chunks: (default=4) The most parsed chunks to keep in memory at a time
+        :param use_cache: (default=False) Flag to keep the byte offsets of the rows in a file next to the csv file,
+            which is loaded instead of scanning the csv file while its size and modified time are unchanged
+        :type filename: string
+        :type chunk_size: int
+        :type max_resident_chunks: int
+        :type use_cache: boolean
+        """
+        super().__init__(
+            filename, chunk_size=chunk_size, max_resident_chunks=max_resident_chunks
+        )
+        self._use_cache = use_cache
+        self._file = None
+        self._mapped_file = None
+        self._row_offsets = None
+
+    def get_cache_filename(self):
+        """
+        Gets the filename of the cache of the byte offsets of the rows of the csv file
+
+        :return: cache filename
+        :rtype: string
+        """
+        directory, basename = os.path.split(self._filename)
+        return os.path.join(directory, ".{}.offsets.npz".format(basename))
+
+    def _load_offsets(self, file_stat):
+        """
+        Load the byte offsets of the rows from the cache, if it is still valid.
+        The cache is valid when the size and modified time of the csv file match it.
+
+        :param file_stat: The stat of the mapped csv file
+        :type file_stat: os.stat_result
+        :return: (Optional) the offsets of each row followed by the size of the file, if the cache is valid
+        :rtype: (Optional) numpy array of ints
+        """
+        try:
+            with np.load(self.get_cache_filename(), allow_pickle=False) as cached:
+                if (
+                    int(cached["format_version"]) != _OFFSETS_FORMAT_VERSION
+                    or int(cached["csv_size"]) != file_stat.st_size
+                    or int(cached["csv_mtime_ns"]) != file_stat.st_mtime_ns
+                ):
+                    return None
+                return cached["row_offsets"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_offsets(self, row_offsets, file_stat):
+        """
+        Save the byte offsets of the rows as the cache.
+        The cache is only an optimisation, so failing to write it is ignored.
+
+        :param row_offsets: The offsets of each row followed by the size of the file
+        :param file_stat: The stat of the mapped csv file
+        :type row_offsets: numpy array of ints
+        :type file_stat: os.stat_result
+        """
+        try:
+            with atomic_write(self.get_cache_filename(), "wb") as file:
+                np.savez(
+                    file,
+                    format_version=_OFFSETS_FORMAT_VERSION,
+                    csv_size=file_stat.st_size,
+                    csv_mtime_ns=file_stat.st_mtime_ns,
+                    row_offsets=row_offsets,
+                )
+        except OSError:
+            pass
+
+    def _index_offsets(self):
+        """
+        Memory-map the csv file and find the byte offset of each row,
+        from the cache if it is valid, otherwise by scanning the file.
+        """
+        self._file = open(self._filename, "rb")
+        self._mapped_file = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        file_stat = os.fstat(self._file.fileno())
+
+        row_offsets = self._load_offsets(file_stat) if self._use_cache else None
+        if row_offsets is None:
+            row_offsets, _ = find_record_offsets(self._filename)
+            offset_type = np.uint32 if len(self._mapped_file) < 2**32 else np.int64
+            row_offsets = np.append(row_offsets, len(self._mapped_file)).astype(
+                offset_type
+            )
+            if self._use_cache:
+                self._save_offsets(row_offsets, file_stat)
+
+        self._row_offsets = row_offsets
+        self._total_rows = len(row_offsets) - 1
+        self._chunk_offsets = row_offsets[:-1][:: self._chunk_size]
+
+    def _parse(self, data):
+        """
+        Parse the bytes of some rows of the csv file
+
+        :param data: The bytes of the rows, each ending with a newline
+        :type data: bytes
+        :return: DataFrame of the rows
+        :rtype: Pandas DataFrame
+        """
+        return pd.read_csv(
+            BytesIO(data),
+            header=None,
+            names=self._columns,
+            dtype=str,
+            keep_default_na=False,
+        )
+
+    def _row_bytes(self, first_row, stop_row):
+        """
+        Get the bytes of rows `first_row` up to (not including) `stop_row`, ending with a newline
+
+        :param first_row: The first row number
+        :param stop_row: The row number after the last row
+        :type first_row: int
+        :type stop_row: int
+        :return: bytes of the rows
+        :rtype: bytes
+        """
+        data = self._mapped_file[
+            int(self._row_offsets[first_row]) : int(self._row_offsets[stop_row])
+        ]
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        return data
+
+    def _read_chunk(self, chunk_index):
+        """
+        Parse the rows of chunk `chunk_index` from the mapped csv file
+
+        :param chunk_index: The index of the chunk
+        :type chunk_index: int
+        :return: DataFrame of the rows of the chunk
+        :rtype: Pandas DataFrame
+        """
+        first_row = chunk_index * self._chunk_size
+        stop_row = min(first_row + self._chunk_size, self._total_rows)
+        return self._parse(self._row_bytes(first_row, stop_row))
+
+    def get_rows(self, rows):
+        """
+        Get the rows at row numbers `rows`, only parsing those rows
+
+        :param rows: The row numbers in the file, not including the header
+        :type rows: list of ints
+        :return: DataFrame of the rows, indexed by their row number in the file
+        :rtype: Pandas DataFrame
+        """
+        self._build_index()
+
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return pd.DataFrame(columns=self._columns, dtype=str)
+
+        unique_rows = np.unique(rows)
+        parsed = self._parse(
+            b"".join(self._row_bytes(row, row + 1) for row in unique_rows)
+        )
+        parsed.index = pd.Index(unique_rows)
+        return parsed.loc[rows]
+
+    def _release_file(self):
+        """
+        Unmap the csv file and forget everything read from it, so it is read again when next needed.
+        """
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+            self._file.close()
+        self._file = None
+        self._mapped_file = None
+        self._row_offsets = None
+        super()._release_file()
@@ -0,0 +1,46 @@
+"""
+An implementation of DataFileIO for saving and loading Parquet files.
+Needs pyarrow.
+"""
+
+from dataFileIOArrow import DataFileIOArrow, _to_filter_expression, pa_parquet
+
+_ROW_GROUP_SIZE = 100000
+
+
+class DataFileIOParquet(DataFileIOArrow):
+    """
+    Saves and loads compressed Parquet files.
+    When loading with filters, row groups whose statistics cannot match are skipped without being read.
+    Column types are kept as they are in the file.
+    """
+
+    EXTENSIONS = [".parquet", ".pq"]
+    FORMAT_NAME = "Parquet"
+
+    def _read_table(self):
+        """
+        Read the file as a pyarrow Table, with only the selected columns and rows
+
+        :return: Table of the file
+        :rtype: pyarrow Table
+        """
+        return pa_parquet.read_table(
+            self._filename,
+            columns=self._columns,
+            filters=_to_filter_expression(self._filters),
+            memory_map=True,
+        )
+
+    def _write_table(self, table, file):
+        """
+        Write the pyarrow Table `table` to `file`
+
+        :param table: The table to write
+        :param file: The file to write to
+        :type table: pyarrow Table
+        :type file: binary file
+        """
+        pa_parquet.write_table(
+            table, file, compression="zstd", row_group_size=_ROW_GROUP_SIZE
+        )
@@ -0,0 +1,407 @@
+"""
+Indexes over the columns of a DataFile's DataFrame, used to speed up searching.
+Indexes store row ids rather than positions, so that removing rows does not
+require rebuilding them.
+Each index keeps its postings as one sorted NumPy array of row ids per key, built in a single vectorized pass.
+Changes after the build are kept in a small log, and once there are too many the index is stale and must be rebuilt.
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+
+_MIN_CHANGES_BEFORE_STALE = 1024
+_TRIGRAM_BUILD_ROWS = 100000
+
+
+def _row_id_type(row_ids):
+    """
+    Get the smallest integer type that holds every id in `row_ids`
+
+    :param row_ids: The row ids
+    :type row_ids: numpy array of ints
+    :return: int32 or int64
+    :rtype: numpy dtype
+    """
+    if len(row_ids) == 0 or row_ids.max() < 2**31:
+        return np.int32
+    return np.int64
+
+
+class _InvertedIndex:
+    """
+    The postings of an index and the log of changes made since they were built.
+    Subclasses define the keys of each value, and how the postings are built and looked up.
+    """
+
+    def __init__(self, values, row_ids):
+        """
+        Create an index of `values`.
+
+        :param values: The values of the column, as strings
+        :param row_ids: The row ids of each value in `values`, in increasing order
+        :type values: Pandas Series or numpy array of strings
+        :type row_ids: numpy array of ints
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        self._total_rows = len(row_ids)
+        self._build(values, row_ids)
+
+        self._added = {}
+        self._removed = set()
+        self._total_changes = 0
+        self._stale = False
+
+    def _set_postings(self, group_of_pair, row_id_of_pair, total_groups):
+        """
+        Store the postings of each group of pairs, with the row ids of each group in increasing order
+
+        :param group_of_pair: The group number of each (group, row id) pair
+        :param row_id_of_pair: The row id of each pair, in increasing order
+        :param total_groups: The number of groups
+        :type group_of_pair: numpy array of ints
+        :type row_id_of_pair: numpy array of ints
+        :type total_groups: int
+        """
+        order = np.argsort(group_of_pair, kind="stable")
+        self._posting_row_ids = row_id_of_pair[order].astype(
+            _row_id_type(row_id_of_pair)
+        )
+        self._posting_starts = np.zeros(total_groups + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(group_of_pair, minlength=total_groups),
+            out=self._posting_starts[1:],
+        )
+
+    def _postings(self, group):
+        """
+        Get the row ids of group `group` when the index was built
+
+        :param group: The group number, -1 if the key was not in the column
+        :type group: int
+        :return: sorted array of row ids
+        :rtype: numpy array of ints
+        """
+        if group < 0:
+            return np.empty(0, dtype=np.int64)
+        return self._posting_row_ids[
+            self._posting_starts[group] : self._posting_starts[group + 1]
+        ].astype(np.int64)
+
+    def _keys_of(self, value):
+        """
+        Get the keys `value` is indexed under
+
+        :param value: The value of a row
+        :type value: string
+        :return: The keys of `value`
+        :rtype: iterable
+        """
+        raise NotImplementedError
+
+    def _apply_changes(self, row_ids, keys):
+        """
+        Apply the logged changes to `row_ids`, the built postings matching all of `keys`
+
+        :param row_ids: sorted array of row ids from the built postings
+        :param keys: The keys the rows must be indexed under
+        :type row_ids: numpy array of ints
+        :type keys: collection
+        :return: sorted array of row ids
+        :rtype: numpy array of ints
+        """
+        if len(self._removed) > 0:
+            removed = np.fromiter(
+                self._removed, dtype=np.int64, count=len(self._removed)
+            )
+            row_ids = row_ids[~np.isin(row_ids, removed)]
+
+        added_sets = [self._added.get(key, set()) for key in keys]
+        added = added_sets[0].intersection(*added_sets[1:])
+        if len(added) > 0:
+            row_ids = np.union1d(
+                row_ids, np.fromiter(added, dtype=np.int64, count=len(added))
+            )
+        return row_ids
+
+    def _log_changes(self, total):
+        """
+        Count `total` changes, and mark the index as stale once there are too many to keep in the log
+
+        :param total: The number of changed rows
+        :type total: int
+        """
+        self._total_changes += total
+        if self._total_changes > max(_MIN_CHANGES_BEFORE_STALE, self._total_rows // 4):
+            self._stale = True
+            self._added = {}
+            self._removed = set()
+
+    def add(self, values, row_ids):
+        """
+        Add the rows `row_ids` with the values `values`
+
+        :param values: The values of the column in the rows, as strings
+        :param row_ids: The ids of the rows
+        :type values: iterable of strings
+        :type row_ids: iterable of ints
+        """
+        self._log_changes(len(row_ids))
+        if self._stale:
+            return
+        for value, row_id in zip(values, row_ids):
+            for key in self._keys_of(value):
+                self._added.setdefault(key, set()).add(int(row_id))
+
+    def remove(self, values, row_ids):
+        """
+        Remove the rows `row_ids`, which have the values `values`
+
+        :param values: The values of the column in the rows, as strings
+        :param row_ids: The ids of the rows
+        :type values: iterable of strings
+        :type row_ids: iterable of ints
+        """
+        self._log_changes(len(row_ids))
+        if self._stale:
+            return
+        for value, row_id in zip(values, row_ids):
+            self._removed.add(int(row_id))
+            for key in self._keys_of(value):
+                added_row_ids = self._added.get(key)
+                if added_row_ids is not None:
+                    added_row_ids.discard(int(row_id))
+
+    def is_stale(self):
+        """
+        Check for if so many rows changed since the index was built that it must be rebuilt
+
+        :return: True if the index must be rebuilt before it is used
+        :rtype: boolean
+        """
+        return self._stale
+
+    def memory_usage(self):
+        """
+        Get an estimate of the memory used by the index, in bytes
+
+        :return: estimated number of bytes
+        :rtype: int
+        """
+        total = self._posting_row_ids.nbytes + self._posting_starts.nbytes
+        total += sys.getsizeof(self._added) + sys.getsizeof(self._removed)
+        for row_ids in self._added.values():
+            total += sys.getsizeof(row_ids)
+        return total
+
+
+class HashIndex(_InvertedIndex):
+    """
+    An inverted index of a single column, mapping each value to the ids of the rows with that value.
+    """
+
+    def _build(self, values, row_ids):
+        """
+        Group the rows by value, with `pd.factorize`
+
+        :param values: The values of the column, as strings
+        :param row_ids: The row ids of each value in `values`, in increasing order
+        :type values: Pandas Series or numpy array of strings
+        :type row_ids: numpy array of ints
+        """
+        codes, values = pd.factorize(np.asarray(values, dtype=object))
+        self._values = pd.Index(values, dtype=object)
+        self._set_postings(codes, row_ids, len(self._values))
+
+    def _keys_of(self, value):
+        return (value,)
+
+    def lookup(self, term):
+        """
+        Get the ids of the rows with value `term`
+
+        :param term: The value to look up
+        :type term: string
+        :return: sorted array of row ids
+        :rtype: numpy array of ints
+        """
+        group = self._values.get_indexer([term])[0]
+        return self._apply_changes(self._postings(group), (term,))
+
+    def count(self, term):
+        """
+        Get the number of rows with value `term`
+
+        :param term: The value to look up
+        :type term: string
+        :return: number of rows
+        :rtype: int
+        """
+        return len(self.lookup(term))
+
+    def memory_usage(self):
+        """
+        Get an estimate of the memory used by the index, in bytes.
+        The values themselves are shared with the column, so only the references to them are counted.
+
+        :return: estimated number of bytes
+        :rtype: int
+        """
+        return super().memory_usage() + self._values.memory_usage(deep=False)
+
+
+def _trigrams(value):
+    """
+    Get the set of all substrings of length 3 of `value`
+
+    :param value: The string to split into trigrams
+    :type value: string
+    :return: set of trigrams
+    :rtype: set of strings
+    """
+    return {value[i : i + 3] for i in range(len(value) - 2)}
+
+
+def _trigram_code(trigram):
+    """
+    Get the number representing `trigram`, from the code points of its characters
+
+    :param trigram: A string of 3 characters
+    :type trigram: string
+    :return: The number of the trigram
+    :rtype: int
+    """
+    return (ord(trigram[0]) << 42) | (ord(trigram[1]) << 21) | ord(trigram[2])
+
+
+def _trigram_pairs(values, row_ids):
+    """
+    Get the code and row id of every trigram of `values`, without looping over the characters in Python
+
+    :param values: The values, as strings
+    :param row_ids: The row id of each value
+    :type values: list of strings
+    :type row_ids: numpy array of ints
+    :return: Tuple of the trigram codes, and the row id of each
+    :rtype: tuple of numpy arrays of ints
+    """
+    lengths = np.fromiter(
+        (len(value) for value in values), dtype=np.int64, count=len(values)
+    )
+    characters = np.frombuffer(
+        "".join(values).encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+    ).astype(np.uint64)
+
+    total_trigrams = np.maximum(lengths - 2, 0)
+    row_of_trigram = np.repeat(np.arange(len(values)), total_trigrams)
+    first_trigram_of_row = np.cumsum(total_trigrams) - total_trigrams
+    positions = (np.cumsum(lengths) - lengths)[row_of_trigram] + (
+        np.arange(len(row_of_trigram)) - first_trigram_of_row[row_of_trigram]
+    )
+
+    codes = (
+        (characters[positions] << np.uint64(42))
+        | (characters[positions + 1] << np.uint64(21))
+        | characters[positions + 2]
+    )
+    return codes, row_ids[row_of_trigram]
+
+
+class TrigramIndex(_InvertedIndex):
+    """
+    An n-gram index of a single column, mapping each trigram to the ids of the rows containing it.
+    Lookups return candidate rows, which must still be checked for the substring.
+    """
+
+    def _build(self, values, row_ids):
+        """
+        Find the trigrams of the rows, a block of rows at a time, and group the rows by trigram
+
+        :param values: The values of the column, as strings
+        :param row_ids: The row ids of each value in `values`, in increasing order
+        :type values: Pandas Series or numpy array of strings
+        :type row_ids: numpy array of ints
+        """
+        values = [
+            value if isinstance(value, str) else str(value)
+            for value in np.asarray(values, dtype=object)
+        ]
+
+        codes = []
+        trigram_row_ids = []
+        for first_row in range(0, len(values), _TRIGRAM_BUILD_ROWS):
+            stop_row = first_row + _TRIGRAM_BUILD_ROWS
+            block_codes, block_row_ids = _trigram_pairs(
+                values[first_row:stop_row], row_ids[first_row:stop_row]
+            )
+            codes.append(block_codes)
+            trigram_row_ids.append(block_row_ids)
+        codes = np.concatenate(codes) if len(codes) > 0 else np.empty(0, np.uint64)
+        trigram_row_ids = (
+            np.concatenate(trigram_row_ids)
+            if len(trigram_row_ids) > 0
+            else np.empty(0, np.int64)
+        )
+
+        # A stable sort keeps the row ids of each trigram in increasing order
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        trigram_row_ids = trigram_row_ids[order]
+
+        # A row containing a trigram more than once is listed once for each, so drop the repeats
+        is_kept = np.ones(len(codes), dtype=bool)
+        is_kept[1:] = (codes[1:] != codes[:-1]) | (
+            trigram_row_ids[1:] != trigram_row_ids[:-1]
+        )
+        codes = codes[is_kept]
+        trigram_row_ids = trigram_row_ids[is_kept]
+
+        is_first = np.ones(len(codes), dtype=bool)
+        is_first[1:] = codes[1:] != codes[:-1]
+        starts = np.flatnonzero(is_first)
+
+        self._trigram_codes = codes[starts]
+        self._posting_starts = np.append(starts, len(codes)).astype(np.int64)
+        self._posting_row_ids = trigram_row_ids.astype(_row_id_type(trigram_row_ids))
+
+    def _keys_of(self, value):
+        return _trigrams(value)
+
+    def lookup(self, term):
+        """
+        Get the ids of the rows that may contain `term`.
+        Returns None if `term` is too short to use the index.
+
+        :param term: The substring to look up
+        :type term: string
+        :return: (Optional) sorted array of candidate row ids
+        :rtype: (Optional) numpy array of ints
+        """
+        term_trigrams = _trigrams(term)
+        if len(term_trigrams) == 0:
+            return None
+
+        codes = np.array(
+            [_trigram_code(trigram) for trigram in term_trigrams], dtype=np.uint64
+        )
+        groups = np.searchsorted(self._trigram_codes, codes)
+        is_found = groups < len(self._trigram_codes)
+        is_found[is_found] = self._trigram_codes[groups[is_found]] == codes[is_found]
+        groups[~is_found] = -1
+
+        postings = sorted((self._postings(group) for group in groups), key=len)
+        row_ids = postings[0]
+        for other_row_ids in postings[1:]:
+            if len(row_ids) == 0:
+                break
+            row_ids = np.intersect1d(row_ids, other_row_ids, assume_unique=True)
+        return self._apply_changes(row_ids, term_trigrams)
+
+    def memory_usage(self):
+        """
+        Get an estimate of the memory used by the index, in bytes
+
+        :return: estimated number of bytes
+        :rtype: int
+        """
+        return super().memory_usage() + self._trigram_codes.nbytes
@@ -0,0 +1,241 @@
+"""
+A write-ahead journal of the changes made to a DataFile, kept next to its source file.
+Changes are written to the journal as they are made, so they can be replayed after a crash,
+and are dropped from the journal once a checkpoint has written them to the source file.
+"""
+
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from dataFileIO import atomic_write
+
+
+class JournalMismatchError(Exception):
+    """
+    Exception for when a source file was changed by something else since its journal was written.
+    """
+
+    pass
+
+
+def _to_json_value(value):
+    """
+    Convert a value that json cannot serialize, for writing to the journal.
+    Values are written the way they compare when searching, so typed columns read them back unchanged.
+
+    :param value: The value to convert
+    :type value: any
+    :return: value that json can serialize
+    :rtype: int, float, string or list
+    """
+    if isinstance(value, (np.ndarray, pd.Series, pd.Index)):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return pd.Series([value]).astype(str).iloc[0]
+
+
+def _file_identity(filename):
+    """
+    Get the size and modified time of `filename`, which change whenever it is rewritten
+
+    :param filename: The filename of the file
+    :type filename: string
+    :return: list [size, modified time in nanoseconds]
+    :rtype: list of ints
+    """
+    file_stat = os.stat(filename)
+    return [file_stat.st_size, file_stat.st_mtime_ns]
+
+
+class DataFileJournal:
+    """
+    The journal of a source file, along with a checkpoint file recording which of its entries
+    are already in the source file.
+    """
+
+    def __init__(self, filename):
+        """
+        Create a DataFileJournal object, for the source file `filename`.
+
+        :param filename: The filename of the source file
+        :type filename: string
+        """
+        directory, basename = os.path.split(filename)
+        self._filename = filename
+        self._journal_filename = os.path.join(directory, ".{}.journal".format(basename))
+        self._checkpoint_filename = os.path.join(
+            directory, ".{}.checkpoint".format(basename)
+        )
+        self._lock = threading.Lock()
+
+        self._checkpoint = self._read_checkpoint()
+        if self._checkpoint is None:
+            self._checkpoint = {"sequence": 0, "identity": _file_identity(filename)}
+            self._write_checkpoint()
+        self._sequence = self._checkpoint["sequence"]
+
+    def get_journal_filename(self):
+        """
+        Gets the filename of the journal
+
+        :return: journal filename
+        :rtype: string
+        """
+        return self._journal_filename
+
+    def _read_checkpoint(self):
+        """
+        Read the checkpoint file, if there is one
+
+        :return: (Optional) the checkpoint, with the last sequence number in the source file and its identity
+        :rtype: (Optional) dict
+        """
+        if not os.path.exists(self._checkpoint_filename):
+            return None
+        with open(self._checkpoint_filename) as file:
+            return json.load(file)
+
+    def _write_checkpoint(self):
+        """
+        Write `_checkpoint` to the checkpoint file
+        """
+        with atomic_write(self._checkpoint_filename) as file:
+            json.dump(self._checkpoint, file)
+
+    def _read_journal(self):
+        """
+        Read every entry of the journal.
+        An incomplete last entry, from a crash while it was written, is ignored.
+
+        :return: List of entries
+        :rtype: list of dicts
+        """
+        if not os.path.exists(self._journal_filename):
+            return []
+
+        with open(self._journal_filename) as file:
+            lines = file.read().split("\n")
+
+        entries = []
+        for line_number, line in enumerate(lines):
+            if line == "":
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                if line_number < len(lines) - 1 and any(lines[line_number + 1 :]):
+                    raise
+        return entries
+
+    def read_entries(self):
+        """
+        Get the entries of the journal that are not yet in the source file, in order.
+        Raises JournalMismatchError if the source file was changed by something other than a checkpoint
+        while there are entries to replay.
+
+        :return: List of entries, each a dict with "operation" and "arguments"
+        :rtype: list of dicts
+        """
+        identity = _file_identity(self._filename)
+        journal_entries = self._read_journal()
+        if identity != self._checkpoint["identity"]:
+            sequence = self._checkpoint.get("pending_sequence")
+            if sequence is None:
+                sequence = self._checkpoint["sequence"]
+                # With nothing to replay, the source was only saved some other way, so it becomes the new baseline
+                if any(entry["sequence"] > sequence for entry in journal_entries):
+                    raise JournalMismatchError(
+                        "{} was changed since its journal {} was written".format(
+                            self._filename, self._journal_filename
+                        )
+                    )
+            self._checkpoint = {"sequence": sequence, "identity": identity}
+            self._write_checkpoint()
+
+        entries = [
+            entry
+            for entry in journal_entries
+            if entry["sequence"] > self._checkpoint["sequence"]
+        ]
+        if len(entries) > 0:
+            self._sequence = entries[-1]["sequence"]
+        return entries
+
+    def append(self, operation, arguments):
+        """
+        Write an entry to the end of the journal, returning once it is on disk.
+
+        :param operation: The name of the DataFile method that made the change
+        :param arguments: The keyword arguments of the method
+        :type operation: string
+        :type arguments: dict
+        """
+        with self._lock:
+            self._sequence += 1
+            line = json.dumps(
+                {
+                    "sequence": self._sequence,
+                    "operation": operation,
+                    "arguments": arguments,
+                },
+                default=_to_json_value,
+            )
+            with open(self._journal_filename, "a") as file:
+                file.write(line + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def get_unsaved_entries(self):
+        """
+        Get the number of entries not yet in the source file
+
+        :return: number of entries
+        :rtype: int
+        """
+        return self._sequence - self._checkpoint["sequence"]
+
+    def begin_checkpoint(self):
+        """
+        Record that the source file is about to be rewritten with every entry written so far.
+        If the rewrite completes but `finish_checkpoint` does not, `read_entries` still skips these entries.
+
+        :return: The sequence number of the last entry in the checkpoint
+        :rtype: int
+        """
+        with self._lock:
+            self._checkpoint["pending_sequence"] = self._sequence
+            self._write_checkpoint()
+            return self._sequence
+
+    def finish_checkpoint(self, sequence):
+        """
+        Record that the source file was rewritten with every entry up to `sequence`,
+        and drop those entries from the journal.
+
+        :param sequence: The sequence number returned by `begin_checkpoint`
+        :type sequence: int
+        """
+        with self._lock:
+            self._checkpoint = {
+                "sequence": sequence,
+                "identity": _file_identity(self._filename),
+            }
+            self._write_checkpoint()
+
+            with atomic_write(self._journal_filename) as file:
+                for entry in self._read_journal():
+                    if entry["sequence"] > sequence:
+                        file.write(json.dumps(entry, default=_to_json_value) + "\n")
+
+    def discard(self):
+        """
+        Drop every entry not yet in the source file, and remove the journal and checkpoint files.
+        """
+        with self._lock:
+            for filename in [self._journal_filename, self._checkpoint_filename]:
+                if os.path.exists(filename):
+                    os.remove(filename)
+            self._sequence = self._checkpoint["sequence"]
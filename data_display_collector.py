@@ -1,15 +1,109 @@
-import displays.ASCII_display, displays.HTML_display
+"""
+A registry of the display plugins, which display Pandas DataFrames.
+Plugins are the modules in the `displays` directory ending in "_display", and any registered under the
+"datafile_displays" entry point group by installed packages. Plugins are found without importing them,
+and each is imported the first time it is used.
+Display functions take a `data_display_rows.RowStream`, see that module for the plugin protocol.
+"""
+
+from importlib import import_module
+from importlib.metadata import entry_points
+import os
+from data_display_rows import adapt_dataframe_display, adapt_rows_display
+
+ENTRY_POINT_GROUP = "datafile_displays"
+
+_DISPLAYS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "displays"
+)
+
+_DISPLAY_SOURCES = {}
+_DISPLAY_FUNCTIONS = {}
+_discovered = False
+
+
+def register_display(name, module_name, function_name="display"):
+    """
+    Register a display plugin, without importing it
+
+    :param name: The name of the display, as shown to the user
+    :param module_name: The name of the module with the display function
+    :param function_name: (default="display") The name of the display function in the module
+    :type name: string
+    :type module_name: string
+    :type function_name: string
+    """
+    _DISPLAY_SOURCES[name] = (module_name, function_name)
+    _DISPLAY_FUNCTIONS.pop(name, None)
+
+
+def _discover_displays():
+    """
+    Register the display plugins in the `displays` directory and from entry points, the first time it is called
+    """
+    global _discovered
+    if _discovered:
+        return
+    _discovered = True
+
+    for filename in sorted(os.listdir(_DISPLAYS_DIRECTORY)):
+        name, extension = os.path.splitext(filename)
+        if extension == ".py" and name.endswith("_display"):
+            register_display(name, "displays." + name)
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        register_display(entry_point.name, entry_point.module, entry_point.attr)
+
+
+def get_display_names():
+    """
+    Get the names of the display plugins, without importing them
+
+    :return: List of display names
+    :rtype: list of strings
+    """
+    _discover_displays()
+    return list(_DISPLAY_SOURCES)
+
+
+def get_display(name):
+    """
+    Get the display function of the display plugin `name`, importing it if it is not already imported.
+    Plugins with a `display_rows` function are given rows as they are read,
+    other plugins are adapted to be given every row at once by their `display` function.
+    Every display function returned takes an `input_stream`, which plugins that do not ask for input ignore.
+
+    :param name: The name of the display
+    :type name: string
+    :return: The display function, which takes a RowStream, a function to pass output to and a function to ask for input
+    :rtype: function
+    """
+    _discover_displays()
+    if name not in _DISPLAY_FUNCTIONS:
+        module_name, function_name = _DISPLAY_SOURCES[name]
+        module = import_module(module_name)
+        if function_name == "display" and hasattr(module, "display_rows"):
+            function_name = "display_rows"
+
+        if function_name == "display_rows":
+            _DISPLAY_FUNCTIONS[name] = adapt_rows_display(module.display_rows)
+        else:
+            _DISPLAY_FUNCTIONS[name] = adapt_dataframe_display(
+                getattr(module, function_name)
+            )
+    return _DISPLAY_FUNCTIONS[name]
 
 
 def get_displays():
     """
-    Returns a list of python modules that are able to display Pandas DataFrames
+    Returns a list of python modules that are able to display Pandas DataFrames.
+    Imports every display plugin, use `get_display_names` and `get_display` to only import the ones used.
 
     :return: list of modules that are able to display DataFrames
     :rtype: list of python modules
     """
-    return [displays.ASCII_display, displays.HTML_display]
+    return [import_module(_DISPLAY_SOURCES[name][0]) for name in get_display_names()]
 
 
 if __name__ == "__main__":
-    print(get_displays())
+    print(get_display_names())
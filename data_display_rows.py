@@ -0,0 +1,229 @@
+"""
+The rows given to display plugins. Rows are read lazily in chunks, so displaying costs only as much
+as the plugin shows, rather than the size of the DataFile.
+
+Display plugins take a RowStream by defining `display_rows(rows, output_stream)`.
+Plugins that only define `display(dataframe, output_stream)` are adapted with `adapt_dataframe_display`.
+Interactive plugins also take an `input_stream` argument, a function that asks the user for input,
+plugins without it are adapted to ignore it, so every display function can be called the same way.
+"""
+
+import inspect
+import pandas as pd
+
+_CHUNK_ROWS = 10000
+
+
+class RowStream:
+    """
+    A single pass over the rows of a table, in chunks, along with its columns and (optionally) its number of rows.
+    """
+
+    def __init__(self, columns, chunks, length_hint=None, dtypes=None):
+        """
+        Create a RowStream object.
+
+        :param columns: The column names
+        :param chunks: The rows, as DataFrames with the columns `columns`, read when they are needed
+        :param length_hint: (default=None) The number of rows, if known
+        :param dtypes: (default=None) The dtype of each column, if known
+        :type columns: list of strings
+        :type chunks: iterable of Pandas DataFrames
+        :type length_hint: None or int
+        :type dtypes: None or dict of strings to dtypes
+        """
+        self._columns = list(columns)
+        self._chunks = iter(chunks)
+        self._length_hint = length_hint
+        self._dtypes = None if dtypes is None else dict(dtypes)
+        self._snapshot = None
+
+    @classmethod
+    def from_dataframe(cls, dataframe, chunk_rows=_CHUNK_ROWS, reindex=False):
+        """
+        Create a RowStream of the rows of `dataframe`, without copying them
+
+        :param dataframe: The DataFrame of the rows
+        :param chunk_rows: (default=10000) The number of rows in each chunk
+        :param reindex: (default=False) Flag to index the rows by their position in `dataframe`
+        :type dataframe: Pandas DataFrame
+        :type chunk_rows: int
+        :type reindex: boolean
+        :return: RowStream of `dataframe`
+        :rtype: RowStream
+        """
+
+        def chunks():
+            for first_row in range(0, len(dataframe), chunk_rows):
+                chunk = dataframe.iloc[first_row : first_row + chunk_rows]
+                if reindex:
+                    chunk = chunk.set_axis(
+                        pd.RangeIndex(first_row, first_row + len(chunk)), axis=0
+                    )
+                yield chunk
+
+        return cls(
+            dataframe.columns,
+            chunks(),
+            length_hint=len(dataframe),
+            dtypes=dataframe.dtypes.to_dict(),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot, chunk_rows=_CHUNK_ROWS):
+        """
+        Create a RowStream of the rows of a DataFileSnapshot, without copying them.
+        Displays that keep the rows after returning can hold the snapshot, see `get_snapshot`.
+
+        :param snapshot: The snapshot of the rows
+        :param chunk_rows: (default=10000) The number of rows in each chunk
+        :type snapshot: DataFileSnapshot
+        :type chunk_rows: int
+        :return: RowStream of `snapshot`
+        :rtype: RowStream
+        """
+        rows = cls.from_dataframe(snapshot.view(), chunk_rows=chunk_rows)
+        rows._snapshot = snapshot
+        return rows
+
+    def get_columns(self):
+        """
+        Get the column names
+
+        :return: List of column names
+        :rtype: list of strings
+        """
+        return self._columns
+
+    def get_dtypes(self):
+        """
+        Get the dtype of each column, if they are known, so the rows can be formatted before they are read
+
+        :return: (Optional) dict of column name to dtype
+        :rtype: (Optional) dict
+        """
+        return self._dtypes
+
+    def get_snapshot(self):
+        """
+        Get the snapshot the rows are from, if they are every row of a DataFile.
+        While a snapshot is held, its DataFile copies its rows before changing them rather than changing the snapshot,
+        so holding it is cheaper than copying the rows.
+
+        :return: (Optional) the snapshot of the rows
+        :rtype: (Optional) DataFileSnapshot
+        """
+        return self._snapshot
+
+    def get_length_hint(self):
+        """
+        Get the number of rows, if it is known
+
+        :return: (Optional) number of rows
+        :rtype: (Optional) int
+        """
+        return self._length_hint
+
+    def iter_chunks(self, chunk_rows=None):
+        """
+        Iterate over the rows not yet read, in chunks
+
+        :param chunk_rows: (default=None) The number of rows in each chunk (except the last), if None chunks are left as they are
+        :type chunk_rows: None or int
+        :return: iterator of DataFrames
+        :rtype: iterator of Pandas DataFrames
+        """
+        if chunk_rows is None:
+            yield from self._chunks
+            return
+
+        pending = []
+        total_pending = 0
+        for chunk in self._chunks:
+            while len(chunk) > 0:
+                needed_rows = chunk_rows - total_pending
+                pending.append(chunk.iloc[:needed_rows])
+                total_pending += len(pending[-1])
+                chunk = chunk.iloc[needed_rows:]
+                if total_pending == chunk_rows:
+                    yield pd.concat(pending) if len(pending) > 1 else pending[0]
+                    pending = []
+                    total_pending = 0
+
+        if total_pending > 0:
+            yield pd.concat(pending) if len(pending) > 1 else pending[0]
+
+    def to_dataframe(self):
+        """
+        Read the rows not yet read into a single DataFrame
+
+        :return: DataFrame of the rows
+        :rtype: Pandas DataFrame
+        """
+        chunks = list(self.iter_chunks())
+        if len(chunks) == 0:
+            dataframe = pd.DataFrame(columns=self._columns)
+            if self._dtypes is not None:
+                dataframe = dataframe.astype(self._dtypes)
+            return dataframe
+        return pd.concat(chunks)
+
+
+def accepts_input_stream(display):
+    """
+    Check if the display function `display` takes an `input_stream` argument
+
+    :param display: The display function
+    :type display: function
+    :return: True if `display` can be given `input_stream`
+    :rtype: boolean
+    """
+    try:
+        parameters = inspect.signature(display).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        parameter.name == "input_stream" or parameter.kind == parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+def adapt_rows_display(display_rows):
+    """
+    Adapt a display function that takes a RowStream to take an `input_stream` argument, if it does not already
+
+    :param display_rows: The display function, taking a RowStream and a function to pass output to
+    :type display_rows: function
+    :return: The display function, taking a RowStream, a function to pass output to and a function to ask for input
+    :rtype: function
+    """
+    if accepts_input_stream(display_rows):
+        return display_rows
+
+    def display_rows_with_input(rows, output_stream=print, input_stream=input):
+        display_rows(rows, output_stream)
+
+    return display_rows_with_input
+
+
+def adapt_dataframe_display(display):
+    """
+    Adapt a display function that takes a whole DataFrame to take a RowStream instead.
+    The adapted function reads every row before displaying them.
+
+    :param display: The display function, taking a DataFrame and a function to pass output to
+    :type display: function
+    :return: The display function, taking a RowStream, a function to pass output to and a function to ask for input
+    :rtype: function
+    """
+    if accepts_input_stream(display):
+
+        def display_rows(rows, output_stream=print, input_stream=input):
+            display(rows.to_dataframe(), output_stream, input_stream=input_stream)
+
+    else:
+
+        def display_rows(rows, output_stream=print, input_stream=input):
+            display(rows.to_dataframe(), output_stream)
+
+    return display_rows
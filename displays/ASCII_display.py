@@ -1,19 +1,312 @@
 """
 ASCII_display
 
-A simple ASCII display of the DataFrame
+A paged ASCII display of the DataFrame, which only reads and formats the rows that fit in the terminal
 """
 
+from bisect import bisect_right
+import shutil
+import numpy as np
 import pandas as pd
+from data_display_rows import RowStream
 
+_SAMPLE_ROWS = 1000
+_MAX_COLUMN_WIDTH = 40
+_RESERVED_LINES = 4
+_NAVIGATION_PROMPT = '"n" next, "p" previous, "j <row>" jump to row, "q" quit: '
 
-def display(dataframe, output_stream=print):
+
+def get_page_rows():
+    """
+    Get the number of rows that fit in the terminal, leaving room for the header and navigation prompt
+
+    :return: number of rows in a page
+    :rtype: int
+    """
+    return max(shutil.get_terminal_size().lines - _RESERVED_LINES, 1)
+
+
+def _to_strings(values):
+    """
+    Get `values` as they are shown in the display
+
+    :param values: The values to convert
+    :type values: Pandas Series or Index
+    :return: List of strings
+    :rtype: list of strings
+    """
+    return [str(value) for value in values]
+
+
+def get_column_widths(dataframe, sample_rows=_SAMPLE_ROWS):
+    """
+    Get the width of the index and each column of `dataframe`, from the widest value in a sample of its rows.
+    The sample is spread evenly through `dataframe`, so the cost does not depend on its length.
+
+    :param dataframe: the Pandas DataFrame to display
+    :param sample_rows: (default=1000) The number of rows to sample
+    :type dataframe: Pandas DataFrame
+    :type sample_rows: int
+    :return: List of widths, the first for the index and then one for each column
+    :rtype: list of ints
+    """
+    if len(dataframe) > sample_rows:
+        sample = dataframe.iloc[
+            np.linspace(0, len(dataframe) - 1, sample_rows).astype(np.int64)
+        ]
+    else:
+        sample = dataframe
+
+    values_list = [sample.index] + [sample.iloc[:, i] for i in range(sample.shape[1])]
+    headers = [""] + _to_strings(dataframe.columns)
+
+    return [
+        min(
+            max([len(header)] + [len(value) for value in _to_strings(values)]),
+            _MAX_COLUMN_WIDTH,
+        )
+        for header, values in zip(headers, values_list)
+    ]
+
+
+def _fit(value, width):
+    """
+    Right-align `value` to `width`, cutting it short if it is wider
+
+    :param value: The value to fit
+    :param width: The width to fit it to
+    :type value: string
+    :type width: int
+    :return: `value` exactly `width` characters wide
+    :rtype: string
+    """
+    if len(value) > width:
+        value = value[: max(width - 3, 0)] + "..."[:width]
+    return value.rjust(width)
+
+
+def _format_rows(page, first_row, column_widths, total_rows):
+    """
+    Format the rows of `page` as an ASCII table
+
+    :param page: The rows to format
+    :param first_row: The position of the first row of `page`
+    :param column_widths: The widths from `get_column_widths`
+    :param total_rows: The number of rows in the whole table, if known
+    :type page: Pandas DataFrame
+    :type first_row: int
+    :type column_widths: list of ints
+    :type total_rows: None or int
+    :return: the page as an ASCII table, followed by the range of rows shown
+    :rtype: string
+    """
+    columns = [_to_strings(page.index)] + [
+        _to_strings(page.iloc[:, i]) for i in range(page.shape[1])
+    ]
+    headers = [""] + _to_strings(page.columns)
+
+    lines = [
+        "  ".join(_fit(header, width) for header, width in zip(headers, column_widths))
+    ]
+    for row in range(len(page)):
+        lines.append(
+            "  ".join(
+                _fit(values[row], width)
+                for values, width in zip(columns, column_widths)
+            )
+        )
+
+    if len(page) == 0:
+        lines.append("\nNo rows to show")
+    elif total_rows is None:
+        lines.append("\nRows {} to {}".format(first_row + 1, first_row + len(page)))
+    else:
+        lines.append(
+            "\nRows {} to {} of {}".format(
+                first_row + 1, first_row + len(page), total_rows
+            )
+        )
+    return "\n".join(lines)
+
+
+def format_page(
+    dataframe, first_row=0, page_rows=None, column_widths=None, total_rows=None
+):
+    """
+    Format the rows of `dataframe` from position `first_row` that fit in a page, as an ASCII table.
+    Only those rows are formatted.
+
+    :param dataframe: the Pandas DataFrame to display
+    :param first_row: (default=0) The position of the first row of the page
+    :param page_rows: (default=None) The number of rows in a page, if None the rows that fit in the terminal
+    :param column_widths: (default=None) The widths from `get_column_widths`, if None they are computed
+    :param total_rows: (default=None) The number of rows in the whole table when `dataframe` is only its first rows,
+        if None the number of rows of `dataframe`
+    :type dataframe: Pandas DataFrame
+    :type first_row: int
+    :type page_rows: None or int
+    :type column_widths: None or list of ints
+    :type total_rows: None or int
+    :return: the page as an ASCII table, followed by the range of rows shown
+    :rtype: string
+    """
+    if page_rows is None:
+        page_rows = get_page_rows()
+    if column_widths is None:
+        column_widths = get_column_widths(dataframe)
+    if total_rows is None:
+        total_rows = len(dataframe)
+
+    return _format_rows(
+        dataframe.iloc[first_row : first_row + page_rows],
+        first_row,
+        column_widths,
+        total_rows,
+    )
+
+
+class _RowBuffer:
+    """
+    The rows read so far from a RowStream, which only reads further when later rows are needed
+    """
+
+    def __init__(self, rows):
+        """
+        Create a _RowBuffer object.
+
+        :param rows: The rows to read
+        :type rows: RowStream
+        """
+        self._columns = rows.get_columns()
+        self._unread_chunks = rows.iter_chunks()
+        self._chunks = []
+        self._chunk_starts = []
+        self._total_rows = 0
+        self._exhausted = False
+
+    def read_until(self, total_rows):
+        """
+        Read chunks until at least `total_rows` rows are read, or there are no rows left
+
+        :param total_rows: The number of rows needed
+        :type total_rows: int
+        :return: number of rows read
+        :rtype: int
+        """
+        while self._total_rows < total_rows and not self._exhausted:
+            chunk = next(self._unread_chunks, None)
+            if chunk is None:
+                self._exhausted = True
+            elif len(chunk) > 0:
+                self._chunk_starts.append(self._total_rows)
+                self._chunks.append(chunk)
+                self._total_rows += len(chunk)
+        return self._total_rows
+
+    def is_exhausted(self):
+        """
+        Check for if every row has been read
+
+        :return: Flag whether there are no rows left
+        :rtype: boolean
+        """
+        return self._exhausted
+
+    def get_rows(self, first_row, stop_row):
+        """
+        Get the rows at positions `first_row` up to (not including) `stop_row`, reading them if needed
+
+        :param first_row: The position of the first row
+        :param stop_row: The position after the last row
+        :type first_row: int
+        :type stop_row: int
+        :return: DataFrame of the rows, fewer if there are not enough rows
+        :rtype: Pandas DataFrame
+        """
+        stop_row = min(stop_row, self.read_until(stop_row))
+        if first_row >= stop_row:
+            return pd.DataFrame(columns=self._columns)
+
+        slices = []
+        chunk_index = bisect_right(self._chunk_starts, first_row) - 1
+        while (
+            chunk_index < len(self._chunks)
+            and self._chunk_starts[chunk_index] < stop_row
+        ):
+            chunk_start = self._chunk_starts[chunk_index]
+            slices.append(
+                self._chunks[chunk_index].iloc[
+                    max(first_row - chunk_start, 0) : stop_row - chunk_start
+                ]
+            )
+            chunk_index += 1
+        return pd.concat(slices) if len(slices) > 1 else slices[0]
+
+
+def display_rows(rows, output_stream=print, input_stream=input, page_rows=None):
+    """
+    Pass `rows` through `output_stream` one page at a time, only reading rows as pages need them.
+    If they do not fit in one page, asks through `input_stream` to go to the next or previous page,
+    jump to a row or quit.
+    Column widths are found from the rows read for the first page.
+
+    :param rows: the rows to display
+    :param output_stream: Function to pass each page of `rows`
+    :param input_stream: (default=input) Function to ask the user how to navigate the pages
+    :param page_rows: (default=None) The number of rows in a page, if None the rows that fit in the terminal
+    :type rows: RowStream
+    :type output_stream: function that takes in a string
+    :type input_stream: function that takes in a string and returns a string
+    :type page_rows: None or int
+    """
+    if page_rows is None:
+        page_rows = get_page_rows()
+    row_buffer = _RowBuffer(rows)
+    column_widths = get_column_widths(
+        row_buffer.get_rows(0, min(row_buffer.read_until(page_rows), _SAMPLE_ROWS))
+    )
+
+    first_row = 0
+    while True:
+        page = row_buffer.get_rows(first_row, first_row + page_rows)
+        row_buffer.read_until(first_row + page_rows + 1)
+        total_rows = rows.get_length_hint()
+        if row_buffer.is_exhausted():
+            total_rows = row_buffer.read_until(0)
+
+        output_stream(_format_rows(page, first_row, column_widths, total_rows))
+        if row_buffer.is_exhausted() and row_buffer.read_until(0) <= page_rows:
+            return
+
+        command = input_stream(_NAVIGATION_PROMPT).strip().lower()
+        if command in ["", "n"]:
+            first_row += page_rows
+        elif command == "p":
+            first_row = max(first_row - page_rows, 0)
+        elif command.startswith("j") and command[1:].strip().isnumeric():
+            first_row = max(int(command[1:].strip()) - 1, 0)
+        elif command == "q":
+            return
+
+        total_read = row_buffer.read_until(first_row + page_rows)
+        if row_buffer.is_exhausted():
+            first_row = min(first_row, max(total_read - page_rows, 0))
+
+
+def display(dataframe, output_stream=print, input_stream=input, page_rows=None):
     """
-    Pass the string version of `dataframe` through the `output_method`
+    Pass `dataframe` through `output_stream` one page at a time, see `display_rows`.
+    Kept for callers with a whole DataFrame.
 
     :param dataframe: the Pandas DataFrame to display
-    :param output_stream: Function to pass the string version of `dataframe`
+    :param output_stream: Function to pass each page of `dataframe`
+    :param input_stream: (default=input) Function to ask the user how to navigate the pages
+    :param page_rows: (default=None) The number of rows in a page, if None the rows that fit in the terminal
     :type dataframe: Pandas DataFrame
     :type output_stream: function that takes in a string
+    :type input_stream: function that takes in a string and returns a string
+    :type page_rows: None or int
     """
-    output_stream(dataframe.to_string())
+    display_rows(
+        RowStream.from_dataframe(dataframe), output_stream, input_stream, page_rows
+    )
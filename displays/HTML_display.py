@@ -1,23 +1,200 @@
 """
 HTML_display
 
-Open the DataFrame as a HTML table in the default browser, and in a new tab if possible
+Open the DataFrame as a HTML table in the default browser, and in a new tab if possible.
+Rows are written to the page in blocks of JSON, and the page only renders the rows scrolled into view,
+so large DataFrames are written with bounded memory and open quickly.
 """
 
 import webbrowser
 from os import mkdir, path
 import datetime
+import html
+import json
+from data_display_rows import RowStream
+
+_BLOCK_ROWS = 1000
+
+_PAGE_START = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+#viewport {{ height: 85vh; overflow: auto; position: relative; border: 1px solid #ccc; }}
+#table {{ position: absolute; top: 0; left: 0; border-collapse: collapse; }}
+#table th, #table td {{ height: 24px; padding: 0 8px; white-space: nowrap; border-bottom: 1px solid #eee; text-align: right; }}
+#table th {{ background: #f4f4f4; }}
+</style>
+</head>
+<body>
+<p id="total_rows"></p>
+<div id="viewport"><div id="spacer"></div><table id="table"><thead></thead><tbody></tbody></table></div>
+<script>
+const columns = {columns};
+let totalRows = {total_rows};
+const blockRows = {block_rows};
+const rowHeight = 24;
+const maxParsedBlocks = 8;
+const blocks = document.getElementsByClassName("rows");
+const parsedBlocks = new Map();
+const viewport = document.getElementById("viewport");
+const table = document.getElementById("table");
+
+function getRow(row) {{
+    const blockIndex = Math.floor(row / blockRows);
+    if (!parsedBlocks.has(blockIndex)) {{
+        if (blockIndex >= blocks.length) {{
+            return null;
+        }}
+        if (parsedBlocks.size >= maxParsedBlocks) {{
+            parsedBlocks.delete(parsedBlocks.keys().next().value);
+        }}
+        parsedBlocks.set(blockIndex, JSON.parse(blocks[blockIndex].textContent));
+    }}
+    return parsedBlocks.get(blockIndex)[row % blockRows];
+}}
+
+function render() {{
+    const firstRow = Math.floor(viewport.scrollTop / rowHeight);
+    const stopRow = Math.min(firstRow + Math.ceil(viewport.clientHeight / rowHeight), totalRows);
+    const body = document.createElement("tbody");
+    for (let row = firstRow; row < stopRow; row++) {{
+        const values = getRow(row);
+        if (values === null) {{
+            break;
+        }}
+        const tableRow = body.insertRow();
+        for (const value of values) {{
+            tableRow.insertCell().textContent = value;
+        }}
+    }}
+    table.replaceChild(body, table.tBodies[0]);
+    table.style.top = viewport.scrollTop + "px";
+}}
+
+function setTotalRows(rows) {{
+    totalRows = rows;
+    document.getElementById("total_rows").textContent = rows + " rows";
+    document.getElementById("spacer").style.height = (rows + 1) * rowHeight + "px";
+    render();
+}}
+
+const header = table.tHead.insertRow();
+for (const column of [""].concat(columns)) {{
+    const cell = document.createElement("th");
+    cell.textContent = column;
+    header.appendChild(cell);
+}}
+setTotalRows(totalRows);
+viewport.addEventListener("scroll", () => window.requestAnimationFrame(render));
+document.addEventListener("DOMContentLoaded", render);
+</script>
+"""
+
+_PAGE_END = """</body>
+</html>
+"""
+
+
+def _to_script_json(value):
+    """
+    Get `value` as JSON that can be placed inside a script element
+
+    :param value: The value to convert
+    :type value: list
+    :return: JSON of `value`
+    :rtype: string
+    """
+    return json.dumps(value).replace("<", "\\u003c")
+
+
+def write_rows_html(rows, filename, block_rows=_BLOCK_ROWS):
+    """
+    Write `rows` to `filename` as a HTML page with a scrolling table.
+    Rows are read, converted and written `block_rows` at a time,
+    and the table is shown as soon as the first block is loaded.
+
+    :param rows: the rows to write
+    :param filename: The filename of the HTML file
+    :param block_rows: (default=1000) The number of rows in each block
+    :type rows: RowStream
+    :type filename: string
+    :type block_rows: int
+    """
+    length_hint = rows.get_length_hint()
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(
+            _PAGE_START.format(
+                title=html.escape(path.basename(filename)),
+                columns=_to_script_json([str(column) for column in rows.get_columns()]),
+                total_rows=0 if length_hint is None else length_hint,
+                block_rows=block_rows,
+            )
+        )
+
+        total_rows = 0
+        for block in rows.iter_chunks(block_rows):
+            block_values = [
+                [str(label)] + values
+                for label, values in zip(block.index, block.astype(str).values.tolist())
+            ]
+            file.write(
+                '<script type="application/json" class="rows">{}</script>\n'.format(
+                    _to_script_json(block_values)
+                )
+            )
+            if total_rows == 0:
+                file.write(
+                    "<script>setTotalRows({});</script>\n".format(
+                        max(length_hint or 0, len(block))
+                    )
+                )
+            total_rows += len(block)
+
+        file.write("<script>setTotalRows({});</script>\n".format(total_rows))
+        file.write(_PAGE_END)
+
+
+def write_html(dataframe, filename, block_rows=_BLOCK_ROWS):
+    """
+    Write `dataframe` to `filename` as a HTML page with a scrolling table, see `write_rows_html`.
+
+    :param dataframe: the Pandas DataFrame to write
+    :param filename: The filename of the HTML file
+    :param block_rows: (default=1000) The number of rows in each block
+    :type dataframe: Pandas DataFrame
+    :type filename: string
+    :type block_rows: int
+    """
+    write_rows_html(
+        RowStream.from_dataframe(dataframe, chunk_rows=block_rows), filename, block_rows
+    )
 
 
 def display(dataframe, output_stream=print):
     """
-    Open `dataframe` as a HTML Table in the current browser
+    Open `dataframe` as a HTML Table in the current browser, see `display_rows`.
+    Kept for callers with a whole DataFrame.
 
     :param dataframe: the Pandas DataFrame to display
     :param output_stream: Function to pass the string version of `dataframe`
     :type dataframe: Pandas DataFrame
     :type output_stream: function that takes in a string
     """
+    display_rows(RowStream.from_dataframe(dataframe), output_stream)
+
+
+def display_rows(rows, output_stream=print):
+    """
+    Open `rows` as a HTML Table in the current browser
+
+    :param rows: the rows to display
+    :param output_stream: Function to pass messages about the display
+    :type rows: RowStream
+    :type output_stream: function that takes in a string
+    """
     output_dir = "output_displays"
 
     try:
@@ -31,7 +208,7 @@ def display(dataframe, output_stream=print):
         )
 
         try:
-            dataframe.to_html(filename)
+            write_rows_html(rows, filename)
             output_stream("Opening {} in browser...".format(filename))
             try:
                 webbrowser.open(path.abspath(filename), new=2)
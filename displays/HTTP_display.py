@@ -0,0 +1,324 @@
+"""
+HTTP_display
+
+Serve the DataFrame from a local HTTP server and open it in the default browser, in a new tab if possible.
+Rows are fetched by the page one page at a time, so nothing is written to disk.
+Every row of a DataFile is served from its snapshot rather than a copy, and displaying it again
+while it is unchanged serves the same result.
+"""
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import json
+import re
+import threading
+import webbrowser
+
+_HOST = "127.0.0.1"
+_PAGE_ROWS = 100
+_MAX_RESULTS = 4
+_MAX_CACHED_PAGES = 64
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>DataFile display</title>
+<style>
+body { font-family: sans-serif; margin: 1em; }
+table { border-collapse: collapse; }
+th, td { padding: 2px 8px; white-space: nowrap; border-bottom: 1px solid #eee; text-align: right; }
+th { background: #f4f4f4; }
+</style>
+</head>
+<body>
+<p>
+<button id="previous">Previous</button>
+Page <input id="page" type="number" min="1" value="1" style="width: 6em"> of <span id="total_pages"></span>
+<button id="next">Next</button>
+<span id="total_rows"></span>
+</p>
+<table id="table"><thead></thead><tbody></tbody></table>
+<script>
+const version = new URLSearchParams(window.location.search).get("version");
+const table = document.getElementById("table");
+const pageInput = document.getElementById("page");
+let result = null;
+
+async function fetchJSON(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(await response.text());
+    }
+    return response.json();
+}
+
+async function showPage(page) {
+    page = Math.min(Math.max(page, 1), result.total_pages);
+    const rows = (await fetchJSON("/results/" + version + "/pages/" + (page - 1))).rows;
+    const body = document.createElement("tbody");
+    for (const values of rows) {
+        const tableRow = body.insertRow();
+        for (const value of values) {
+            tableRow.insertCell().textContent = value;
+        }
+    }
+    table.replaceChild(body, table.tBodies[0]);
+    pageInput.value = page;
+}
+
+async function start() {
+    try {
+        result = await fetchJSON("/results/" + version);
+    } catch (error) {
+        document.body.textContent = error.message;
+        return;
+    }
+    const header = table.tHead.insertRow();
+    for (const column of [""].concat(result.columns)) {
+        const cell = document.createElement("th");
+        cell.textContent = column;
+        header.appendChild(cell);
+    }
+    document.getElementById("total_pages").textContent = result.total_pages;
+    document.getElementById("total_rows").textContent = "(" + result.total_rows + " rows)";
+    document.getElementById("previous").onclick = () => showPage(Number(pageInput.value) - 1);
+    document.getElementById("next").onclick = () => showPage(Number(pageInput.value) + 1);
+    pageInput.onchange = () => showPage(Number(pageInput.value));
+    showPage(1);
+}
+
+start();
+</script>
+</body>
+</html>
+"""
+
+_server = None
+_lock = threading.Lock()
+_results = OrderedDict()
+_pages = OrderedDict()
+_next_version = 1
+
+
+def _add_result(dataframe, snapshot=None):
+    """
+    Keep `dataframe` to be served, dropping the oldest result if there are too many.
+    A result of `snapshot` that is already kept is served again instead.
+
+    :param dataframe: the Pandas DataFrame to serve
+    :param snapshot: (default=None) The DataFileSnapshot `dataframe` is a view of, which is held while it is served
+    :type dataframe: Pandas DataFrame
+    :type snapshot: None or DataFileSnapshot
+    :return: The version of the result, used in its URLs
+    :rtype: int
+    """
+    global _next_version
+    with _lock:
+        if snapshot is not None:
+            for version, (result_snapshot, _) in _results.items():
+                if result_snapshot is snapshot:
+                    _results.move_to_end(version)
+                    return version
+
+        version = _next_version
+        _next_version += 1
+        _results[version] = (snapshot, dataframe)
+        if len(_results) > _MAX_RESULTS:
+            dropped_version, _ = _results.popitem(last=False)
+            for key in [key for key in _pages if key[0] == dropped_version]:
+                del _pages[key]
+        return version
+
+
+def get_result_info(version):
+    """
+    Get the columns and size of the result `version`
+
+    :param version: The version of the result
+    :type version: int
+    :return: (Optional) dict of the columns, number of rows and number of pages, None if there is no such result
+    :rtype: (Optional) dict
+    """
+    with _lock:
+        _, dataframe = _results.get(version, (None, None))
+    if dataframe is None:
+        return None
+
+    return {
+        "version": version,
+        "columns": [str(column) for column in dataframe.columns],
+        "total_rows": len(dataframe),
+        "page_rows": _PAGE_ROWS,
+        "total_pages": max((len(dataframe) + _PAGE_ROWS - 1) // _PAGE_ROWS, 1),
+    }
+
+
+def get_page(version, page):
+    """
+    Get the JSON of page `page` of the result `version`.
+    Pages are cached, a result's pages never change since every display is a new version.
+
+    :param version: The version of the result
+    :param page: The index of the page
+    :type version: int
+    :type page: int
+    :return: (Optional) JSON of the rows of the page, each a list of the row's label then its values,
+        None if there is no such result
+    :rtype: (Optional) bytes
+    """
+    with _lock:
+        if (version, page) in _pages:
+            _pages.move_to_end((version, page))
+            return _pages[(version, page)]
+        _, dataframe = _results.get(version, (None, None))
+    if dataframe is None:
+        return None
+
+    rows = dataframe.iloc[page * _PAGE_ROWS : (page + 1) * _PAGE_ROWS]
+    page_json = json.dumps(
+        {
+            "first_row": page * _PAGE_ROWS,
+            "rows": [
+                [str(label)] + values
+                for label, values in zip(rows.index, rows.astype(str).values.tolist())
+            ],
+        }
+    ).encode("utf-8")
+
+    with _lock:
+        _pages[(version, page)] = page_json
+        if len(_pages) > _MAX_CACHED_PAGES:
+            _pages.popitem(last=False)
+    return page_json
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the display page and the JSON of results and their pages
+    """
+
+    def _send(self, status, content_type, body):
+        """
+        Send a response
+
+        :param status: The HTTP status code
+        :param content_type: The content type of `body`
+        :param body: The body of the response
+        :type status: int
+        :type content_type: string
+        :type body: bytes
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """
+        Respond to a GET request for the display page, a result, or a page of a result
+        """
+        url = urlparse(self.path)
+        result_match = re.fullmatch(r"/results/(\d+)", url.path)
+        page_match = re.fullmatch(r"/results/(\d+)/pages/(\d+)", url.path)
+
+        if url.path == "/" and "version" in parse_qs(url.query):
+            self._send(200, "text/html; charset=utf-8", _PAGE.encode("utf-8"))
+        elif result_match is not None:
+            result_info = get_result_info(int(result_match.group(1)))
+            if result_info is None:
+                self._send(404, "text/plain", b"This result is no longer available")
+            else:
+                self._send(
+                    200, "application/json", json.dumps(result_info).encode("utf-8")
+                )
+        elif page_match is not None:
+            page_json = get_page(int(page_match.group(1)), int(page_match.group(2)))
+            if page_json is None:
+                self._send(404, "text/plain", b"This result is no longer available")
+            else:
+                self._send(200, "application/json", page_json)
+        else:
+            self._send(404, "text/plain", b"Not found")
+
+    def log_message(self, format, *args):
+        """
+        Requests are not logged, so they do not interrupt the CLI
+        """
+        pass
+
+
+def get_server_address():
+    """
+    Get the address of the display server, starting it if it is not running.
+    The server only accepts connections from this computer, and stops when the program exits.
+
+    :return: The base URL of the server
+    :rtype: string
+    """
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((_HOST, 0), _RequestHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return "http://{}:{}".format(_HOST, _server.server_address[1])
+
+
+def _serve(dataframe, output_stream, snapshot=None):
+    """
+    Serve `dataframe` from the display server and open it in the current browser
+
+    :param dataframe: the Pandas DataFrame to serve, which must not be changed while it is served
+    :param output_stream: Function to pass messages about the display
+    :param snapshot: (default=None) The DataFileSnapshot `dataframe` is a view of
+    :type dataframe: Pandas DataFrame
+    :type output_stream: function that takes in a string
+    :type snapshot: None or DataFileSnapshot
+    """
+    try:
+        url = "{}/?version={}".format(
+            get_server_address(), _add_result(dataframe, snapshot)
+        )
+    except Exception as e:
+        output_stream(str(e))
+        output_stream("There was a problem starting the display server")
+        return
+
+    output_stream("Opening {} in browser...".format(url))
+    try:
+        webbrowser.open(url, new=2)
+    except Exception as e:
+        output_stream(str(e))
+        output_stream("There was a problem opening the browser")
+
+
+def display(dataframe, output_stream=print):
+    """
+    Serve `dataframe` from the display server and open it in the current browser
+
+    :param dataframe: the Pandas DataFrame to display
+    :param output_stream: Function to pass messages about the display
+    :type dataframe: Pandas DataFrame
+    :type output_stream: function that takes in a string
+    """
+    # `dataframe` may be changed by the caller later, so a copy is served
+    _serve(dataframe.copy(), output_stream)
+
+
+def display_rows(rows, output_stream=print):
+    """
+    Serve `rows` from the display server and open them in the current browser.
+    Rows of a DataFile are served from its snapshot, other rows are read once and served as they are.
+
+    :param rows: the rows to display
+    :param output_stream: Function to pass messages about the display
+    :type rows: RowStream
+    :type output_stream: function that takes in a string
+    """
+    snapshot = rows.get_snapshot()
+    if snapshot is not None:
+        _serve(snapshot.view(), output_stream, snapshot)
+    else:
+        _serve(rows.to_dataframe(), output_stream)
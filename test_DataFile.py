@@ -1,8 +1,40 @@
+import json
+import os
 import pandas as pd
-from dataFile import DataFile
+import re
+import tempfile
+import threading
+import time
+from dataFile import (
+    DataFile,
+    MATCH_LITERAL,
+    MATCH_LITERAL_IGNORE_CASE,
+    MATCH_MODES,
+    MATCH_PREFIX,
+    MATCH_REGEX,
+)
+from dataFileChunked import ChunkedDataFile
+from dataFileCLIController import (
+    DataFileCLIController,
+    FileAlreadyExists,
+    SOURCE_COLUMN,
+)
 from dataFileIO import DataFileIO
+from dataFileIOArrow import DataFileIOArrow, PartialLoadError
+from dataFileIOCSV import (
+    DataFileIOCSV,
+    InvalidFileType,
+    infer_column_types,
+    pa_feather,
+)
+from dataFileIOParquet import DataFileIOParquet
+from dataFileJournal import JournalMismatchError
+import data_display_collector as display_collector
+from data_display_rows import RowStream, adapt_rows_display
+from displays import ASCII_display, HTML_display, HTTP_display
 import unittest
-from unittest.mock import MagicMock
+import urllib.request
+from unittest.mock import MagicMock, patch
 
 
 class TestModel(unittest.TestCase):
@@ -58,6 +90,58 @@ class TestModel(unittest.TestCase):
 
         self.assertTrue(modified_dataframe.equals(test_datafile.get()))
 
+    def test_datafile_add_rows(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice"],
+                "Favourite Tea": ["Green"],
+                "Favourite Number": ["7"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        test_datafile.add_rows(
+            [
+                ["Bob", "English Breakfast", "100"],
+                {"Favourite Number": "9", "Name": "Charlie", "Favourite Tea": "Matcha"},
+            ]
+        )
+        test_datafile.add_rows(
+            pd.DataFrame(
+                {
+                    "Favourite Tea": ["Oolong"],
+                    "Name": ["Dave"],
+                    "Favourite Number": ["3"],
+                }
+            )
+        )
+        test_datafile.add_row(["Eve", "Chai", "5"])
+
+        self.assertEqual(len(test_datafile), 5)
+        self.assertEqual(list(test_datafile.search("Dave", "Name").index), [3])
+
+        modified_dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie", "Dave", "Eve"],
+                "Favourite Tea": [
+                    "Green",
+                    "English Breakfast",
+                    "Matcha",
+                    "Oolong",
+                    "Chai",
+                ],
+                "Favourite Number": ["7", "100", "9", "3", "5"],
+            }
+        )
+
+        self.assertTrue(modified_dataframe.equals(test_datafile.get()))
+        self.assertRaises(ValueError, test_datafile.add_row, ["Frank"])
+
     def test_datafile_remove_row_single(self):
         test_IO = DataFileIO()
         test_IO.save = MagicMock(return_value=None)
@@ -112,6 +196,38 @@ class TestModel(unittest.TestCase):
 
         self.assertTrue(modified_dataframe.equals(test_datafile.get()))
 
+    def test_datafile_remove_row_repeated(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["person{}".format(i) for i in range(3000)],
+                "Favourite Number": [str(i % 7) for i in range(3000)],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        expected_dataframe = dataframe.copy()
+        for index in [0, 5, 5, 2990, 100]:
+            test_datafile.remove_row(index)
+            expected_dataframe = expected_dataframe.drop(
+                expected_dataframe.index[index]
+            )
+        test_datafile.remove_row([0, 1])
+        expected_dataframe = expected_dataframe.iloc[2:]
+        for _ in range(1100):
+            test_datafile.remove_row(10)
+            expected_dataframe = expected_dataframe.drop(expected_dataframe.index[10])
+
+        expected_dataframe = expected_dataframe.reset_index(drop=True)
+
+        self.assertEqual(len(test_datafile), len(expected_dataframe))
+        self.assertTrue(expected_dataframe.equals(test_datafile.get()))
+        self.assertRaises(KeyError, test_datafile.remove_row, len(expected_dataframe))
+
     def test_datafile_search_exact_nonempty(self):
         test_IO = DataFileIO()
         test_IO.save = MagicMock(return_value=None)
@@ -276,6 +392,98 @@ class TestModel(unittest.TestCase):
 
         self.assertRaises(KeyError, test_datafile.search_multi, search_terms)
 
+    def test_datafile_typed_columns_search_as_strings(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie", "Dave"],
+                "Favourite Tea": ["Green", "Green", "Matcha", "Green"],
+                "Favourite Number": [7, 100, 9, 79],
+                "Height": [1.5, 1.75, 1.8, 1.65],
+                "Birthday": ["2000-01-31", "1999-12-01", "2001-07-04", "1998-02-14"],
+            }
+        )
+        typed_dataframe = infer_column_types(dataframe)
+
+        self.assertEqual(typed_dataframe["Favourite Number"].dtype.name, "int8")
+        self.assertEqual(typed_dataframe["Favourite Tea"].dtype.name, "category")
+        self.assertEqual(typed_dataframe["Birthday"].dtype.name, "datetime64[ns]")
+        self.assertEqual(typed_dataframe["Name"].dtype, object)
+
+        test_IO.load = MagicMock(return_value=typed_dataframe)
+
+        test_datafile = DataFile(test_IO)
+
+        search_terms = [
+            ["7", "Favourite Number", False],
+            ["Green", "Favourite Tea", True],
+            ["1.", "Height", False],
+            ["-0", "Birthday", False],
+        ]
+        result_dataframe = test_datafile.search_multi(search_terms)
+
+        self.assertEqual(list(result_dataframe.index), [0, 3])
+        self.assertEqual(
+            list(test_datafile.search("100", "Favourite Number").index), [1]
+        )
+
+    def test_datafile_typed_columns_writes(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie", "Dave"],
+                "Favourite Tea": ["Green", "Green", "Matcha", "Green"],
+                "Favourite Number": [7, 100, 9, 79],
+            }
+        )
+        test_IO.load = MagicMock(return_value=infer_column_types(dataframe))
+
+        test_datafile = DataFile(test_IO)
+
+        test_datafile.set_cells(0, "Favourite Number", "8")
+        test_datafile.add_row(["Eve", "Oolong", "5"])
+        test_datafile.change_row(["Bob", "Chai", "12"], 1)
+
+        result_dataframe = test_datafile.get()
+
+        self.assertEqual(result_dataframe["Favourite Number"].dtype.name, "int8")
+        self.assertEqual(result_dataframe["Favourite Tea"].dtype.name, "category")
+        self.assertEqual(list(result_dataframe["Favourite Number"]), [8, 12, 9, 79, 5])
+        self.assertEqual(
+            list(test_datafile.search("Oolong", "Favourite Tea").index), [4]
+        )
+
+        test_datafile.set_cells(3, "Favourite Number", "1000")
+        test_datafile.add_row(["Frank", "Green", "-70000"])
+
+        result_dataframe = test_datafile.get()
+
+        self.assertEqual(result_dataframe["Favourite Number"].dtype.name, "int32")
+        self.assertEqual(
+            list(result_dataframe["Favourite Number"]), [8, 12, 9, 1000, 5, -70000]
+        )
+        self.assertEqual(
+            list(test_datafile.search("1000", "Favourite Number").index), [3]
+        )
+
+        test_datafile.set_cells(3, "Favourite Number", "79")
+        test_datafile.remove_row(5)
+        test_datafile.set_cells(2, "Favourite Number", "nine")
+
+        result_dataframe = test_datafile.get()
+
+        self.assertEqual(result_dataframe["Favourite Number"].dtype, object)
+        self.assertEqual(
+            list(result_dataframe["Favourite Number"]), ["8", "12", "nine", "79", "5"]
+        )
+        self.assertEqual(
+            list(test_datafile.search("12", "Favourite Number").index), [1]
+        )
+
     def test_change_row_valid_index(self):
         test_IO = DataFileIO()
         test_IO.save = MagicMock(return_value=None)
@@ -305,6 +513,183 @@ class TestModel(unittest.TestCase):
 
         self.assertTrue(modified_dataframe.equals(test_datafile.get()))
 
+    def test_change_row_rejected_leaves_search_unchanged(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame({"k": ["only-one", "other"], "v": ["1", "2"]})
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        self.assertEqual(len(test_datafile.search("only-one", "k")), 1)
+        self.assertRaises(ValueError, test_datafile.change_row, ["a", "b", "c"], 0)
+
+        self.assertTrue(dataframe.equals(test_datafile.get()))
+        self.assertEqual(len(test_datafile.search("only-one", "k")), 1)
+        self.assertFalse(test_datafile.has_unsaved_changes())
+
+    def test_datafile_set_cells(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "100", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        self.assertEqual(len(test_datafile.search("Green", "Favourite Tea")), 1)
+
+        test_datafile.set_cells(1, "Favourite Tea", "Green")
+        test_datafile.set_cells([0, 2], "Favourite Number", ["8", "10"])
+
+        modified_dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "Green", "Matcha"],
+                "Favourite Number": ["8", "100", "10"],
+            }
+        )
+
+        self.assertTrue(modified_dataframe.equals(test_datafile.get()))
+        self.assertEqual(len(test_datafile.search("Green", "Favourite Tea")), 2)
+        self.assertRaises(IndexError, test_datafile.set_cells, 3, "Name", "Dave")
+        self.assertRaises(KeyError, test_datafile.set_cells, 0, "City", "Sydney")
+
+    def test_datafile_set_cells_mismatched_values(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame({"k": ["a", "b", "c"]})
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        self.assertEqual(len(test_datafile.search("c", "k")), 1)
+        self.assertRaises(ValueError, test_datafile.set_cells, [2], "k", ["p", "q"])
+        self.assertRaises(ValueError, test_datafile.set_cells, [0, 1], "k", ["p"])
+        self.assertRaises(
+            ValueError,
+            test_datafile.update_where,
+            [["c", "k", True]],
+            "k",
+            ["p", "q"],
+        )
+
+        self.assertTrue(dataframe.equals(test_datafile.get()))
+        self.assertEqual(len(test_datafile.search("c", "k")), 1)
+        self.assertEqual(len(test_datafile.search("a", "k")), 1)
+        self.assertFalse(test_datafile.has_unsaved_changes())
+
+    def test_datafile_update_where(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "9", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        total_changed = test_datafile.update_where(
+            [["9", "Favourite Number", True]], "Favourite Tea", "Oolong"
+        )
+
+        modified_dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "Oolong", "Oolong"],
+                "Favourite Number": ["7", "9", "9"],
+            }
+        )
+
+        self.assertEqual(total_changed, 2)
+        self.assertTrue(modified_dataframe.equals(test_datafile.get()))
+        self.assertEqual(
+            test_datafile.update_where([["Dave", "Name", True]], "Name", "Eve"), 0
+        )
+
+    def test_datafile_save_only_changes(self):
+
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+        test_IO.append = MagicMock(return_value=None)
+        test_IO.patch = MagicMock(return_value=True)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob"],
+                "Favourite Number": ["7", "100"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe)
+
+        test_datafile = DataFile(test_IO)
+        test_datafile.save()
+
+        self.assertFalse(test_datafile.has_unsaved_changes())
+        test_IO.save.assert_not_called()
+
+        test_datafile.add_row(["Charlie", "3"])
+        test_datafile.save()
+
+        expected_appended = pd.DataFrame(
+            {"Name": ["Charlie"], "Favourite Number": ["3"]}, index=[2]
+        )
+        self.assertTrue(expected_appended.equals(test_IO.append.call_args.args[0]))
+
+        test_datafile.set_cells(1, "Favourite Number", "101")
+        test_datafile.save()
+
+        expected_patched = pd.DataFrame(
+            {"Name": ["Bob"], "Favourite Number": ["101"]}, index=[1]
+        )
+        self.assertTrue(expected_patched.equals(test_IO.patch.call_args.args[0]))
+        test_IO.save.assert_not_called()
+
+        test_datafile.remove_row(0)
+        self.assertTrue(test_datafile.has_unsaved_changes())
+        test_datafile.save()
+
+        test_IO.save.assert_called_once()
+        self.assertFalse(test_datafile.has_unsaved_changes())
+
+    def test_datafile_save_rewrites_unpatchable_changes(self):
+
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob"],
+                "Favourite Number": ["7", "100"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe)
+
+        test_datafile = DataFile(test_IO)
+        test_datafile.change_row(["Alicia", "7"], 0)
+        test_datafile.save()
+
+        expected_df = pd.DataFrame(
+            {
+                "Name": ["Alicia", "Bob"],
+                "Favourite Number": ["7", "100"],
+            }
+        )
+        self.assertTrue(expected_df.equals(test_IO.save.call_args.args[0]))
+
     def test_change_row_invalid_index(self):
         test_IO = DataFileIO()
         test_IO.save = MagicMock(return_value=None)
@@ -331,6 +716,1262 @@ class TestModel(unittest.TestCase):
             IndexError, test_datafile.change_row, altered_row, invalid_index
         )
 
+    def test_datafile_snapshot_unchanged_by_write(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob"],
+                "Favourite Tea": ["Green", "English Breakfast"],
+                "Favourite Number": ["7", "100"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        snapshot = test_datafile.snapshot()
+
+        test_datafile.change_row(
+            {"Name": "Charlie", "Favourite Tea": "Matcha", "Favourite Number": "9"}, 0
+        )
+
+        self.assertTrue(dataframe.equals(snapshot.get()))
+        self.assertEqual(snapshot.get_version() + 1, test_datafile.get_version())
+        self.assertEqual(test_datafile.get().loc[0, "Name"], "Charlie")
+
+    def test_datafile_snapshot_reused_between_writes(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob"],
+                "Favourite Tea": ["Green", "English Breakfast"],
+                "Favourite Number": ["7", "100"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        snapshot = test_datafile.snapshot()
+
+        self.assertIs(snapshot, test_datafile.snapshot())
+        self.assertEqual(snapshot.get_columns(), list(dataframe.columns))
+
+        test_datafile.remove_row(0)
+
+        self.assertIsNot(snapshot, test_datafile.snapshot())
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(len(test_datafile.snapshot()), 1)
+
+    def test_datafile_search_exact_index_after_changes(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Green"],
+                "Favourite Number": ["7", "100", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        self.assertEqual(len(test_datafile.search("Green", "Favourite Tea")), 2)
+
+        test_datafile.remove_row(0)
+        test_datafile.add_row(
+            {"Name": "Dave", "Favourite Tea": "Green", "Favourite Number": "3"}
+        )
+        test_datafile.change_row(
+            {"Name": "Bob", "Favourite Tea": "Green", "Favourite Number": "100"}, 0
+        )
+
+        result_dataframe = test_datafile.search("Green", "Favourite Tea")
+
+        modified_dataframe = pd.DataFrame(
+            {
+                "Name": ["Bob", "Charlie", "Dave"],
+                "Favourite Tea": ["Green", "Green", "Green"],
+                "Favourite Number": ["100", "9", "3"],
+            }
+        )
+
+        self.assertTrue(modified_dataframe.equals(result_dataframe))
+        self.assertIn("Favourite Tea", test_datafile.get_index_memory_usage())
+
+    def test_datafile_search_exact_index_rebuilt_after_many_changes(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame({"Name": ["Alice", "Bob"] * 1000})
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        self.assertEqual(len(test_datafile.search("Bob", "Name")), 1000)
+
+        test_datafile.add_rows([{"Name": "Bob"}] * 1500)
+        test_datafile.update_where([["Alice", "Name", True]], "Name", "Charlie")
+
+        self.assertEqual(len(test_datafile.search("Bob", "Name")), 2500)
+        self.assertEqual(len(test_datafile.search("Alice", "Name")), 0)
+        self.assertEqual(len(test_datafile.search("Charlie", "Name")), 1000)
+
+    def test_datafile_set_column_indexing_off(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "100", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        test_datafile.search("Bob", "Name")
+        self.assertIn("Name", test_datafile.get_index_memory_usage())
+
+        test_datafile.set_column_indexing("Name", False)
+        result_dataframe = test_datafile.search("Bob", "Name")
+
+        self.assertEqual(test_datafile.get_index_memory_usage(), {})
+        self.assertEqual(list(result_dataframe.index), [1])
+        self.assertRaises(KeyError, test_datafile.set_column_indexing, "City")
+
+    def test_datafile_search_substr_index_after_changes(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "100", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        self.assertEqual(len(test_datafile.search("lic", "Name", exact=False)), 1)
+        self.assertEqual(test_datafile.get_index_memory_usage(), {})
+
+        test_datafile.set_substring_indexing("Name")
+        self.assertEqual(len(test_datafile.search("lic", "Name", exact=False)), 1)
+        self.assertIn("Name", test_datafile.get_index_memory_usage())
+
+        test_datafile.add_row(
+            {"Name": "Melissa", "Favourite Tea": "Oolong", "Favourite Number": "4"}
+        )
+        test_datafile.change_row(
+            {"Name": "Alfie", "Favourite Tea": "Green", "Favourite Number": "7"}, 0
+        )
+        test_datafile.remove_row(1)
+
+        result_dataframe = test_datafile.search("lis", "Name", exact=False)
+
+        modified_dataframe = pd.DataFrame(
+            {
+                "Name": ["Melissa"],
+                "Favourite Tea": ["Oolong"],
+                "Favourite Number": ["4"],
+            }
+        )
+        modified_dataframe = modified_dataframe.set_index(pd.Index([2]))
+
+        self.assertTrue(modified_dataframe.equals(result_dataframe))
+
+    def test_datafile_search_match_modes(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob (Robert)", "alfred+1"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "100", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        expected_indices = {
+            ("(Rob", MATCH_LITERAL): [1],
+            ("d+1", MATCH_LITERAL): [2],
+            ("al", MATCH_LITERAL_IGNORE_CASE): [0, 2],
+            ("ALF", MATCH_LITERAL_IGNORE_CASE): [2],
+            ("Bob", MATCH_PREFIX): [1],
+            ("ob", MATCH_PREFIX): [],
+            ("^[Aa]l", MATCH_REGEX): [0, 2],
+        }
+
+        for (term, match_mode), indices in expected_indices.items():
+            result_dataframe = test_datafile.search(
+                term, "Name", exact=False, match_mode=match_mode
+            )
+            self.assertEqual(list(result_dataframe.index), indices)
+
+            with patch("dataFile.pa_compute", None):
+                result_dataframe = test_datafile.search(
+                    term, "Name", exact=False, match_mode=match_mode
+                )
+            self.assertEqual(list(result_dataframe.index), indices)
+
+        self.assertRaises(
+            ValueError,
+            test_datafile.search,
+            "Bob",
+            "Name",
+            exact=False,
+            match_mode="fuzzy",
+        )
+
+    def test_datafile_search_mixed_object_column(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {"Name": ["Alice", "Bob", "Charlie"], "Locker": ["A12", 120, 7]}
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        for match_mode in MATCH_MODES:
+            result_dataframe = test_datafile.search(
+                "12", "Locker", exact=False, match_mode=match_mode
+            )
+            expected_indices = [1] if match_mode == MATCH_PREFIX else [0, 1]
+            self.assertEqual(list(result_dataframe.index), expected_indices)
+
+        self.assertEqual(list(test_datafile.search("7", "Locker").index), [2])
+
+    def test_datafile_search_multi_long_query(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "9", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        search_terms = [["a", "Name", False]] * 5000 + [["9", "Favourite Number", True]]
+
+        result_dataframe = test_datafile.search_multi(
+            search_terms, match_mode=MATCH_LITERAL
+        )
+
+        self.assertEqual(list(result_dataframe.index), [2])
+
+    def test_datafile_search_multi_matches_sequential_search(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["person{}".format(i) for i in range(1000)],
+                "Favourite Number": [str(i % 7) for i in range(1000)],
+                "Favourite Tea": [
+                    ["Green", "Matcha", "Oolong"][i % 3] for i in range(1000)
+                ],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+
+        search_terms = [
+            ["son1", "Name", False],
+            ["ng", "Favourite Tea", False],
+            ["3", "Favourite Number", True],
+        ]
+
+        expected_dataframe = dataframe
+        for term, key, exact in search_terms:
+            if exact:
+                expected_dataframe = expected_dataframe[expected_dataframe[key] == term]
+            else:
+                expected_dataframe = expected_dataframe[
+                    expected_dataframe[key].str.contains(term)
+                ]
+
+        result_dataframe = test_datafile.search_multi(search_terms)
+
+        self.assertTrue(expected_dataframe.equals(result_dataframe))
+
+    def test_datafile_search_multi_cache(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Charlie"],
+                "Favourite Tea": ["Green", "English Breakfast", "Matcha"],
+                "Favourite Number": ["7", "9", "9"],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+        search_positions = MagicMock(wraps=test_datafile._search_positions)
+        test_datafile._search_positions = search_positions
+
+        search_terms = [["9", "Favourite Number", True]]
+        self.assertEqual(len(test_datafile.search_multi(search_terms)), 2)
+        self.assertEqual(search_positions.call_count, 1)
+
+        self.assertEqual(len(test_datafile.search_multi(search_terms)), 2)
+        self.assertEqual(search_positions.call_count, 1)
+
+        search_terms.append(["Ch", "Name", False])
+        self.assertEqual(len(test_datafile.search_multi(search_terms)), 1)
+        self.assertEqual(search_positions.call_count, 2)
+
+        search_terms.pop()
+        self.assertEqual(len(test_datafile.search_multi(search_terms)), 2)
+        self.assertEqual(search_positions.call_count, 2)
+
+        test_datafile.add_row(
+            {"Name": "Dave", "Favourite Tea": "Oolong", "Favourite Number": "9"}
+        )
+        self.assertEqual(len(test_datafile.search_multi(search_terms)), 3)
+        self.assertEqual(search_positions.call_count, 3)
+
+
+class TestChunked(unittest.TestCase):
+    """
+    Testing ChunkedDataFile, reading a csv file in chunks smaller than the file
+    """
+
+    def setUp(self):
+        file_descriptor, self.filename = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(file_descriptor, "w", newline="") as file:
+            file.write('Name,Note\nAlice,"line one\nline two"\nBob,x\n')
+            file.write("Carol,y\nDave,z\nEve,x\n")
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_chunked_get_matches_read_csv(self):
+        test_datafile = ChunkedDataFile.from_csv(
+            self.filename, chunk_size=2, max_resident_chunks=1
+        )
+
+        expected = pd.read_csv(self.filename, dtype=str)
+
+        self.assertEqual(len(test_datafile), 5)
+        self.assertTrue(expected.equals(test_datafile.get()))
+        self.assertTrue(expected.head(3).equals(test_datafile.snapshot().head(3)))
+
+    def test_chunked_search_and_writes(self):
+        test_datafile = ChunkedDataFile.from_csv(self.filename, chunk_size=2)
+
+        test_datafile.remove_row([0, 2])
+        test_datafile.add_row(["Frank", "x"])
+        test_datafile.set_cells(0, "Note", "changed")
+
+        expected_df = pd.DataFrame(
+            {"Name": ["Bob", "Eve", "Frank"], "Note": ["changed", "x", "x"]},
+            index=[0, 2, 3],
+        )
+        expected_df_x = expected_df.loc[[2, 3]]
+
+        self.assertEqual(len(test_datafile), 4)
+        self.assertTrue(expected_df_x.equals(test_datafile.search("x", "Note")))
+        self.assertEqual(
+            test_datafile.update_where([["x", "Note", True]], "Note", "w"), 2
+        )
+
+        test_datafile.save()
+
+        expected_saved = pd.DataFrame(
+            {
+                "Name": ["Bob", "Dave", "Eve", "Frank"],
+                "Note": ["changed", "z", "w", "w"],
+            }
+        )
+        self.assertTrue(expected_saved.equals(pd.read_csv(self.filename, dtype=str)))
+        self.assertTrue(expected_saved.equals(test_datafile.get()))
+
+    def test_mapped_head_parses_only_needed_rows(self):
+        test_datafile = ChunkedDataFile.from_csv(self.filename, mapped=True)
+        test_IO = test_datafile._IO_handler
+
+        expected = pd.read_csv(self.filename, dtype=str)
+
+        with patch.object(test_IO, "_parse", wraps=test_IO._parse) as parse:
+            head = test_datafile.snapshot().head(2)
+            parsed_rows = sum(
+                call.args[0].count(b"\n") for call in parse.call_args_list
+            )
+
+        self.assertTrue(expected.head(2).equals(head))
+        # Alice's note has a newline, so 2 rows take 3 lines
+        self.assertEqual(parsed_rows, 3)
+        self.assertTrue(expected.equals(test_datafile.get()))
+
+        test_datafile.remove_row(0)
+        test_datafile.save()
+
+        self.assertTrue(
+            expected.iloc[1:]
+            .reset_index(drop=True)
+            .equals(pd.read_csv(self.filename, dtype=str))
+        )
+
+    def test_mapped_offsets_cached_until_csv_changes(self):
+        test_datafile = ChunkedDataFile.from_csv(
+            self.filename, mapped=True, use_cache=True
+        )
+        cache_filename = test_datafile._IO_handler.get_cache_filename()
+        self.addCleanup(os.remove, cache_filename)
+
+        expected = pd.read_csv(self.filename, dtype=str)
+
+        self.assertTrue(expected.equals(test_datafile.get()))
+        self.assertTrue(os.path.exists(cache_filename))
+
+        with patch("dataFileIOCSVMapped.find_record_offsets") as find_offsets:
+            test_datafile = ChunkedDataFile.from_csv(
+                self.filename, mapped=True, use_cache=True, chunk_size=2
+            )
+            self.assertTrue(expected.equals(test_datafile.get()))
+        find_offsets.assert_not_called()
+
+        test_datafile.remove_row(0)
+        test_datafile.save()
+
+        test_datafile = ChunkedDataFile.from_csv(
+            self.filename, mapped=True, use_cache=True
+        )
+        self.assertTrue(
+            expected.iloc[1:].reset_index(drop=True).equals(test_datafile.get())
+        )
+
+
+class TestCSVSave(unittest.TestCase):
+    """
+    Testing the incremental saves of DataFileIOCSV
+    """
+
+    def setUp(self):
+        file_descriptor, self.filename = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(file_descriptor, "w", newline="") as file:
+            file.write('Name,Note\nAlice,"line one\nline two"\nBob,x')
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_csv_append_and_patch(self):
+        test_IO = DataFileIOCSV(self.filename)
+
+        test_IO.append(pd.DataFrame({"Name": ["Carol"], "Note": ["y"]}))
+        self.assertTrue(
+            test_IO.patch(
+                pd.DataFrame({"Name": ["Alice"], "Note": ["LINE ONE\nline two"]})
+            )
+        )
+        self.assertFalse(
+            test_IO.patch(pd.DataFrame({"Name": ["Bobby"], "Note": ["x"]}, index=[1]))
+        )
+
+        expected_df = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Carol"],
+                "Note": ["LINE ONE\nline two", "x", "y"],
+            }
+        )
+        self.assertTrue(expected_df.equals(test_IO.load()))
+
+
+class TestJournal(unittest.TestCase):
+    """
+    Testing the write-ahead journal of DataFile
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "data.csv")
+        pd.DataFrame({"Name": ["Alice", "Bob"], "Age": ["30", "40"]}).to_csv(
+            self.filename, index=False
+        )
+
+    def tearDown(self):
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+        os.rmdir(self.directory)
+
+    def test_journal_replayed_after_crash(self):
+        test_datafile = DataFile.from_csv(self.filename, journal=True)
+        test_datafile.add_row(["Carol", "50"])
+        test_datafile.remove_row(0)
+        test_datafile.set_cells(0, "Age", "41")
+
+        expected_df = test_datafile.get()
+
+        replayed_datafile = DataFile.from_csv(self.filename, journal=True)
+
+        self.assertTrue(expected_df.equals(replayed_datafile.get()))
+        self.assertTrue(replayed_datafile.has_unsaved_changes())
+
+        replayed_datafile.save()
+        replayed_datafile.wait_for_checkpoint()
+
+        self.assertTrue(expected_df.equals(pd.read_csv(self.filename, dtype=str)))
+        self.assertFalse(
+            DataFile.from_csv(self.filename, journal=True).has_unsaved_changes()
+        )
+
+    def test_journal_checkpoint_interrupted(self):
+        test_datafile = DataFile.from_csv(self.filename, journal=True)
+        test_datafile.add_row(["Carol", "50"])
+
+        test_datafile._journal.begin_checkpoint()
+        test_datafile._IO_handler.save(test_datafile.snapshot().view())
+
+        replayed_datafile = DataFile.from_csv(self.filename, journal=True)
+        self.assertEqual(len(replayed_datafile), 3)
+
+    def test_journal_checkpoint_not_changed_by_later_writes(self):
+        test_datafile = DataFile.from_csv(self.filename, journal=True)
+        test_datafile.set_cells(0, "Age", "31")
+
+        started = threading.Event()
+        resume = threading.Event()
+        save = test_datafile._IO_handler.save
+
+        def slow_save(dataframe):
+            started.set()
+            resume.wait()
+            save(dataframe)
+
+        test_datafile._IO_handler.save = slow_save
+        test_datafile.checkpoint()
+        started.wait()
+        test_datafile.set_cells(0, "Age", "32")
+        resume.set()
+        test_datafile.wait_for_checkpoint()
+
+        self.assertEqual(
+            list(pd.read_csv(self.filename, dtype=str)["Age"]), ["31", "40"]
+        )
+        self.assertEqual(test_datafile.get()["Age"][0], "32")
+
+    def test_journal_discarded_and_mismatched(self):
+        test_datafile = DataFile.from_csv(self.filename, journal=True)
+        test_datafile.add_row(["Carol", "50"])
+        test_datafile.discard_journal()
+
+        self.assertEqual(len(DataFile.from_csv(self.filename, journal=True)), 2)
+
+        with open(self.filename, "a") as file:
+            file.write("Dave,60\n")
+
+        test_datafile = DataFile.from_csv(self.filename, journal=True)
+        self.assertEqual(len(test_datafile), 3)
+
+        test_datafile.add_row(["Erin", "70"])
+        with open(self.filename, "a") as file:
+            file.write("Frank,80\n")
+
+        self.assertRaises(
+            JournalMismatchError, DataFile.from_csv, self.filename, journal=True
+        )
+
+    def test_journal_removed_on_close(self):
+        test_controller = DataFileCLIController()
+        test_controller.addFile(self.filename, use_cache=False, journal=True)
+        test_controller.select_datafile(0)
+        test_controller.add_row_to_current_datafile(["Carol", "50"])
+
+        test_controller.closeFile(0)
+
+        self.assertEqual(test_controller.wait_for_saves(), [(self.filename, None)])
+        self.assertEqual(os.listdir(self.directory), ["data.csv"])
+        self.assertEqual(len(pd.read_csv(self.filename)), 3)
+
+
+class TestBackgroundSave(unittest.TestCase):
+    """
+    Testing the background saves of DataFileCLIController
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filenames = []
+        for name in ["first.csv", "second.csv"]:
+            filename = os.path.join(self.directory, name)
+            pd.DataFrame({"Name": ["Alice"], "Age": ["30"]}).to_csv(
+                filename, index=False
+            )
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+        os.rmdir(self.directory)
+
+    def test_close_saves_in_background(self):
+        test_controller = DataFileCLIController()
+        for filename in self.filenames:
+            test_controller.addFile(filename, use_cache=False)
+            test_controller.select_datafile(test_controller.get_total_datafiles() - 1)
+            test_controller.add_row_to_current_datafile(["Bob", "40"])
+
+        test_controller.closeFile(1)
+        test_controller.closeFile(0)
+
+        saves = test_controller.wait_for_saves()
+        self.assertEqual(
+            sorted(saves), sorted([(filename, None) for filename in self.filenames])
+        )
+        self.assertEqual(test_controller.get_total_pending_saves(), 0)
+        self.assertEqual(test_controller.get_finished_saves(), [])
+        for filename in self.filenames:
+            self.assertEqual(len(pd.read_csv(filename)), 2)
+
+    def test_close_reports_save_error(self):
+        test_controller = DataFileCLIController()
+        test_datafile = MagicMock()
+        test_datafile.get_filename.return_value = self.filenames[0]
+        test_datafile.save.side_effect = PermissionError("read-only")
+        test_controller._add_datafiles([test_datafile])
+
+        test_controller.closeFile(0)
+
+        [(filename, error)] = test_controller.wait_for_saves()
+        self.assertEqual(filename, self.filenames[0])
+        self.assertIsInstance(error, PermissionError)
+
+
+class TestMultipleFiles(unittest.TestCase):
+    """
+    Testing the parallel loading and searching of several files by DataFileCLIController
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for index in range(5):
+            pd.DataFrame({"Name": ["Alice"] * (index + 1)}).to_csv(
+                os.path.join(self.directory, "data{}.csv".format(index)), index=False
+            )
+        with open(os.path.join(self.directory, "notes.txt"), "w") as file:
+            file.write("not data")
+
+    def tearDown(self):
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+        os.rmdir(self.directory)
+
+    def test_add_directory(self):
+        test_controller = DataFileCLIController()
+        progress = []
+
+        results = test_controller.add_directory(
+            self.directory,
+            workers=2,
+            max_memory=1,
+            progress=lambda *arguments: progress.append(arguments),
+            use_cache=False,
+        )
+
+        filenames = [
+            os.path.join(self.directory, "data{}.csv".format(index))
+            for index in range(5)
+        ]
+        self.assertEqual(results, [(filename, None) for filename in filenames])
+        self.assertEqual(test_controller.get_datafile_names(truncate=False), filenames)
+        for index in range(5):
+            test_controller.select_datafile(index)
+            self.assertEqual(
+                test_controller.get_current_datafile_dataframe_row_total(), index + 1
+            )
+        self.assertEqual(
+            [arguments[:2] for arguments in progress], [(i, 5) for i in range(1, 6)]
+        )
+
+    def test_add_files_reports_errors(self):
+        test_controller = DataFileCLIController()
+        filename = os.path.join(self.directory, "data0.csv")
+        missing_filename = os.path.join(self.directory, "missing.csv")
+
+        results = test_controller.add_files(
+            [filename, missing_filename, filename], use_cache=False
+        )
+
+        self.assertEqual(results[0], (filename, None))
+        self.assertIsInstance(results[1][1], FileNotFoundError)
+        self.assertIsInstance(results[2][1], FileAlreadyExists)
+        self.assertEqual(test_controller.get_total_datafiles(), 1)
+
+    def test_filename_registry(self):
+        test_controller = DataFileCLIController()
+        filenames = [
+            os.path.join(self.directory, "data{}.csv".format(index))
+            for index in range(2)
+        ]
+        test_controller.add_files(filenames, use_cache=False)
+
+        self.assertEqual(
+            test_controller.get_datafile_names(truncate=True),
+            ["data0.csv", "data1.csv"],
+        )
+        self.assertTrue(
+            test_controller.is_file_loaded(
+                os.path.join(self.directory, ".", "data0.csv")
+            )
+        )
+        self.assertRaises(
+            FileAlreadyExists,
+            test_controller.addFile,
+            os.path.join(self.directory, ".", "data1.csv"),
+        )
+
+        test_controller.closeFile(0, save=False)
+
+        self.assertFalse(test_controller.is_file_loaded(filenames[0]))
+        self.assertEqual(test_controller.get_datafile_names(), [filenames[1]])
+        self.assertEqual(
+            test_controller.get_datafile_names(truncate=True), ["data1.csv"]
+        )
+
+    def test_current_datafile_rows_of_search(self):
+        filename = os.path.join(self.directory, "people.csv")
+        pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Alice", "Carol"],
+                "Age": ["30", "40", "50", "60"],
+            }
+        ).to_csv(filename, index=False)
+
+        test_controller = DataFileCLIController()
+        test_controller.addFile(filename, use_cache=False)
+        test_controller.select_datafile(0)
+
+        rows = test_controller.get_current_datafile_rows(
+            [["Alice", "Name", True]], match_mode=MATCH_LITERAL
+        )
+        expected_df = pd.DataFrame({"Name": ["Alice", "Alice"], "Age": ["30", "50"]})
+
+        self.assertEqual(rows.get_length_hint(), 2)
+        self.assertTrue(expected_df.equals(rows.to_dataframe()))
+
+        rows = test_controller.get_current_datafile_rows([["Dave", "Name", True]])
+
+        self.assertEqual(rows.get_length_hint(), 0)
+        self.assertEqual(list(rows.iter_chunks()), [])
+
+    def test_print_head_of_current_datafile(self):
+        test_controller = DataFileCLIController()
+        test_controller.addFile(
+            os.path.join(self.directory, "data4.csv"), use_cache=False
+        )
+        test_controller.select_datafile(0)
+
+        with patch("builtins.print") as mock_print:
+            test_controller.print_current_datafile(head=2)
+
+        self.assertTrue(mock_print.call_args[0][0].endswith("Rows 1 to 2 of 5"))
+
+    def test_search_all_datafiles(self):
+        test_controller = DataFileCLIController()
+        filenames = [
+            os.path.join(self.directory, "data{}.csv".format(i)) for i in range(3)
+        ]
+        pd.DataFrame({"Name": ["Bob", "Alice"], "Age": ["40", "30"]}).to_csv(
+            filenames[1], index=False
+        )
+        pd.DataFrame({"Pet": ["Alice"]}).to_csv(filenames[2], index=False)
+        test_controller.add_files(filenames, use_cache=False)
+
+        queried_df = test_controller.get_queried_of_all_datafiles(
+            [["Alice", "Name", True]]
+        )
+
+        expected_df = pd.DataFrame(
+            {
+                SOURCE_COLUMN: [filenames[0], filenames[1]],
+                "Name": ["Alice", "Alice"],
+                "Age": [float("nan"), "30"],
+            },
+            index=[0, 1],
+        )
+        self.assertTrue(expected_df.equals(queried_df))
+        self.assertEqual(
+            list(
+                test_controller.get_queried_of_all_datafiles(
+                    [["x", "Owner", True]]
+                ).columns
+            ),
+            [SOURCE_COLUMN],
+        )
+
+
+class TestASCIIDisplay(unittest.TestCase):
+    """
+    Testing the paged ASCII display
+    """
+
+    def setUp(self):
+        self.test_df = pd.DataFrame(
+            {
+                "Name": ["Person {}".format(i) for i in range(1000)],
+                "Note": ["x" * 60] * 1000,
+            }
+        )
+
+    def test_format_page_only_formats_window(self):
+        page = ASCII_display.format_page(self.test_df, first_row=10, page_rows=3)
+        lines = page.split("\n")
+
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[1].startswith(" 10"))
+        self.assertTrue(lines[3].endswith("x" * 37 + "..."))
+        self.assertEqual(lines[-1], "Rows 11 to 13 of 1000")
+
+    def test_display_navigation(self):
+        pages = []
+        commands = iter(["n", "j 500", "p", "j 5000", "q"])
+
+        ASCII_display.display(
+            self.test_df, pages.append, lambda _: next(commands), page_rows=10
+        )
+
+        self.assertEqual(
+            [page.split("\n")[-1] for page in pages],
+            [
+                "Rows 1 to 10 of 1000",
+                "Rows 11 to 20 of 1000",
+                "Rows 500 to 509 of 1000",
+                "Rows 490 to 499 of 1000",
+                "Rows 991 to 1000 of 1000",
+            ],
+        )
+
+
+class TestHTMLDisplay(unittest.TestCase):
+    """
+    Testing the HTML display's streamed blocks of rows
+    """
+
+    def setUp(self):
+        file_descriptor, self.filename = tempfile.mkstemp(suffix=".html")
+        os.close(file_descriptor)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_write_html_in_blocks(self):
+        test_df = pd.DataFrame(
+            {"Name": ["Person {}".format(i) for i in range(2500)], "Age": range(2500)}
+        )
+        test_df.loc[1, "Name"] = "</script><b>"
+
+        HTML_display.write_html(test_df, self.filename, block_rows=1000)
+
+        with open(self.filename, encoding="utf-8") as file:
+            page = file.read()
+        blocks = re.findall(
+            r'<script type="application/json" class="rows">(.*?)</script>', page
+        )
+
+        self.assertEqual(len(blocks), 3)
+        rows = [row for block in blocks for row in json.loads(block)]
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[1], ["1", "</script><b>", "1"])
+        self.assertEqual(rows[-1], ["2499", "Person 2499", "2499"])
+
+
+class TestHTTPDisplay(unittest.TestCase):
+    """
+    Testing the local display server
+    """
+
+    def test_serves_pages_of_result(self):
+        test_df = pd.DataFrame({"Name": ["Person {}".format(i) for i in range(250)]})
+        messages = []
+
+        with patch("webbrowser.open") as mock_open:
+            HTTP_display.display(test_df, messages.append)
+        url = mock_open.call_args[0][0]
+        test_df.loc[0, "Name"] = "Changed"
+
+        base_url, version = url.split("/?version=")
+        self.assertTrue(base_url.startswith("http://127.0.0.1:"))
+        self.assertEqual(messages, ["Opening {} in browser...".format(url)])
+
+        with urllib.request.urlopen(url) as response:
+            self.assertIn(b"<table", response.read())
+        with urllib.request.urlopen(
+            "{}/results/{}".format(base_url, version)
+        ) as response:
+            result_info = json.load(response)
+        with urllib.request.urlopen(
+            "{}/results/{}/pages/2".format(base_url, version)
+        ) as response:
+            page = json.load(response)
+
+        self.assertEqual(result_info["total_rows"], 250)
+        self.assertEqual(result_info["total_pages"], 3)
+        self.assertEqual(len(page["rows"]), 50)
+        self.assertEqual(page["rows"][0], ["200", "Person 200"])
+        self.assertEqual(
+            json.loads(HTTP_display.get_page(int(version), 0))["rows"][0],
+            ["0", "Person 0"],
+        )
+        self.assertIsNone(HTTP_display.get_page(int(version) + 1, 0))
+
+    def test_serves_datafile_from_snapshot(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+        test_IO.load = MagicMock(
+            return_value=pd.DataFrame({"Name": ["Alice", "Bob", "Charlie"]})
+        )
+        test_datafile = DataFile(test_IO)
+
+        with patch("webbrowser.open") as mock_open:
+            HTTP_display.display_rows(
+                RowStream.from_snapshot(test_datafile.snapshot()), print
+            )
+            HTTP_display.display_rows(
+                RowStream.from_snapshot(test_datafile.snapshot()), print
+            )
+            test_datafile.set_cells(0, "Name", "Alfie")
+            HTTP_display.display_rows(
+                RowStream.from_snapshot(test_datafile.snapshot()), print
+            )
+        urls = [call[0][0] for call in mock_open.call_args_list]
+        versions = [int(url.split("/?version=")[1]) for url in urls]
+
+        self.assertEqual(versions[0], versions[1])
+        self.assertNotEqual(versions[0], versions[2])
+        self.assertEqual(
+            json.loads(HTTP_display.get_page(versions[0], 0))["rows"][0],
+            ["0", "Alice"],
+        )
+        self.assertEqual(
+            json.loads(HTTP_display.get_page(versions[2], 0))["rows"][0],
+            ["0", "Alfie"],
+        )
+
+
+class TestDisplayRegistry(unittest.TestCase):
+    """
+    Testing the lazy registry of display plugins
+    """
+
+    def test_displays_found_and_imported_lazily(self):
+        self.assertEqual(
+            display_collector.get_display_names()[:3],
+            ["ASCII_display", "HTML_display", "HTTP_display"],
+        )
+        self.assertIs(
+            display_collector.get_display("ASCII_display"), ASCII_display.display_rows
+        )
+
+        with patch.dict(display_collector._DISPLAY_SOURCES):
+            display_collector.register_display("Missing_display", "displays.missing")
+            self.assertIn("Missing_display", display_collector.get_display_names())
+            self.assertRaises(
+                ImportError, display_collector.get_display, "Missing_display"
+            )
+
+
+class TestRowStream(unittest.TestCase):
+    """
+    Testing the rows given to display plugins
+    """
+
+    def setUp(self):
+        self.chunks_read = []
+
+        def chunks():
+            for first_row in range(0, 100, 7):
+                self.chunks_read.append(first_row)
+                yield pd.DataFrame(
+                    {"Number": range(first_row, min(first_row + 7, 100))},
+                    index=range(first_row, min(first_row + 7, 100)),
+                )
+
+        self.test_rows = RowStream(["Number"], chunks())
+
+    def test_rechunk_and_collect(self):
+        blocks = list(self.test_rows.iter_chunks(10))
+
+        self.assertEqual([len(block) for block in blocks], [10] * 10)
+        self.assertEqual(list(pd.concat(blocks)["Number"]), list(range(100)))
+        self.assertEqual(
+            list(RowStream(["Number"], []).to_dataframe().columns), ["Number"]
+        )
+
+    def test_ascii_display_only_reads_shown_rows(self):
+        pages = []
+        commands = iter(["n", "q"])
+
+        ASCII_display.display_rows(
+            self.test_rows, pages.append, lambda _: next(commands), page_rows=5
+        )
+
+        self.assertEqual(
+            [page.split("\n")[-1] for page in pages],
+            ["Rows 1 to 5", "Rows 6 to 10"],
+        )
+        self.assertLess(len(self.chunks_read), 15)
+
+    def test_dataframe_display_adapter(self):
+        test_df = pd.DataFrame({"Name": ["Alice", "Bob"]})
+        shown = []
+
+        display_collector.adapt_dataframe_display(
+            lambda dataframe, output_stream: shown.append(dataframe)
+        )(RowStream.from_dataframe(test_df, chunk_rows=1), print, input_stream=input)
+
+        self.assertTrue(test_df.equals(shown[0]))
+
+    def test_display_input_stream_is_optional(self):
+        asked = []
+
+        def interactive_display(rows, output_stream, input_stream):
+            asked.append(input_stream("Next page? "))
+
+        self.assertIs(adapt_rows_display(interactive_display), interactive_display)
+
+        adapt_rows_display(lambda rows, output_stream: asked.append("shown"))(
+            self.test_rows, print, input_stream=lambda _: "q"
+        )
+        adapt_rows_display(interactive_display)(
+            self.test_rows, print, input_stream=lambda _: "q"
+        )
+
+        self.assertEqual(asked, ["shown", "q"])
+
+    def test_dtypes(self):
+        test_df = pd.DataFrame({"Name": ["Alice"], "Age": [30]})
+
+        self.assertEqual(
+            RowStream.from_dataframe(test_df).get_dtypes(), test_df.dtypes.to_dict()
+        )
+        self.assertIsNone(self.test_rows.get_dtypes())
+        self.assertEqual(
+            RowStream(["Age"], [], dtypes={"Age": "int64"})
+            .to_dataframe()["Age"]
+            .dtype.name,
+            "int64",
+        )
+
+
+@unittest.skipIf(pa_feather is None, "pyarrow is not installed")
+class TestCSVCache(unittest.TestCase):
+    """
+    Testing the Feather cache of DataFileIOCSV
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "data.csv")
+        pd.DataFrame({"Name": ["Alice", "Bob"], "Age": [30, 40]}).to_csv(
+            self.filename, index=False
+        )
+
+    def tearDown(self):
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+        os.rmdir(self.directory)
+
+    def test_cache_used_until_csv_changes(self):
+        test_IO = DataFileIOCSV(self.filename, infer_types=True, use_cache=True)
+        expected = test_IO.load()
+
+        self.assertTrue(os.path.exists(test_IO.get_cache_filename()))
+
+        with patch.object(test_IO, "_parse") as parse:
+            cached = test_IO.load()
+            os.utime(self.filename)
+            cached_after_touch = test_IO.load()
+            parse.assert_not_called()
+
+        self.assertTrue(expected.equals(cached))
+        self.assertTrue(expected.equals(cached_after_touch))
+
+        with open(self.filename, "a") as file:
+            file.write("Carol,50\n")
+
+        self.assertEqual(list(test_IO.load()["Name"]), ["Alice", "Bob", "Carol"])
+
+    def test_cache_refreshed_on_save(self):
+        test_IO = DataFileIOCSV(self.filename, use_cache=True)
+        test_IO.load()
+
+        test_IO.save(pd.DataFrame({"Name": ["Dave"], "Age": ["60"]}))
+
+        with patch.object(test_IO, "_parse") as parse:
+            cached = test_IO.load()
+            parse.assert_not_called()
+
+        expected = pd.DataFrame({"Name": ["Dave"], "Age": ["60"]})
+        self.assertTrue(expected.equals(cached))
+
+    def test_cache_updated_on_append_and_patch(self):
+        test_IO = DataFileIOCSV(self.filename, infer_types=True, use_cache=True)
+        test_IO.load()
+
+        test_IO.append(pd.DataFrame({"Name": ["Carol"], "Age": [1000]}))
+        self.assertTrue(
+            test_IO.patch(pd.DataFrame({"Name": ["Bil"], "Age": [41]}, index=[1]))
+        )
+
+        with patch.object(test_IO, "_parse") as parse:
+            cached = test_IO.load()
+            parse.assert_not_called()
+
+        expected = DataFileIOCSV(self.filename, infer_types=True).load()
+        self.assertTrue(expected.equals(cached))
+        self.assertEqual(cached["Age"].dtype.name, "int16")
+        self.assertEqual(list(cached["Name"]), ["Alice", "Bil", "Carol"])
+
+    def test_cache_removed_when_dtype_changes(self):
+        test_IO = DataFileIOCSV(self.filename, use_cache=True)
+        test_IO.load()
+
+        self.assertTrue(
+            test_IO.patch(pd.DataFrame({"Name": ["Bob"], "Age": ["4x"]}, index=[1]))
+        )
+
+        self.assertFalse(os.path.exists(test_IO.get_cache_filename()))
+        self.assertEqual(list(test_IO.load()["Age"]), ["30", "4x"])
+
+
+@unittest.skipIf(pa_feather is None, "pyarrow is not installed")
+class TestColumnarIO(unittest.TestCase):
+    """
+    Testing DataFileIOParquet and DataFileIOArrow, through DataFile.from_file
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dataframe = pd.DataFrame(
+            {
+                "Name": ["Alice", "Bob", "Carol"],
+                "Age": [30, 40, 50],
+                "Team": pd.Categorical(["red", "blue", "red"]),
+            }
+        )
+
+    def tearDown(self):
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+        os.rmdir(self.directory)
+
+    def test_columnar_round_trip(self):
+        for IO_handler_type, extension in [
+            (DataFileIOParquet, ".parquet"),
+            (DataFileIOArrow, ".arrow"),
+        ]:
+            filename = os.path.join(self.directory, "data" + extension)
+            IO_handler_type(filename).save(self.dataframe)
+
+            test_datafile = DataFile.from_file(filename)
+            self.assertIsInstance(test_datafile._IO_handler, IO_handler_type)
+            self.assertTrue(self.dataframe.equals(test_datafile.get()))
+
+            test_datafile.set_cells(0, "Age", 31)
+            test_datafile.set_cells(0, "Team", "blue")
+            test_datafile.save()
+
+            expected_df = self.dataframe.copy()
+            expected_df.loc[0, "Age"] = 31
+            expected_df.loc[0, "Team"] = "blue"
+            self.assertTrue(expected_df.equals(DataFile.from_file(filename).get()))
+
+    def test_columnar_projection_and_filters(self):
+        filename = os.path.join(self.directory, "data.parquet")
+        DataFileIOParquet(filename).save(self.dataframe)
+
+        test_datafile = DataFile.from_file(
+            filename, columns=["Name"], filters=[("Age", ">", 35)]
+        )
+
+        expected_df = pd.DataFrame({"Name": ["Bob", "Carol"]})
+
+        self.assertTrue(expected_df.equals(test_datafile.get()))
+
+        test_datafile.set_cells(0, "Name", "Robert")
+        self.assertRaises(PartialLoadError, test_datafile.save)
+
+    def test_from_file_unsupported_extension(self):
+        self.assertRaises(
+            InvalidFileType,
+            DataFile.from_file,
+            os.path.join(self.directory, "data.xlsx"),
+        )
+
+
+class TestSearchBenchmark(unittest.TestCase):
+    """
+    Compares the indexed substring search of DataFile against a column scan with `str.contains`
+    """
+
+    def test_benchmark_search_substr(self):
+        test_IO = DataFileIO()
+        test_IO.save = MagicMock(return_value=None)
+
+        total_rows = 100000
+        dataframe = pd.DataFrame(
+            {
+                "Name": ["person{}".format(i) for i in range(total_rows)],
+                "Favourite Number": [str(i % 97) for i in range(total_rows)],
+            }
+        )
+        test_IO.load = MagicMock(return_value=dataframe.copy())
+
+        test_datafile = DataFile(test_IO)
+        test_datafile.set_substring_indexing("Name")
+        terms = ["son1234", "son99", "rson5000", "son777", "son4242", "rson31"]
+
+        # The first search builds the index, which is timed on its own
+        start_time = time.perf_counter()
+        test_datafile.search("person0", "Name", exact=False)
+        build_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        scan_results = [dataframe[dataframe["Name"].str.contains(t)] for t in terms]
+        scan_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        index_results = [test_datafile.search(t, "Name", exact=False) for t in terms]
+        index_time = time.perf_counter() - start_time
+
+        for scan_result, index_result in zip(scan_results, index_results):
+            self.assertTrue(scan_result.equals(index_result))
+
+        self.assertLess(
+            index_time,
+            scan_time,
+            "indexed searches took {:.3f}s against {:.3f}s for str.contains "
+            "(index built in {:.3f}s)".format(index_time, scan_time, build_time),
+        )
+        self.assertLess(
+            test_datafile.get_index_memory_usage()["Name"],
+            dataframe["Name"].memory_usage(deep=True),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()